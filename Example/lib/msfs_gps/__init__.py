@@ -0,0 +1,18 @@
+"""
+    msfs_gps -> package
+        @brief
+        The GPS receiver of Example/code.py as a package, for CircuitPython (copy it to /lib on the CIRCUITPY drive)
+        and CPython. The core modules do not use the hardware:
+            nmea      the framer, tokenizer and decoders of the NMEA sentences
+            fix       the fix record (gps_fix), the pairing of the sentences of a burst and the burst reader
+            rx        overrun detection of the uart receive buffer
+            flight    flight phase, flight metrics and dead reckoning
+            lcd       the serLCD renderer and the pages it shows
+            pipeline  the queues and frame pacing between the asyncio tasks
+            stats     latency histograms, heap statistics, span tracer
+            track     the flight track recorder
+            airports  the nearest-airport lookup
+        adapters is the only module that talks to board, busio, feathers2, microcontroller and the serLCD library.
+        app holds the settings, the asyncio tasks and main(): code.py sets the settings and calls app.main().
+        Nothing is imported here: a module is only loaded (and takes RAM) when it is used.
+"""
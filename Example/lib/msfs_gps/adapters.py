@@ -0,0 +1,59 @@
+"""
+    msfs_gps.adapters -> module
+        @brief
+        The thin layer between the app and the hardware: the only module of msfs_gps that uses board, busio,
+        feathers2, microcontroller, sparkfun_serlcd and adafruit_dotstar. Each function imports what it needs
+        when it is called, so the rest of the package imports on CPython, where Tools/replay.py puts the
+        stand-ins of Tools/host in place of these modules.
+"""
+
+def open_i2c():
+    # the I2C bus of the serLCD: the QT/Stemma connector of the FeatherS2
+    import board
+    if board.board_id == 'unexpectedmaker_feathers2':
+        return board.STEMMA_I2C()
+    return board.I2C()
+
+def open_lcd(i2c, address=0x72):
+    # raises ValueError when the serLCD is locked up, OSError when there is none at address
+    from sparkfun_serlcd import Sparkfun_SerLCD_I2C
+    return Sparkfun_SerLCD_I2C(i2c, address)
+
+def open_uart(baud, rx_len):
+    # the uart of the GPS feed. Its receive buffer (rx_len bytes) can only be set when it is created
+    import board
+    import busio
+    return busio.UART(board.TX, board.RX, baudrate=baud, timeout=0, receiver_buffer_size=rx_len)
+
+def open_dotstar():
+    import board
+    import adafruit_dotstar as dotstar
+    return dotstar.DotStar(board.APA102_SCK, board.APA102_MOSI, 1, brightness=0.5, auto_write=True)
+
+def enable_ldo2():
+    # the second LDO of the FeatherS2 powers the Stemma connector
+    import feathers2
+    feathers2.enable_LDO2(True)
+
+def led_set(state):
+    # the built-in blue led
+    import feathers2
+    feathers2.led_set(state)
+
+def led_blink():
+    import feathers2
+    feathers2.led_blink()
+
+def color_wheel(index):
+    import feathers2
+    return feathers2.dotstar_color_wheel(index)
+
+def nvm():
+    # the non-volatile memory of the board (a bytearray-like). None when the board has none
+    import microcontroller
+    return getattr(microcontroller, "nvm", None)
+
+def cpu_uid():
+    # raises AttributeError when the firmware does not give it (see get_cpu_id())
+    import microcontroller
+    return microcontroller.cpu.uid
@@ -0,0 +1,178 @@
+"""
+    msfs_gps.airports -> module
+        @brief
+        Nearest-airport lookup (airport_index) in the airport file of Tools/build_airports.py.
+"""
+import math
+import struct
+from array import array
+from time import monotonic_ns
+from msfs_gps.nmea import _lat, _lon
+from msfs_gps.stats import lat_histogram
+
+# The airport file of Tools/build_airports.py: a header, a row table, a cell directory and the records
+apt_magic = b'APT1'
+apt_head_fmt = "<4sHHHHI"  # magic, cell size (1/100 degrees), nr of rows, nr of columns, max records per cell, nr of cells
+apt_dir_fmt = "<HIH"       # per non-empty cell, by row and column: column, file offset of its records, nr of records
+apt_rec_fmt = "<ii4s"      # per airport: lat, lon (1/10000 minutes, as gps_fix), ICAO code
+apt_dir_len = struct.calcsize(apt_dir_fmt)  # 8
+apt_rec_len = struct.calcsize(apt_rec_fmt)  # 12
+
+"""
+    airport_index(path, nr_slots) -> class
+        @brief
+        Nearest-airport lookup in the airport file path, without loading it.
+        The airports are bucketed in a grid of cells (1 degree by default). open() reads the header and the row table
+        (the index of the first directory entry of each row: a few hundred bytes).
+        A cell is loaded with seek() + readinto(): a binary search in the directory entries of its row,
+        then its records, into one of nr_slots preallocated cache slots (least recently used first).
+        update(fix) finds the nearest airport among the 9 cells around fix. The slots of those 9 cells are
+        looked up again only when the aircraft moves into another cell; otherwise only the records already in
+        RAM are compared, with integers (squared distances in 1/100 minutes, cos(lat) as a 1/32768 fraction).
+        Result: ident (4 bytes), dist (1/10 nm) and brg (degrees). found is False when no airport is near.
+        Counters: nr_loads (cells read from the file); the histogram t_lookup (uSecs per update()).
+"""
+class airport_index:
+    def __init__(self, path, nr_slots=12):
+        self.path = path
+        self.f = None
+        self.nr_slots = max(9, nr_slots)
+        self.ident = bytearray(4)
+        self.found = False
+        self.dist = 0
+        self.brg = 0
+        self.cell = -1     # row * nr_cols + col of the last update(). -1 = none
+        self.near = []     # the slots of the 9 cells around it
+        self.nr_loads = 0
+        self.t_lookup = lat_histogram("airport")
+
+    def open(self):
+        try:
+            self.f = open(self.path, "rb")
+            head = self.f.read(struct.calcsize(apt_head_fmt))
+            magic, self.cell_size, self.nr_rows, self.nr_cols, self.max_recs, _ = struct.unpack(apt_head_fmt, head)
+        except (OSError, ValueError) as e:
+            print("airport_index: cannot read {}: {}".format(self.path, e))
+            self.f = None
+            return False
+        if magic != apt_magic:
+            print("airport_index: {} is not an airport file".format(self.path))
+            self.f = None
+            return False
+        self.cell_units = self.cell_size * 6000  # 1/100 degrees -> 1/10000 minutes
+        self.rows = array('I', [0] * (self.nr_rows + 1))
+        self.f.readinto(self.rows)  # little endian, as the file
+        self.dir_base = self.f.tell()
+        self.dir_buf = bytearray(apt_dir_len)
+        self.keys = array('l', [-1] * self.nr_slots)
+        self.used = array('L', [0] * self.nr_slots)  # last use, for the LRU
+        self.counts = array('H', [0] * self.nr_slots)
+        self.bufs = []
+        self.lats = []
+        self.lons = []
+        for _ in range(self.nr_slots):
+            self.bufs.append(bytearray(self.max_recs * apt_rec_len))
+            self.lats.append(array('l', [0] * self.max_recs))
+            self.lons.append(array('l', [0] * self.max_recs))
+        self.tick = 0
+        return True
+
+    def find_dir(self, row, col):
+        # file offset and nr of records of cell row, col (binary search in the directory of the row)
+        lo = self.rows[row]
+        hi = self.rows[row + 1]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            self.f.seek(self.dir_base + mid * apt_dir_len)
+            self.f.readinto(self.dir_buf)
+            c, offset, n = struct.unpack(apt_dir_fmt, self.dir_buf)
+            if c == col:
+                return offset, n
+            if c < col:
+                lo = mid + 1
+            else:
+                hi = mid
+        return 0, 0
+
+    def slot(self, row, col, keep):
+        # the cache slot of cell row, col. Slots in keep are not evicted
+        key = row * self.nr_cols + col
+        self.tick += 1
+        lru = -1
+        for i in range(self.nr_slots):
+            if self.keys[i] == key:
+                self.used[i] = self.tick
+                return i
+            if i not in keep and (lru < 0 or self.used[i] < self.used[lru]):
+                lru = i
+        offset, n = self.find_dir(row, col)
+        n = min(n, self.max_recs)
+        if n:
+            self.f.seek(offset)
+            self.f.readinto(memoryview(self.bufs[lru])[:n * apt_rec_len])
+            lats = self.lats[lru]
+            lons = self.lons[lru]
+            for j in range(n):
+                lats[j], lons[j], _ = struct.unpack_from(apt_rec_fmt, self.bufs[lru], j * apt_rec_len)
+        self.keys[lru] = key
+        self.counts[lru] = n
+        self.used[lru] = self.tick
+        self.nr_loads += 1
+        return lru
+
+    def update(self, fix):
+        if not self.f or not fix.valid:
+            return
+        t0 = monotonic_ns()
+        lat = fix.read(_lat)
+        lon = fix.read(_lon)
+        row = min(self.nr_rows - 1, max(0, (lat + 54000000) // self.cell_units))  # from 90 degrees South
+        col = ((lon + 108000000) // self.cell_units) % self.nr_cols                # from 180 degrees West
+        cell = row * self.nr_cols + col
+        if cell != self.cell:
+            self.cell = cell
+            near = []
+            for r in range(max(0, row - 1), min(self.nr_rows, row + 2)):
+                for c in (col - 1, col, col + 1):
+                    near.append(self.slot(r, c % self.nr_cols, near))
+            self.near = near
+            self.cos_q = int(math.cos(math.radians(lat / 600000)) * 32768)
+        la = lat // 100  # 1/100 minutes: the squares stay small ints
+        lo = lon // 100
+        best = -1
+        best_d = 0
+        best_i = 0
+        best_n = 0
+        best_e = 0
+        for s in self.near:
+            lats = self.lats[s]
+            lons = self.lons[s]
+            for j in range(self.counts[s]):
+                d_n = lats[j] // 100 - la
+                d_e = lons[j] // 100 - lo
+                if d_e > 1080000:  # across 180 degrees
+                    d_e -= 2160000
+                elif d_e < -1080000:
+                    d_e += 2160000
+                d_e = (d_e * self.cos_q) >> 15
+                d = d_n * d_n + d_e * d_e
+                if best < 0 or d < best_d:
+                    best = s
+                    best_d = d
+                    best_i = j
+                    best_n = d_n
+                    best_e = d_e  # wrapped at 180 degrees, as the distance
+        self.found = best >= 0
+        if self.found:
+            p = best_i * apt_rec_len + 8
+            self.ident[:] = self.bufs[best][p:p + 4]
+            self.dist = int(math.sqrt(best_d)) // 10  # 1/100 minutes -> 1/10 nm
+            self.brg = int(math.degrees(math.atan2(best_e, best_n)) + 360.5) % 360
+        self.t_lookup.add_since(t0)
+
+    def pr_stats(self):
+        n, mn, p50, p95, p99, mx = self.t_lookup.summary()
+        print("airport: {} {}.{} nm {} deg. Lookups: {} (uSecs p50 {} p99 {} max {}), cells loaded: {}".format(
+            self.ident.decode() if self.found else "-", self.dist // 10, self.dist % 10, self.brg,
+            n, p50, p99, mx, self.nr_loads))
+
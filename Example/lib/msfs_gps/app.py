@@ -0,0 +1,1406 @@
+"""
+    msfs_gps.app -> module
+        @brief
+        The app of Example/code.py: the settings (the module globals below, with their defaults), the creation of
+        the hardware and pipeline objects (init()), the asyncio tasks of the pipeline (pipeline()) and main().
+        code.py sets the settings it changes, then calls main():
+            from msfs_gps import app
+            app.use_diagnosics = True
+            app.main()
+        The hardware is only reached via msfs_gps.adapters: Tools/replay.py runs this module on a pc.
+"""
+import sys, os
+from time import sleep, monotonic_ns
+import asyncio
+from msfs_gps import adapters
+from msfs_gps.nmea import nmea_framer, nmea_max_len, snt_other, _utc, _lat, _lon, _gs, _crs, _alt
+from msfs_gps.fix import gps_fix, burst_reader, fix_joined
+from msfs_gps.rx import rx_monitor
+from msfs_gps.flight import (flight_state, flight_metrics, dead_reckoner, ph_none, ph_stopped, ph_taxi, ph_takeoff,
+                             ph_names, ph_am_stat, ac_none, ac_stopped, ac_flying)
+from msfs_gps.lcd import lcd_renderer, lcd_fmt_nav, lcd_fmt_flight, page_nav, page_flight, fld_phase
+from msfs_gps.pipeline import msg_queue, display_backend
+from msfs_gps.stats import lat_histogram, heap_stats, span_tracer
+from msfs_gps.track import track_recorder
+from msfs_gps.airports import airport_index
+
+t_boot = monotonic_ns()  # the boot -> first fix on lcd time is measured from here (see pr_boot())
+
+# -----------------------+
+# General debug flag     |
+my_debug = False      #  |
+# -----------------------+
+# Other global flags     |
+ctrl_c_flag = False   #  |
+# -----------------------+
+my_os = None  # will hold a list containing O.S. info
+my_machine = None
+#               like fw version, machine name.
+#               Data collected through function: get_os_info()
+my_cpu_id = None # collected through function get_cpu_id()
+
+# +--------------------------------------+
+# | Msg rx diagnostics                   |
+# +--------------------------------------+
+use_diagnosics = False
+diagnostics_iterations = 20 # Print the diagnostics report (see pr_diagnostics()) every n fixes
+# Heap diagnostics: the memory allocated by ck_uart(), split_types(), ac_status() and lcd_pr_msgs() (see heap_stats)
+use_heap_diagnostics = False
+heap_report_every = 20      # Print the heap report every n fixes
+# Span tracer: the start and end of each step of the pipeline, in a ring (see span_tracer).
+# At Ctrl-C the ring is printed to REPL. Tools/trace2chrome.py converts it into a Chrome trace (chrome://tracing)
+use_tracer = False
+trace_ring_len = 512        # nr of spans kept
+
+# +--------------------------------------+
+# | Fast boot                            |
+# +--------------------------------------+
+# No fixed sleeps at startup: the uart is read from the start, while the lcd setup and the splash screens run
+# as a task of the pipeline (see splash_task()). The splash is shown only until the first fix has been received.
+# The baudrate found by baud_detect() is kept in microcontroller.nvm and tried first at the next boot.
+# After a soft reboot in flight the position is back on the lcd within a few seconds (see pr_boot())
+fast_boot = True
+baud_nvm_index = 0          # the byte of microcontroller.nvm that holds the last detected baudrate (see baud_order())
+
+# +--------------------------------------+
+# | Flight track recorder                |
+# +--------------------------------------+
+# Appends each accepted fix to track_file as a fixed-size binary record (see track_recorder).
+# Tools/track2gpx.py converts the file into GPX or CSV.
+# CircuitPython can only write to CIRCUITPY when boot.py has remounted it: storage.remount("/", readonly=False)
+# (and the drive is then read-only for the pc).
+use_track_recorder = False
+track_file = "/track.bin"
+track_page_len = 4096       # bytes in each of the two RAM pages (170 records)
+track_flush_interval = 60   # seconds. A page that is not full is written after this time
+track_max_len = 4000000     # bytes. The recorder stops when track_file has reached this size
+
+# +--------------------------------------+
+# | Nearest airport                      |
+# +--------------------------------------+
+# airport_file is built on the pc by Tools/build_airports.py (see airport_index). Shown in the extra lcd field
+# (fld_airport, fld_apt_brg: see lcd_extra_fields)
+use_airports = False
+airport_file = "/airports.bin"
+airport_cache_cells = 12    # grid cells kept in RAM (at least the 9 around the aircraft)
+
+# +--------------------------------------+
+# | Displays                             |
+# +--------------------------------------+
+lcd_maxrows = 4
+lcd_rowlen = 20
+lcd_inline_cursor = True  # See lcd_renderer. Set to False to use the (slower) set_cursor() of the serLCD library
+# A second serLCD (set to another I2C address, see the serLCD docs) showing page_flight (see display_backend).
+# It has its own render queue and refresh rate: when it is slow or locked up, only its own frames are dropped
+use_lcd2 = False
+lcd2_address = 0x73
+lcd2_max_fps = 2
+display_retry = 5   # seconds a display waits after an I2C error before it is drawn again
+# Extra field of the lcd (row 3, after the track): one or more of fld_phase ... fld_apt_brg (see msfs_gps.lcd).
+# More than one: shown in turn
+lcd_extra_fields = (fld_phase,)
+lcd_extra_interval = 3  # seconds each field is shown (of the UTC time of the fixes)
+
+# +-----------------------------------------------+
+# | SparkFun LCD special command codes            |
+# +-----------------------------------------------+
+HIGH = 1
+LOW = 0
+
+# +-----------------------------------------------+
+# | Hardware definitions for builtin BLUE LED     |
+# +-----------------------------------------------+
+#led_interval = 1000
+led_state = HIGH  # idem. When HIGH the LED is OFF
+
+# +-----------------------------------------------+
+# | Hardware definitions for builtin NeoPixel LED |
+# +-----------------------------------------------+
+use_dotstar = False
+
+biLdIsOn = False # Flag for the built-in blue led
+
+# +--------------------------------------+
+# | GPS feed baudrate                    |
+# +--------------------------------------+
+# FSUIPC7 GPS Out can send at 4800 up to 115200 baud. A higher baudrate gets the sentences here sooner.
+# gps_baudrate = 0: detect the baudrate of the feed at startup (see baud_detect()). Else: use gps_baudrate
+gps_baudrate = 0
+baud_rates = (4800, 9600, 19200, 38400, 57600, 115200)  # the candidates for baud_detect(), in the order of trying
+baud_probe_time = 1.2  # seconds to listen at each candidate (FSUIPC7 sends a burst of sentences every second)
+
+# Buffers
+rx_buffer_min = 152  # was: rx_buffer_len = 152, one $GPRMC + $GPGGA burst at 4800 baud
+rx_hold_time = 0.25  # seconds of data the uart receive buffer must hold while the other tasks run
+rx_idle_wait = 0.01  # seconds to sleep when the uart has no data (was: a fixed 0.2)
+rx_ram_budget = 4096 # bytes that the receive buffer + read chunk may grow to when overruns are seen (see rx_monitor)
+rx_grow_hold = 10    # seconds after a growth before the next one
+pair_late = 1.5      # a sentence of a burst is late after this many max-length sentence times (see fix_pairer)
+
+# +--------------------------------------+
+# | asyncio pipeline (see pipeline())    |
+# +--------------------------------------+
+fix_q_len = 2       # nr of fixes that can wait for the flight-state evaluation
+render_q_len = 2    # nr of fixes that can wait to be shown on the lcd
+lcd_max_fps = 2     # maximum lcd refresh rate (frames per second). See render_governor
+led_interval = 0.5  # seconds between two toggles of the built-in blue led (heartbeat)
+# Dead reckoning (see dead_reckoner): between two fixes, frames with the position and altitude extrapolated
+# from the last ground speed, track and vertical rate are drawn. Only while flying
+use_dead_reckoning = False
+dr_fps = 4          # frames per second while predicting. Raises the lcd refresh cap (lcd_max_fps) to dr_fps
+dr_max_age = 2.5    # seconds. No predictions when the last fix is older (the link is down)
+
+
+"""
+    uart_sizes(baud) -> tuple
+        @brief
+        Returns (rx_buffer_len, rx_chunk_len) for baudrate baud: the size of the uart receive buffer
+        (rx_hold_time seconds of data, at least rx_buffer_min) and of the chunk the framer reads at once
+        (what arrives in two rx_idle_wait periods, at least two sentences).
+"""
+def uart_sizes(baud):
+    bps = baud // 10  # bytes per second: 8 data bits + start and stop bit
+    return (max(rx_buffer_min, int(bps * rx_hold_time)), max(2 * nmea_max_len, int(bps * rx_idle_wait * 2)))
+
+"""
+    baud_order() -> tuple
+        @brief
+        Returns baud_rates in the order in which baud_detect() tries them. With fast_boot, the baudrate of the
+        last detection (see baud_save()) comes first.
+"""
+def baud_order():
+    nvm = adapters.nvm() if fast_boot else None  # not all boards have nvm
+    i = nvm[baud_nvm_index] - 1 if nvm else -1  # 0 or 0xff (erased): none stored
+    if 0 <= i < len(baud_rates):
+        return (baud_rates[i],) + tuple(b for b in baud_rates if b != baud_rates[i])
+    return baud_rates
+
+def baud_save(baud):
+    # keeps baud for baud_order(). The nvm is flash: it is only written when baud has changed
+    nvm = adapters.nvm() if fast_boot else None
+    if nvm and baud in baud_rates and nvm[baud_nvm_index] != baud_rates.index(baud) + 1:
+        nvm[baud_nvm_index] = baud_rates.index(baud) + 1
+
+if sys.version_info > (3,):
+    long = int
+
+lp_cnt = 0
+max_lp_cnt = 99
+startup = -1
+loop_time = 0
+t_elapsed = 0
+msg_nr = 0
+
+am_last_stat = ac_none
+am_stat = ac_stopped # am_stat = airplane movement status
+am_stat_dict = {0:"none", 1:"stopped", 2:"taxying", 4: "flying"}
+lacStopMsgShown = False
+lacTaxyMsgShown = False
+# Status frames: put in the queue of a display in place of a fix_pool index and drawn by its render_task()
+# (see show_status(), lcd_pr_status()), so an i2c error of the display is handled there
+st_stopped = -2  # "Airplane is stopped or parked"
+st_taxi = -3     # "Airplane is taxying"
+st_wait = -4     # "About to receive..." on the last row
+
+# The hardware and the objects of the pipeline. Created by init() from the settings above
+i2c = None
+lcd = None
+lcd2 = None
+dots = None
+uart = None
+uart_baudrate = 0
+rx_buffer_len = 0
+rx_chunk_len = 0
+framer = None
+reader = None
+rx_mon = None
+tracer = None
+recorder = None
+airports = None
+# fix_pool: the fix records passed, by index, from parse_task() via fix_q and render_q to render_task().
+# Big enough that a record is not re-used while it waits in a queue or is being handled
+# Each display adds render_q_len + 1 records: see add_display()
+fix_pool_len = 0
+fix_pool = []
+dr_slot = 0  # the record after the pool: the predicted fix of dr_task()
+fix_q = None
+displays = []
+renderer = None  # of the first display (lcd): setup and splash screens. render_task() draws with that of its display
+render_q = None
+governor = None
+predictor = None
+fsm = None
+metrics = None
+extra_interval = 1     # lcd_extra_interval as an int >= 1. Set by init()
+extra_fld = fld_phase  # the extra field shown now (see lcd_pr_msgs())
+snt_event = asyncio.Event()   # set by uart_task() when the framer has complete sentences
+splash_done = asyncio.Event() # set by splash_task()
+fix_seen = asyncio.Event()    # set by parse_task() at the first fix. With fast_boot it ends the splash
+# Boot marks in mSecs since t_boot (-1: not yet): uart ingestion started, first fix received, first fix on the lcd
+boot_uart_ms = -1
+boot_rx_ms = -1
+boot_lcd_ms = -1
+rx_wait_start = 0             # for the rx diagnostics. See ck_uart()
+# One latency histogram per stage of the pipeline. Filled when use_diagnosics is True
+_st_rx_wait = 0  # time between two complete bursts of sentences
+_st_framing = 1  # framer.poll() (when it received data)
+_st_parse = 2    # ck_uart() + split_types() of a complete burst
+_st_state = 3    # ac_status()
+_st_lcd = 4      # lcd_pr_msgs()
+diagn = (lat_histogram("uart wait"), lat_histogram("framing"), lat_histogram("parse"),
+         lat_histogram("state"), lat_histogram("lcd write"))
+# The stages measured by heap (see heap_stats). Used when use_heap_diagnostics is True
+_hs_ck_uart = 0
+_hs_split = 1
+_hs_state = 2
+_hs_lcd = 3      # lcd_pr_msgs() until the lcd write: aflush() awaits, and what the other tasks allocate then is theirs
+heap = heap_stats(("ck_uart", "split_types", "ac_status", "lcd_pr_msgs"))
+# The stages traced by tracer (see span_tracer). arg: the index in fix_pool, or a nr of bytes
+_sp_poll = 0      # framer.poll() that received data. arg: nr of sentences completed
+_sp_fix_rx = 1    # (instant) the last sentence of a burst was received
+_sp_ck_uart = 2
+_sp_split = 3
+_sp_state = 4
+_sp_governor = 5  # render_governor waits (refresh-rate limit, uart backlog)
+_sp_render = 6    # draw_page() or lcd_pr_status() on the first display (lcd)
+_sp_lcd_run = 7   # one i2c write to the lcd (cursor command + run of characters). arg: nr of bytes
+_sp_render2 = 8   # idem _sp_render, on the other display (lcd2)
+sp_names = ("uart_task/framer.poll", "uart_task/fix rx", "parse_task/ck_uart", "parse_task/split_types",
+            "state_task/ac_status", "render_task/governor wait", "render_task/draw lcd", "render_task/lcd write",
+            "render_task/draw lcd2")
+
+"""
+    init(void) -> None
+        @brief
+        Creates the hardware objects (via msfs_gps.adapters) and the objects of the pipeline from the settings.
+        Called by main(), after code.py has changed the settings.
+"""
+def init():
+    global i2c, lcd, lcd2, dots, uart, uart_baudrate, rx_buffer_len, rx_chunk_len, framer, reader, rx_mon, tracer
+    global recorder, airports, fix_pool_len, fix_pool, dr_slot, fix_q, renderer, render_q, governor, predictor, fsm, metrics
+    global extra_interval, extra_fld
+    i2c = adapters.open_i2c()
+    # It happens when that SerLCD gets locked-up
+    # e.g. caused by touching with a finger the
+    # RX pin (4th pin fm left).
+    # This pin is very sensitive!
+    # A locked-up situation is often shown as that
+    # all the 8x5 segments of the LCD are 'filled with inverse pixels.
+    # see: https://github.com/KR0SIV/SerLCD_Reset for a reset tool.
+    # But this is not what I want.
+    # I want to be able to reset the LCD from within this script.
+    while True:
+        try:
+            lcd = adapters.open_lcd(i2c)
+            break
+        except ValueError:
+            print("The LCD is locked-up. Please connect RS with GND for a second or so.")
+            sleep(1 if fast_boot else 10)  # wait a bit
+    if use_lcd2:
+        try:
+            lcd2 = adapters.open_lcd(i2c, lcd2_address)
+        except (ValueError, OSError):
+            print("No serLCD at address {}: the second display is not used".format(hex(lcd2_address)))
+    if not fast_boot:
+        sleep(1)
+    # Make sure the 2nd LDO is turned on
+    adapters.enable_ldo2()
+    if use_dotstar:
+        dots = adapters.open_dotstar()
+    uart_baudrate = gps_baudrate if gps_baudrate else baud_order()[0]
+    rx_buffer_len, rx_chunk_len = uart_sizes(uart_baudrate)
+    uart = adapters.open_uart(uart_baudrate, rx_buffer_len)
+    tracer = span_tracer(sp_names, trace_ring_len)
+    framer = nmea_framer(uart, rx_chunk_len)
+    reader = burst_reader(framer, pair_late)
+    reader.pairer.baud = uart_baudrate
+    rx_mon = rx_monitor(rx_ram_budget, rx_grow_hold, reader)
+    rx_mon.set_sizes(rx_buffer_len, rx_chunk_len)
+    fix_pool_len = fix_q_len + 2
+    fix_pool = []
+    for _ in range(fix_pool_len):
+        fix_pool.append(gps_fix())
+    dr_slot = fix_pool_len
+    if use_dead_reckoning:
+        fix_pool.append(gps_fix())
+    fix_q = msg_queue(fix_q_len)
+    displays.clear()
+    renderer = add_display("lcd", lcd, page_nav, max(lcd_max_fps, dr_fps) if use_dead_reckoning else lcd_max_fps).renderer
+    render_q = displays[0].q
+    governor = displays[0].governor
+    if lcd2:
+        add_display("lcd2", lcd2, page_flight, lcd2_max_fps)
+    predictor = dead_reckoner(dr_max_age, dr_fps, governor.min_interval)
+    fsm = flight_state()
+    metrics = flight_metrics()
+    extra_interval = max(1, int(lcd_extra_interval))
+    extra_fld = lcd_extra_fields[0]
+    airports = airport_index(airport_file, airport_cache_cells) if use_airports else None
+    recorder = track_recorder(track_file, track_page_len, track_flush_interval, track_max_len) if use_track_recorder else None
+
+"""
+    add_display(name, lcd, page, max_fps) -> display_backend
+        @brief
+        Adds a display (see display_backend) with a renderer for the serLCD lcd. Grows fix_pool by the
+        records that its queue and the frame it is drawing can hold. Called by init(), before pipeline() starts.
+"""
+def add_display(name, lcd, page, max_fps):
+    global fix_pool_len, dr_slot
+    rd = lcd_renderer(lcd, lcd_maxrows, lcd_rowlen, lcd_inline_cursor, tracer=tracer, sid=_sp_lcd_run)
+    d = display_backend(name, rd, page, render_q_len, max_fps, rx_busy, tracer, _sp_governor)
+    displays.append(d)
+    for _ in range(render_q_len + 1):
+        fix_pool.insert(fix_pool_len, gps_fix())  # before the record of dr_task()
+        fix_pool_len += 1
+    dr_slot = fix_pool_len
+    for e in displays:
+        e.governor.dr_slot = dr_slot
+    return d
+
+"""
+    rx_busy(void) -> bool
+        @brief
+        True while the uart receive buffer is more than half full: the render tasks then let the uart task go first
+        (see render_governor).
+"""
+def rx_busy():
+    return uart.in_waiting > rx_buffer_len // 2
+
+# +--------------------------------------+
+# | Definitions for all LEDs             |
+# +--------------------------------------+
+led_colors_dict = {
+    'green' : 0,
+    'red' : 1,
+    'blue' : 2,
+    'white' : 3,
+    'off' : 4 }
+
+lcd_bl_colors = ["black", "red", "orange", "yellow", "green", "blue", "indigo", "violet", "grey", "white"]
+
+brill = 50
+
+colorN = [(0,  0,     0),     # black is off
+  (brill,       0,     0),     # bright red
+  (0xFF8C00,    0,     0),     # orange
+  (brill,       brill, 0),     # bright yellow
+  (0,           brill, 0),     # bright green
+  (0,           0,     brill), # bright blue
+  (0x4B0082,    0,     0),     # indigo
+  (0xA020F0,    0,     0),     # violet
+  (0x808080,    0,     0),     # grey
+  (brill,       brill, brill)] # white
+
+# Create a colour wheel index int
+color_index = 0
+lcd_color_index = 0
+lcd_clr_chg_cnt = 0
+
+"""
+   get_os_info() -> Bool
+        @brief
+        Get and extract the name and version of the CircuitPython firmware installed,
+        e.g. 'release='6.3.0' and 'version='6.3.0 on 2021-06-01'.
+        Get also the name of the 'machine', e.g.: FeatherS2 with ESP32S2'
+    Parameters: None
+    Return: Bool
+
+"""
+def get_os_info():
+    global my_os, my_debug, my_machine
+    my_fw_itms = ("sysname", "nodename", "release", "version", "machine")
+    n = os.uname()
+    if n:
+        my_os = n
+        le = len(my_os)
+        my_machine = my_os[le-1]
+        print("get_os_info(): my_machine=", my_machine)
+        if my_debug:
+            for i in range(le):  # sysname, nodename, release, version and machine
+            # e.g.: (sysname='esp32s2', nodename='esp32s2', release='6.3.0',
+            # version='6.3.0 on 2021-06-01', machine='FeatherS2 with ESP32S2')
+                print("{}: \'{}\'.".format(my_fw_itms[i], my_os[i]), end='\n')
+        return True
+    else:
+        print("get_os_info(): n: {}, type(n): {}".format(n, type(n)), end='\n')
+        return False
+
+"""
+   get_cpu_id() -> Bool
+        @brief
+        Gets the unique id of the cpu
+    Parameters: None
+    Return: Bool
+
+"""
+def get_cpu_id():
+    global my_cpu_id, my_debug
+    TAG = "get_cpu_id(): "
+    lRetval = True  # assume positive result
+    n1 = None
+    n2 = None
+    try:
+        n1 = adapters.cpu_uid()
+        n2 = n1[:-2]
+        if my_debug:
+            print(TAG+"cpu uid: {}".format(n2), end='\n')
+            print(TAG+"list(n2)=", list(n2))
+    except AttributeError as e:
+        # This happenen when trying this with a CircuitPython v8.0.0-alpha.1 on a Unexpected Maker FeatherS2
+        print("get_cpu_id(): while trying to get \"microcontroller.cpu.uid\" occurred error:", e)
+        return False
+    if my_debug:
+        print(TAG+"received cpu uid: {}".format(n1), end='\n')
+
+    my_cpu_id_str = s = ""
+    res = 0
+    mult = 0
+    le_uid2 = len(n2)
+    # See: https://github.com/adafruit/circuitpython/issues/462,
+    # especially the post by user 'Sommersoft' on 2018-01-13.
+    if le_uid2 > 0:
+        # added by @PaulskPt on 2022-07-04
+        cpu_uid_lst = list(n2) # e.g.:  [199, 253, 26, 1, 163, 224]
+        p = 0
+        s = ""
+        if my_debug:
+            print(TAG+"cpu uid contains {} digits.".format(le_uid2), end='\n')
+        i = le_uid2
+        for c in cpu_uid_lst:
+            if i == 4: mult = 10000
+            elif i == 3: mult = 1000
+            elif i == 2: mult = 10
+            elif i == 1: mult = 1
+            elif i == 0: mult = 0
+            n2 = ord(chr(c))
+            if my_debug:
+                print(TAG+"the value of digit {} is: {:3d}.   ".format(i, n2), end='')
+            res += n2 * mult
+            if my_debug:
+                print(TAG+"ord(0x{:02x}): {:3d}, i: {}, mult: {:5d}, result of calculation: {}".format(n2, n2, i, mult, res), end='\n')
+            i -= 1
+            s += chr(n2)+" "
+
+        if my_debug:
+            print("", end='\n')
+            print(TAG+"final res = {} ".format(res), end='\n')
+        s_res = str(res)
+        if my_debug:
+            print(TAG+"get_cpu_id(): unique cpu id: \'{}\'".format(s_res), end='\n')
+        my_cpu_id = s_res
+
+        if isinstance(n2, str):
+            le = len(n2)
+            p = 0
+            s = ""
+            if le > 0:
+                if my_debug:
+                    print(TAG+"cpu uid contains {} digits.".format(le), end='\n')
+                i = le
+                for c in n:
+                    if i == 4: mult = 10000
+                    elif i == 3: mult = 1000
+                    elif i == 2: mult = 10
+                    elif i == 1: mult = 1
+                    elif i == 0: mult = 0
+                    n2 = ord(c)
+                    if my_debug:
+                        print(TAG+"the value of digit {} is: {:2d}.   ".format(i, n2), end='')
+                    res += n2 * mult
+                    if my_debug:
+                        print(TAG+"ord(0x{:02x}): {:2d}, i: {}, mult: {:5d}, result of calculation: {}".format(n2, n2, i, mult, res), end='\n')
+                    i -= 1
+                    s += chr(n2)+" "
+                if my_debug:
+                    print("", end='\n')
+                    print(TAG+"final res = {} ".format(res), end='\n')
+                s_res = str(res)
+                if my_debug:
+                    print(TAG+"get_cpu_id(): unique cpu id: \'{}\'".format(s_res), end='\n')
+                my_cpu_id = s_res
+            else:
+                lRetval = False
+        else:
+            lRetVal = False
+    else:
+        lRetval = False
+    return lRetval
+
+"""
+   my_board() -> None
+        @brief
+        Function prints global variables my_os and my_cpu_id
+        if global my_debug is True and if either of these variables contain values
+        Called by setup()
+    Parameters: None
+    Return: None
+"""
+def my_board():
+    global my_os, my_cpu_id
+    #if my_debug:
+    #if my_os:
+    print("OS: {}.".format(my_os), end='\n')
+    #if my_cpu_id:
+    print("CPU ID: {}.".format(my_cpu_id), end='\n')
+
+"""
+   lcd_deflt_clr() -> None
+        @brief
+        Sets LCD default background color
+    Parameters: None
+    Return: None
+
+"""
+def lcd_dflt_clr():
+    global colorN
+    lcd.set_backlight(colorN[2][0])  # set backlight to orange
+
+"""
+   chg_lcd_bg_clr() -> None
+        @brief
+        Sets LCD background to color upon value of global lcd_color_index
+    Parameters: None
+    Return: None
+
+"""
+def chg_lcd_bg_clr():
+    global colorN, lcd_bl_colors, lcd_color_index
+    renderer.clear()
+    renderer.put(0, 0, lcd_bl_colors[lcd_color_index])
+    renderer.flush()
+    if colorN[lcd_color_index][0] > 255:
+        lcd.set_backlight(colorN[lcd_color_index][0])
+    else:
+        lcd.set_backlight_rgb(colorN[lcd_color_index][0], colorN[lcd_color_index][1], colorN[lcd_color_index][2])
+    lcd_color_index += 1
+    if lcd_color_index >= len(colorN):
+        lcd_color_index = 0
+
+"""
+    lcd_chr_test(void) -> None
+        @brief
+        This function sends a block of characters to the lcd
+        to test what graphic representation the lcd will show.
+        The low-end and high-end of the range of character values
+        has to be manually put in line 355 or accept what is there as default
+        THIS FUNCTION IS CALLED FROM setup() BUT NOT USED IN THIS MOMENT (2021-10-11)
+
+        Parameters: None
+
+        Return: None
+"""
+def lcd_chr_test():
+    col = row = 0
+    spc = chr(0x20)
+    lcd.clear()
+    for _ in range(0x20,0xfe):   # start with ascii <spc>
+        if _ < 0x80 or _ > 0x9f:
+            c1 = chr(_)
+            lcd.set_cursor(col, row)
+            lcd._put_char(_)
+            #lcd.write(spc)
+            print("hex value: {}, graphic: {} ".format(hex(_), c1), end='\n')
+            col += 1
+            if col >= 18:
+                col = 0
+                row += 1
+                if row > 3:
+                    row = 0
+                    sleep(5)
+                    lcd.clear()
+    sleep(5)
+
+"""
+    lcd_clean_fm(fm_row, to_row) -> None
+        @brief
+        This function clears the lcd from row number indicated by parameter fm_row,
+        until and including row number indicated by parameter to_row.
+
+        Parameters: int fm_row, int to_row
+
+        Return: None
+"""
+def lcd_clean_fm(fm_row, to_row = (lcd_maxrows-1)):
+    global lcd_maxrows
+    if fm_row >=0 and fm_row <= 3:
+        if isinstance(to_row, type(None)):
+            to_row = lcd_maxrows -1
+        renderer.clear(fm_row, to_row)
+        renderer.flush()
+
+"""
+    setup(void) -> None
+        @brief
+        This function is called by main().
+        It sets starting parameters for the lcd (see lcd_setup(); with fast_boot splash_task() does this):
+        - no system messages (to the lcd);
+        - no cursor;
+        - (if cursor) do not blink the cursor.
+        It also resets the uart input buffer
+
+        Parameters: None
+
+        Return: None
+"""
+def setup():
+    global lcd, uart, degreesChar
+
+    if not fast_boot:  # else splash_task() does it, while the uart is read
+        lcd_setup()
+
+    if use_dotstar and led_state == LOW: # Switch off the RGB LED
+        led_toggle()
+        #dotstar_led_off()
+
+    #lcd_chr_test()  # print all the characters in the lcd rom
+
+    if uart:
+        framer.reset()  # Clear the uart rx buffer and the framer
+
+    if not fast_boot:
+        sleep(1)  # <--------------- DELAY ---------------
+
+    get_os_info()  # Collect O.S. info. Put in global variable my_os and (partly) in my_machine
+
+    get_cpu_id()   # Collect cpu id info. Put in global variable my_cpu_id
+
+"""
+    lcd_setup(void) -> None
+        @brief
+        Sets the starting parameters of the lcd (see setup()).
+        Called by setup(), or with fast_boot by splash_task().
+"""
+def lcd_setup():
+    # lcd.backlight();
+    lcd.system_messages(False)
+    # 150 for system with CP2101N (5Volt)
+    #  50 for system with CP2221a
+    lcd.set_contrast(150)  # Set to 50 for 5 Volt. Set lcd contrast to default value (was: 120). Value 50 worked fine with UM FeatherS2
+    lcd_dflt_clr()  # set default lcd backlight color to orange
+    lcd.cursor(0)  # do not show cursor (use 2 for show cursor)
+    lcd.blink(0)   # do not blink cursor
+    renderer.hard_clear()
+
+
+"""
+    loop(void) -> boolean
+        @brief
+        This functions is the backbone of this script. It is called by main().
+        It runs the asyncio tasks of pipeline() until the user pressed the Ctrl-C key combo (keyboard interrupt).
+
+        Parameters: None
+
+        Return: boolean
+"""
+def loop():
+    global ctrl_c_flag
+
+    TAG = "loop(): "
+    lRetval = True  # assume positive
+    print()
+    print("MSFS2020 GPS GPRMC data reception decoder sketch by Paulsk (mailto: ct7agr@live.com.pt). ")
+    print("\nNumber of loops in this run: {}".format(max_lp_cnt))
+    print("........................", end="\n")
+    if use_heap_diagnostics:
+        heap.enable()
+    if airports:
+        airports.open()
+    tracer.t_base = monotonic_ns()
+    tracer.on = use_tracer
+    try:
+        asyncio.run(pipeline())
+    except KeyboardInterrupt:
+        ctrl_c_flag = True
+        print("\'Ctrl-C\' pressed. Going to quit...")
+        if use_diagnosics:
+            pr_diagnostics()
+        if use_heap_diagnostics:
+            heap.report()
+        if use_tracer:
+            tracer.on = False
+            tracer.dump()
+        if recorder:
+            recorder.close()
+            recorder.pr_stats()
+        renderer.clear()
+        renderer.put(1, 2, "\'Ctrl-C\' pressed.")
+        renderer.put(1, 2, "Going to quit...")
+        try:
+            renderer.flush()
+        except OSError:  # the lcd is locked up or gone
+            pass
+        lRetval = False
+    return lRetval
+
+"""
+    pipeline(void) -> coroutine
+        @brief
+        Starts the tasks of the pipeline and waits for them (they run until Ctrl-C):
+        uart_task()   drains the uart into the framer. It is never blocked by the lcd: the
+                      other tasks await between short steps (see lcd_renderer.aflush());
+        parse_task()  turns complete $GPRMC/$GPGGA pairs into gps_fix records  -> fix_q;
+        state_task()  flight-state evaluation (ac_status())                    -> render_q;
+        render_task() shows the fixes on a display: one task per display (see display_backend, draw_page());
+        led_task()    heartbeat of the built-in blue led;
+        splash_task() shows the splash screens without blocking the uart (fast_boot: only until the first fix);
+        recorder.run() writes the flight track to flash (when use_track_recorder is True, see track_recorder);
+        dr_task()     puts predicted fixes between the real ones        -> render_q
+                      (when use_dead_reckoning is True, see dead_reckoner).
+        fix_q and render_q are small bounded queues: when a stage falls behind, the oldest fix is dropped.
+        render_task() draws only the newest fix, at most lcd_max_fps times a second (see render_governor).
+"""
+async def pipeline():
+    tasks = [
+        asyncio.create_task(uart_task()),
+        asyncio.create_task(parse_task()),
+        asyncio.create_task(state_task()),
+        asyncio.create_task(led_task()),
+        asyncio.create_task(splash_task())]
+    for d in displays:
+        tasks.append(asyncio.create_task(render_task(d)))
+    if recorder:
+        tasks.append(asyncio.create_task(recorder.run()))
+    if use_dead_reckoning:
+        tasks.append(asyncio.create_task(dr_task()))
+    await asyncio.gather(*tasks)
+
+"""
+    uart_open(baud, rx_len, chunk_len) -> None
+        @brief
+        (Re)creates the uart at baudrate baud, with a receive buffer and a framer chunk sized for it (see uart_sizes()),
+        or of rx_len and chunk_len bytes when these are larger (see rx_monitor).
+        The receiver_buffer_size of a busio.UART can only be set when it is created.
+"""
+def uart_open(baud, rx_len=0, chunk_len=0):
+    global uart, uart_baudrate, rx_buffer_len, rx_chunk_len
+    if uart:
+        uart.deinit()
+    rx_buffer_len, rx_chunk_len = uart_sizes(baud)
+    rx_buffer_len = max(rx_buffer_len, rx_len)
+    rx_chunk_len = max(rx_chunk_len, chunk_len)
+    uart = adapters.open_uart(baud, rx_buffer_len)
+    uart_baudrate = baud
+    framer.set_uart(uart, rx_chunk_len)
+    reader.pairer.baud = baud
+    rx_mon.set_sizes(rx_buffer_len, rx_chunk_len)
+
+"""
+    baud_detect(void) -> coroutine (int)
+        @brief
+        Listens baud_probe_time seconds at each of baud_rates and counts the sentences that the framer
+        accepts (checksum OK) and rejects. At the wrong baudrate the line only gives garbage.
+        Returns the baudrate with the most accepted sentences, provided they outnumber the rejected ones.
+        Stops at the first baudrate with two or more sentences and none rejected. Returns 0 if there was no feed.
+        The framer counters are cleared before each try. The baudrates are tried in the order of baud_order().
+        With fast_boot, listening stops as soon as two sentences have been accepted and none rejected.
+"""
+def probe_counts():
+    # (accepted, rejected) sentences of the registered types since framer.clear_stats()
+    nr_ok = nr_bad = 0
+    for tp in range(snt_other):
+        nr_ok += framer.nr_ok[tp]
+        nr_bad += framer.nr_bad[tp]
+    return nr_ok, nr_bad
+
+async def baud_detect():
+    TAG = "baud_detect(): "
+    best = best_ok = 0
+    for baud in baud_order():
+        if baud != uart_baudrate:
+            uart_open(baud)
+        else:
+            framer.reset()
+        framer.clear_stats()
+        for _ in range(int(baud_probe_time / rx_idle_wait)):
+            framer.poll()
+            while framer.pop() >= 0:  # not needed here
+                pass
+            if fast_boot:
+                nr_ok, nr_bad = probe_counts()
+                if nr_ok >= 2 and nr_bad == 0:
+                    break
+            await asyncio.sleep(rx_idle_wait)
+        nr_ok, nr_bad = probe_counts()
+        print(TAG+"{:>6d} baud: {} sentences accepted, {} rejected".format(baud, nr_ok, nr_bad))
+        if nr_ok > best_ok and nr_ok > nr_bad:
+            best = baud
+            best_ok = nr_ok
+            if nr_ok >= 2 and nr_bad == 0:
+                break
+    return best
+
+async def uart_task():
+    global boot_uart_ms
+    TAG = "uart_task(): "
+    if gps_baudrate == 0:
+        baud = 0
+        while baud == 0:
+            baud = await baud_detect()
+        if baud != uart_baudrate:
+            uart_open(baud)
+        baud_save(baud)
+        print(TAG+"GPS feed at {} baud. Uart receive buffer: {} bytes, read chunk: {} bytes".format(
+            baud, rx_buffer_len, rx_chunk_len))
+    framer.reset()
+    framer.clear_stats()
+    rx_mon.reset()
+    boot_uart_ms = (monotonic_ns() - t_boot) // 1000000
+    while True:
+        if rx_mon.want_rx and framer.pos < 0 and framer.count == 0 and \
+                monotonic_ns() - framer.t_rx > 50000000 and uart.in_waiting == 0:  # the line is quiet
+            uart_open(uart_baudrate, rx_mon.want_rx, rx_mon.want_chunk)
+            rx_mon.grown(monotonic_ns())
+            print(TAG+"overruns: uart receive buffer now {} bytes, read chunk {} bytes".format(rx_buffer_len, rx_chunk_len))
+        rx_mon.fill(uart.in_waiting)
+        if use_diagnosics or tracer.on:
+            t0 = monotonic_ns()
+            n = framer.poll()
+            if n:
+                if use_diagnosics:
+                    diagn[_st_framing].add_since(t0)
+                if tracer.on:
+                    tracer.add(_sp_poll, t0, monotonic_ns(), n)
+        else:
+            n = framer.poll()
+        t_due = reader.pairer.t_due
+        if n or (t_due and monotonic_ns() >= t_due):
+            snt_event.set()
+            await asyncio.sleep(0)
+        else:
+            await asyncio.sleep(rx_idle_wait)
+
+async def parse_task():
+    global boot_rx_ms
+    p = 0  # next record of fix_pool to fill
+    while True:
+        await snt_event.wait()
+        snt_event.clear()
+        while True:  # more than one burst can be waiting in the framer
+            t0 = monotonic_ns() if use_diagnosics else 0
+            if use_heap_diagnostics:
+                heap.start(_hs_ck_uart)
+            with tracer.span(_sp_ck_uart, p):
+                n = ck_uart(fix_pool[p])
+            if use_heap_diagnostics:
+                heap.stop(_hs_ck_uart)
+            if n == 0:
+                break
+            fix = fix_pool[p]
+            if use_heap_diagnostics:
+                heap.start(_hs_split)
+            with tracer.span(_sp_split, p):
+                lSplitOK = split_types(fix)
+            if use_heap_diagnostics:
+                heap.stop(_hs_split)
+            if tracer.on:
+                tracer.add(_sp_fix_rx, fix.t_rx, fix.t_rx, p)
+            if use_diagnosics:
+                diagn[_st_parse].add_since(t0)
+            print("parse_task(): split_types() result = {}".format(lSplitOK))
+            rx_mon.check(fix.t_rx)
+            if lSplitOK:
+                if not fix_seen.is_set():
+                    boot_rx_ms = (fix.t_rx - t_boot) // 1000000
+                    fix_seen.set()
+                fix_q.put(p)
+                p = (p + 1) % fix_pool_len
+            fix_pool[p].clean()  # the next burst starts with an empty record
+
+async def state_task():
+    global msg_nr
+    TAG = "state_task(): "
+    ac_stopped_cnt = 0
+    ac_flying_cnt = 0
+    diagn_cnt = 0
+    heap_cnt = 0
+    await splash_done.wait()
+    show_status(st_wait)
+    while True:
+        p = await fix_q.get()
+        fix = fix_pool[p]
+        if use_heap_diagnostics:
+            heap.start(_hs_state)
+        with tracer.span(_sp_state, p):
+            if use_diagnosics:
+                t0 = monotonic_ns()
+                ac_status(fix)
+                diagn[_st_state].add_since(t0)
+            else:
+                ac_status(fix)
+        if use_heap_diagnostics:
+            heap.stop(_hs_state)
+        if recorder and fix.valid and fix.part != fix_joined:  # one record per second
+            recorder.add(fix)
+        if use_dead_reckoning and fix.valid and fix.part != fix_joined:  # the position of the partial fix, later
+            predictor.update(fix)
+        if airports:
+            airports.update(fix)
+        if am_stat == ac_stopped:
+            ac_stopped_cnt += 1
+            print(TAG+"ac_stopped_cnt=", ac_stopped_cnt)
+            if ac_stopped_cnt >= 5:
+                show_status(st_wait)
+        elif am_stat == ac_flying:
+            ac_flying_cnt += 1
+            if ac_flying_cnt >= 5:
+                ac_stopped_cnt = 0 # reset when we sure are flying and no incidently gs = 0
+            if ac_flying_cnt > 1000:
+                ac_flying_cnt = 0  # reset
+            msg_nr += 1
+            print(TAG+"handling msg nr: {:02d}".format(msg_nr))
+            for d in displays:
+                d.q.put(p)
+            if msg_nr >= max_lp_cnt:
+                msg_nr = 0
+        if use_diagnosics:
+            diagn_cnt += 1
+            if diagn_cnt >= diagnostics_iterations:
+                diagn_cnt = 0
+                pr_diagnostics()
+        if use_heap_diagnostics:
+            heap_cnt += 1
+            if heap_cnt >= heap_report_every:
+                heap_cnt = 0
+                heap.report()
+
+async def render_task(d):
+    # draws the fixes of the queue of display d. The stage diagnostics are kept for the first display
+    global startup, boot_lcd_ms
+    first = d is displays[0]
+    sid = _sp_render if first else _sp_render2
+    await splash_done.wait()
+    while True:
+        p = await d.governor.next()
+        t0 = monotonic_ns()
+        try:
+            # no tracer.span(): its span object is shared, and the other render task runs while this one awaits
+            if p < -1:
+                await lcd_pr_status(d.renderer, p)
+            else:
+                await draw_page(d, fix_pool[p])
+            if tracer.on:
+                tracer.add(sid, t0, monotonic_ns(), p)
+        except OSError as e:  # i2c error: the display is locked up or gone
+            d.nr_errors += 1
+            print("render_task(): {}: {}. Next try in {} seconds".format(d.name, e, display_retry))
+            await asyncio.sleep(display_retry)
+            continue
+        # the first frame drawn for a fix: on the ground that is the stopped or taxying message (a status frame)
+        if first and boot_lcd_ms < 0 and p != st_wait and not (use_dead_reckoning and p == dr_slot):
+            boot_lcd_ms = (monotonic_ns() - t_boot) // 1000000
+            pr_boot()
+        if p < -1:
+            continue
+        if use_diagnosics and first:
+            diagn[_st_lcd].add_since(t0)
+        d.lat.add_since(fix_pool[p].t_rx)
+        if first and startup == -1:
+            print("Waiting for serial com line to become available...")
+            startup = 0
+
+async def dr_task():
+    # a predicted frame at each predictor.next_time(), unless a real fix is waiting to be drawn
+    while True:
+        t = monotonic_ns()
+        c = predictor.next_time(t, governor.t_last + governor.min_interval) if am_stat == ac_flying else 0
+        if c == 0:
+            await asyncio.sleep(1 / dr_fps)
+            continue
+        base = predictor.t
+        await asyncio.sleep((c - t) / 1000000000)
+        if predictor.t != base:  # a fix arrived meanwhile
+            continue
+        if render_q.count == 0:
+            t = monotonic_ns()
+            predictor.predict(fix_pool[dr_slot], t)
+            render_q.put(dr_slot)
+
+async def led_task():
+    while True:
+        led_BI_toggle()
+        if use_dotstar and led_state == LOW: # Switch off the dotstar RGB LED
+            led_toggle()
+        await asyncio.sleep(led_interval)
+
+"""
+    splash_task(void) -> coroutine
+        @brief
+        Shows the splash screens, then sets splash_done: state_task() and render_task() wait for it.
+        An i2c error of the lcd (OSError) ends the splash: the pipeline goes on without it.
+        With fast_boot it first sets up the lcd (see lcd_setup()) and repeats the splash screens only until
+        the first fix has been received (fix_seen), so the uart is read and the first fix is drawn without delay.
+"""
+async def splash_task():
+    try:
+        if fast_boot:
+            await asyncio.sleep(0)  # uart_task() starts first
+            lcd_setup()
+            while not await splash_screens():
+                pass
+        else:
+            await splash_screens()
+        renderer.clear(2) # clean lcd rows 2 and 3
+        await renderer.aflush()
+    except OSError as e:  # i2c error: no splash. render_task() tries the display again
+        displays[0].nr_errors += 1
+        print("splash_task(): {}: {}. Splash screens skipped".format(displays[0].name, e))
+    splash_done.set()
+
+async def splash_wait(s):
+    # sleeps s seconds. With fast_boot it returns True as soon as the first fix has been received
+    if not fast_boot:
+        await asyncio.sleep(s)
+        return False
+    t_end = monotonic_ns() + int(s * 1000000000)
+    while not fix_seen.is_set():
+        if monotonic_ns() >= t_end:
+            return False
+        await asyncio.sleep(0.05)
+    return True
+
+async def splash_screens():
+    # returns True when the splash was cut short by the first fix (see splash_wait())
+    renderer.clear()
+    await renderer.aflush()
+    if await splash_wait(2):
+        return True
+    renderer.put(0, 0, "FSUIPC7 GPS RX ")
+    renderer.put(0, 1, "for MSFS2020   ")
+    await renderer.aflush()
+    if await splash_wait(2):
+        return True
+    renderer.put(0, 1, "via serial     ")
+    await renderer.aflush()
+    if await splash_wait(2):
+        return True
+    renderer.clear()
+    renderer.put(0, 0, "MSFS 2020")
+    renderer.put(0, 1, "GPRMC/GPGGA data RX")
+    renderer.put(0, 2, "Platform ")
+    if my_machine:
+        print("splash_task(): my_machine= \"{}\"".format(my_machine))
+        n1 = my_machine.find("ESP32S")
+        n2 = my_machine.find("with")
+        if n1 > 0 and n2 >=0:
+            s = my_machine[:n2]+my_machine[n2:n2+1]+" "+my_machine[n2+5:]
+        else:
+            s = my_machine[:19]  # Not more than 20 characters
+        renderer.put(0, 3, s)
+    else:
+        renderer.put(0, 3, sys.platform)
+    await renderer.aflush()
+    return await splash_wait(5)
+
+"""
+    pr_boot(void) -> None
+        @brief
+        Prints the boot marks (see t_boot) to REPL: when the uart ingestion started (after baud_detect()),
+        when the first fix was received and when it was on the lcd, in mSecs since boot. On the lcd: the first frame
+        drawn for a fix, which on the ground is the stopped or taxying message (see ac_status()), not a nav page.
+"""
+def pr_boot():
+    print("Boot (mSecs): uart {}, first fix rx {}, first fix on lcd {}{}".format(
+        boot_uart_ms, boot_rx_ms, boot_lcd_ms, " (fast boot)" if fast_boot else ""))
+
+"""
+    pr_diagnostics(void) -> None
+        @brief
+        Prints the latency of each stage of the pipeline (see diagn) to REPL:
+        number of samples, min, p50, p95, p99 and max in milliseconds, since the start.
+        Called every diagnostics_iterations fixes and at Ctrl-C when use_diagnosics is True.
+"""
+def pr_diagnostics():
+    print("Latency (mSecs)      n      min      p50      p95      p99      max")
+    for h in diagn:
+        n, mn, p50, p95, p99, mx = h.summary()
+        print("{:<10s} {:>8d} {:>8.2f} {:>8.2f} {:>8.2f} {:>8.2f} {:>8.2f}".format(
+            h.name, n, mn / 1000, p50 / 1000, p95 / 1000, p99 / 1000, mx / 1000))
+    pr_boot()
+    framer.pr_stats()
+    rx_mon.pr_stats()
+    reader.pairer.pr_stats()
+    governor.pr_stats()
+    for d in displays:
+        d.pr_stats()
+    fsm.pr_stats()
+    metrics.pr_stats()
+    if airports:
+        airports.pr_stats()
+    if use_dead_reckoning:
+        predictor.pr_stats()
+
+"""
+    ck_uart(fix) -> int (nr_bytes)
+        @brief
+        This functions takes the sentences that the nmea_framer has received via the uart (see uart_task())
+        and adds them to the gps_fix record fix (see burst_reader.read()).
+        When the burst is complete this function will return the number of bytes in its sentences,
+        otherwise 0. It does not wait.
+        Parameters: gps_fix fix
+
+        Return: int
+"""
+def ck_uart(fix):
+    global loop_time, rx_wait_start
+    TAG = 'ck_uart(): '
+    n = reader.read(fix)
+    if n:
+        loop_time = reader.t_rx
+        if use_diagnosics:
+            if rx_wait_start:
+                diagn[_st_rx_wait].add((loop_time - rx_wait_start) // 1000)
+            rx_wait_start = loop_time
+        if my_debug:
+            print(TAG+"sentences received=", fix.buf)
+    return n
+
+"""
+    split_types(fix) -> boolean
+        @brief
+        This functions completes the gps_fix record fix for a burst of sentences (see burst_reader.complete()).
+        The fields are not decoded here: see gps_fix.read(). fix is valid if one of its sentences provides a position.
+        Parameters: gps_fix fix
+
+        Return: boolean
+
+"""
+def split_types(my_fix):
+    TAG = "split_types(): "
+    reader.complete(my_fix)
+    if my_debug:
+        print(TAG+"utc, lat, lon, gs, crs, alt=", my_fix.read(_utc), my_fix.read(_lat), my_fix.read(_lon),
+              my_fix.read(_gs), my_fix.read(_crs), my_fix.read(_alt))
+        print(TAG+"cross-check: my_fix data contents: {}, valid: {}".format(my_fix.a, my_fix.valid), end="\n")
+
+    return my_fix.valid
+
+"""
+    led_BI_toggle(void) -> void
+        @brief
+        This functions toggles the builtin blue LED
+        THIS FUNCTION IS USED FOR THE MOMENT (2021-10-11)
+
+        Parameters: None
+
+        Return: None
+"""
+def led_BI_toggle():
+    global led, biLdIsOn
+
+    if biLdIsOn:
+        #led.value = 0
+        adapters.led_set(0)
+        biLdIsOn = False
+    else:
+        #led.value = 1
+        adapters.led_set(1)
+        biLdIsOn = True
+
+"""
+    led_toggle(void) -> void
+        @brief
+        This functions toggles the builtin neopixel LED and the external 3-color LED
+        THIS FUNCTION IS NOT BEING USED FOR THE MOMENT (2021-10-11)
+
+        Parameters: None
+
+        Return: None
+"""
+def led_toggle():
+    global led_state, HIGH, LOW, color_c_arr, color_index
+    # uses global variable led_state
+    led_chrs_rcvd = 0 # Before this was a global defined variable.
+    brightness = 0.1
+    if led_state == HIGH:
+        led_state = LOW  # a=!a
+    elif led_state == LOW:
+        led_state = HIGH  # a=!a
+
+    if led_state == LOW:
+        # Get the R,G,B values of the next colour
+        color_index = 0 # black ?
+        r,g,b = adapters.color_wheel( color_index )
+        # Set the colour on the dotstar
+        dots[0] = ( r, g, b, brightness)  # was 0.5
+        #pixels[0] = color_c_arr[led_colors_dict['off']]  # Set the color of the builtin LED to black
+        #pixels.show()
+        #blink_led3(led_colors_dict['off'])  # Switch the external 3-color LED off
+    else:
+        # Get the R,G,B values of the next colour
+        r,g,b = adapters.color_wheel( color_index )
+        # Set the colour on the dotstar
+        dots[0] = ( r, g, b, brightness)  # was 0.5
+        # Increase the wheel index
+        color_index += 2
+        # If the index == 255, loop it
+        if color_index == 255:
+            color_index = 0
+        # Invert the internal LED state every half colour cycle
+        adapters.led_blink()
+        # Sleep for 15ms so the colour cycle isn't too fast
+        sleep(0.015)
+        #pixels[0] = color_c_arr[led_colors_dict['green']]  # Set the color of the builtin LED to GREEN
+        #pixels.show()
+        #blink_led3(led_colors_dict['green']) # Switch the external 3-color LED GREEN
+
+
+""" dotstar_led_off(void) -> void
+    Switches the built-in dotstar led off
+"""
+def dotstar_led_off():
+    global led_state, color_index
+    brightness = 0.1
+    color_index = 0 # black ?
+    r,g,b = adapters.color_wheel( color_index )
+    # Set the colour on the dotstar
+    dots[0] = ( r, g, b, brightness)  # was 0.5
+    led_state = HIGH
+
+def ck_gs(my_fix):
+    if my_fix.valid:
+        t_gs = my_fix.read(_gs)
+        if my_debug:
+            print("groundspeed={}".format(t_gs / 10))
+        return t_gs / 10
+    return 0.0
+
+"""
+    ac_status(fix) -> boolean
+        @brief
+        This function feeds fix to the flight-state machine fsm (see flight_state) and sets am_stat
+        (stopped, taxying or flying) from its phase.
+        Only a confirmed transition to stopped or taxi shows a message on the LCD (see show_status()).
+        The phase is also printed to REPL.
+
+        Parameters: gps_fix fix
+
+        Return: boolean. True at a confirmed transition
+"""
+# Function copied from: I:\pico\paul_projects\pico\circuitpython\msfs2020_gps_rx_picolipo\2021-09-03_16h49_ver
+def ac_status(my_fix):
+    global am_stat, am_last_stat
+    TAG = "ac_status(): "
+    s = "Airplane is stopped or parked"
+    metrics.update(my_fix, fsm.phase)
+    lchanged = fsm.update(my_fix, metrics.vs)
+    if my_debug:
+        print(TAG,"smoothed gs = {}, vs = {} fpm, fix valid = {}".format(fsm.gs / 10, fsm.vs, my_fix.valid), end='\n')
+    if fsm.phase == ph_none:
+        return False
+    am_last_stat = am_stat
+    am_stat = ph_am_stat[fsm.phase]
+    if lchanged:
+        print(TAG+"{} -> {} (transition {} of this flight)".format(
+            ph_names[fsm.last], ph_names[fsm.phase], fsm.flight_transitions), end='\n')
+        if fsm.phase == ph_takeoff:
+            metrics.reset()
+        if fsm.phase == ph_stopped:
+            show_status(st_stopped)
+        elif fsm.phase == ph_taxi:
+            show_status(st_taxi)
+    if fsm.phase == ph_stopped:
+        print(s, end = '\n') # Alway print to REPL (it does almost immediately)
+    return lchanged
+
+"""
+    show_status(st) -> None
+        @brief
+        Queues status frame st (st_stopped, st_taxi, st_wait) for the displays that show page_nav.
+        Their render_task() draws it (see lcd_pr_status()), like a fix: the state task never writes to a display.
+"""
+def show_status(st):
+    for d in displays:
+        if d.page == page_nav:
+            d.q.put(st)
+
+"""
+    lcd_pr_status(rd, st) -> coroutine
+        @brief
+        Draws status frame st on the renderer rd: the stopped or taxying message (a single clear + redraw;
+        lcd_pr_msgs() clears it again at the next flying fix), or "About to receive..." on the last row.
+"""
+async def lcd_pr_status(rd, st):
+    global lacStopMsgShown, lacTaxyMsgShown
+    if st == st_wait:
+        rd.put(0, 3, "About to receive...")
+    else:
+        rd.clear()
+        rd.put(0, 1, "Airplane is stopped or parked" if st == st_stopped else "Airplane is taxying")
+        lacStopMsgShown = st == st_stopped
+        lacTaxyMsgShown = st == st_taxi
+    await rd.aflush()
+
+"""
+    lcd_pr_msgs(rd, fix) -> coroutine
+        @brief
+        Shows the position, ground speed, altitude, track and flight phase of fix on the renderer rd of a display
+        with page_nav (see lcd_fmt_nav()). The extra field turns every extra_interval seconds of the UTC time of
+        the fixes; a predicted fix (no UTC time) keeps the field of the last fix. Nothing is allocated on the way:
+        the time from the reception of the fix to the end of the lcd write is printed only with my_debug.
+
+        Parameters: lcd_renderer rd, gps_fix fix
+"""
+async def lcd_pr_msgs(rd, my_fix):
+    global startup, t_elapsed, msg_nr, lcd_maxrows, lacStopMsgShown, lacTaxyMsgShown, lac_Stopped, extra_fld
+    TAG = "lcd_pr_msgs(): "
+
+    if use_heap_diagnostics:
+        heap.start(_hs_lcd)
+    if startup == -1 or lacStopMsgShown or lacTaxyMsgShown:
+        lacStopMsgShown = False
+        lacTaxyMsgShown = False
+        rd.clear()  # no lcd.clear(): flush() overwrites only what differs from the stopped/taxying message
+    if len(lcd_extra_fields) > 1 and my_fix.src[_utc] >= 0:
+        utc = my_fix.read(_utc) // 100  # hhmmss: small ints only
+        sec = utc // 10000 * 3600 + utc // 100 % 100 * 60 + utc % 100
+        extra_fld = lcd_extra_fields[sec // extra_interval % len(lcd_extra_fields)]
+    lcd_fmt_nav(rd, my_fix, extra_fld, msg_nr, fsm, metrics, airports)
+    if use_heap_diagnostics:
+        heap.stop(_hs_lcd)
+    nr_sent = await rd.aflush()
+    if my_debug:
+        t_elapsed = (((monotonic_ns() - my_fix.t_rx) + 500000)// 1000000)
+        print(TAG+"Duration rx -> lcd: {} mSecs. Bytes sent: {}".format(t_elapsed, nr_sent), end="\n")
+
+"""
+    draw_page(d, fix) -> coroutine
+        @brief
+        Draws fix on display d: the page of d (see display_backend).
+"""
+async def draw_page(d, my_fix):
+    if d.page == page_nav:
+        await lcd_pr_msgs(d.renderer, my_fix)
+    else:
+        await lcd_pr_flight(d.renderer, my_fix)
+
+"""
+    lcd_pr_flight(rd, fix) -> coroutine
+        @brief
+        Shows the UTC time and flight phase, the vertical speed, the distance and time aloft since the take-off
+        and the nearest airport (when use_airports is True) of fix on the renderer rd (see lcd_fmt_flight()).
+"""
+async def lcd_pr_flight(rd, my_fix):
+    lcd_fmt_flight(rd, my_fix, fsm, metrics, airports)
+    await rd.aflush()
+
+def main():
+    global my_debug, ctrl_c_flag
+    lResult = True
+    cnt = 0
+
+    init()
+    setup()
+    my_board()
+
+    lResult = loop()
+    if lResult == False:
+        if my_debug == True and not ctrl_c_flag:
+            print("main(): loop() returned with: \"{}\"".format(lResult))
+
+    cnt = 0
+    while True:
+        cnt += 1
+        if cnt >= 100:
+            cnt = 0
+            led_BI_toggle()
+
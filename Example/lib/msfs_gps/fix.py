@@ -0,0 +1,290 @@
+"""
+    msfs_gps.fix -> module
+        @brief
+        The fix model: gps_fix, the record of one burst of sentences, decoded lazily; fix_pairer, which pairs the
+        sentences of a burst by their UTC time; burst_reader, which groups the sentences of the framer into bursts.
+"""
+from array import array
+from time import monotonic_ns
+from msfs_gps.nmea import (nmea_max_len, nmea_tokens, snt_items, snt_min_fields, snt_decoders, snt_voids, snt_names,
+                           snt_other, _utc, _lat, _gs, _crs, _alt, _hdop, _date, _nr_fix_items)
+
+# gps_fix.part (see fix_pairer)
+fix_whole = 0    # all the sentences of the burst
+fix_partial = 1  # items carried from the last complete fix (e.g. the altitude, when the $GPGGA is late or lost)
+fix_joined = 2   # the late sentence, joined with the sentences of the partial fix before it
+
+"""
+    gps_fix() -> class
+        @brief
+        GPS fix record with lazy decoding. burst_reader.read() copies the sentences of one burst into it with add().
+        Nothing is decoded then: read(n) decodes item n (see _utc ... _date) the first time it is asked for,
+        from the sentence type that provides it (see snt_register()), and keeps the number in the array a.
+        A sentence is tokenized only when the first of its items is read.
+        So the items that the flight state and the lcd pages do not read cost nothing.
+        valid is True when the burst holds a position (see burst_reader.complete()). It is False again after clean().
+        void() is True when one of its sentences tells that the receiver has no fix (see snt_register()).
+        part tells whether the burst is complete (fix_whole, fix_partial, fix_joined: see fix_pairer).
+        t_rx is the monotonic_ns() at which the last of its sentences was received.
+"""
+class gps_fix:
+    __slots__ = ('a', 'valid', 'part', 't_rx', 'src', 'done', 'have', 'scanned', 'buf', 'mv', 'lens', 'toks')
+
+    def __init__(self):
+        self.a = array('l', [0] * _nr_fix_items)
+        self.src = array('b', [-1] * _nr_fix_items)  # sentence type that provides item n. -1 = none
+        self.buf = bytearray(snt_other * nmea_max_len)  # one sentence of each registered type
+        self.mv = memoryview(self.buf)
+        self.lens = array('B', [0] * snt_other)
+        self.toks = []
+        for _ in range(snt_other):
+            self.toks.append(nmea_tokens())
+        self.t_rx = 0
+        self.clean()
+
+    def add(self, tp, snt):
+        # copy sentence snt (a memoryview) of type tp into this record
+        p = tp * nmea_max_len
+        le = len(snt)
+        self.mv[p:p+le] = snt
+        self.lens[tp] = le
+        bit = 1 << tp
+        self.have |= bit
+        self.scanned &= ~bit
+        for n in snt_items[tp]:
+            if self.src[n] < 0 or tp < self.src[n]:  # registered first = preferred
+                self.src[n] = tp
+                self.done &= ~(1 << n)
+
+    def nr_bytes(self):
+        return sum(self.lens)
+
+    def put(self, n, v):
+        # sets item n without a sentence (see dead_reckoner.predict())
+        self.a[n] = v
+        self.done |= 1 << n
+
+    def tokens(self, tp):
+        # the tokens of the sentence of type tp, scanned the first time they are asked for
+        tok = self.toks[tp]
+        if not self.scanned & (1 << tp):
+            tok.scan(self.mv, tp * nmea_max_len, self.lens[tp])
+            self.scanned |= 1 << tp
+        return tok
+
+    def read(self, n):
+        if not self.done & (1 << n):
+            v = 0
+            tp = self.src[n]
+            if tp >= 0:
+                tok = self.tokens(tp)
+                if tok.nr_fields >= snt_min_fields[tp]:
+                    v = snt_decoders[tp](tok, n)
+            self.a[n] = v
+            self.done |= 1 << n
+        return self.a[n]
+
+    def void(self):
+        for tp in range(snt_other):
+            if self.have & (1 << tp) and snt_voids[tp]:
+                tok = self.tokens(tp)
+                if tok.nr_fields < snt_min_fields[tp] or snt_voids[tp](tok):
+                    return True
+        return False
+
+    def clean(self):
+        self.valid = False
+        self.part = fix_whole
+        self.have = 0     # bit tp set: a sentence of type tp has been added
+        self.scanned = 0  # bit tp set: the sentence of type tp has been tokenized
+        self.done = 0     # bit n set: item n has been decoded
+        for n in range(_nr_fix_items):
+            self.src[n] = -1
+        for tp in range(snt_other):
+            self.lens[tp] = 0
+
+"""
+    fix_pairer(framer, late) -> class
+        @brief
+        Pairs the sentences of a burst (e.g. $GPRMC + $GPGGA) by their UTC time hhmmss.ss, for burst_reader.
+        snt_utc() gives the UTC time of a sentence. A sentence with another UTC time than the burst starts the
+        next burst (nr_split): the sentences of two different seconds are never joined, wherever the reads end.
+        When the burst holds a position but a type of expect (see burst_reader) has not been received within late
+        max-length sentence times at baud (t_due, from the framer's t_rx), it is published at once as a partial fix
+        (fix.part = fix_partial, see done()). The uart task wakes the parse task at t_due. When a late sentence does arrive, with the UTC time of the last
+        fix and of a type that fix lacks, join() copies the sentences of that fix into the next record, which is
+        published as fix_joined. A partial fix whose late sentence does not come counts as a lost fix (nr_lost).
+        complete(fix) carries the items of pair_carry: a fix without a sentence for such an item takes the value
+        of the last fix that had one (and is then fix_partial), so a lost $GPGGA does not make the altitude 0.
+        Counters: nr_partial, nr_joined, nr_split, nr_lost.
+"""
+pair_carry = (_gs, _crs, _alt, _hdop, _date)
+
+class fix_pairer:
+    def __init__(self, framer, late, baud=4800):
+        self.framer = framer
+        self.late_snt = late
+        self.baud = baud      # of the uart: set again when it changes
+        self.tok = nmea_tokens()
+        self.carry = array('l', [0] * _nr_fix_items)
+        self.carry_have = 0   # bit n set: carry holds item n
+        self.last_fix = None  # the last complete burst, until the next burst starts
+        self.last_utc = -1
+        self.late = False     # last_fix is partial: a sentence of it is late
+        self.nr_partial = 0
+        self.nr_joined = 0
+        self.nr_split = 0
+        self.nr_lost = 0
+        self.start()
+
+    def start(self):
+        # a new burst
+        self.utc = -1
+        self.t_due = 0  # monotonic_ns() at which a sentence of the burst is late. 0 = none
+
+    def snt_utc(self, tp, mv, start, length):
+        # UTC time (hhmmssss) of the sentence of type tp in mv. -1 if the type has no UTC time
+        if _utc not in snt_items[tp] or self.tok.scan(mv, start, length) < snt_min_fields[tp]:
+            return -1
+        return snt_decoders[tp](self.tok, _utc)
+
+    def added(self, fix, utc, expect):
+        # after fix.add() of a sentence with UTC time utc. expect: the sentence types of a complete burst
+        if utc >= 0:
+            self.utc = utc
+        if self.t_due == 0 and fix.src[_lat] >= 0 and expect & ~fix.have:
+            self.t_due = self.framer.t_rx + int(self.late_snt * nmea_max_len * 10000000000) // self.baud
+
+    def done(self, fix, late=False):
+        # the burst in fix is complete. late: without its late sentences (partial)
+        if late:
+            fix.part = fix_partial
+            self.nr_partial += 1
+        self.last_fix = fix
+        self.last_utc = self.utc
+        self.late = late
+        self.start()
+
+    def join(self, fix, tp, utc):
+        # fix is empty and its first sentence is of type tp, with UTC time utc.
+        # Returns True when that is a late sentence of the last fix: the sentences of that fix are then copied into fix
+        lf = self.last_fix
+        if lf is None or lf is fix:  # (lf is fix: it was not valid, its record is used again)
+            return False
+        self.last_fix = None
+        if utc < 0 or utc != self.last_utc or lf.have & (1 << tp):
+            if self.late:
+                self.nr_lost += 1  # the late sentence did not come
+            return False
+        for t in range(snt_other):
+            if lf.have & (1 << t):
+                p = t * nmea_max_len
+                fix.add(t, lf.mv[p:p+lf.lens[t]])
+        fix.part = fix_joined
+        self.nr_joined += 1
+        return True
+
+    def complete(self, fix):
+        # for a valid fix (see burst_reader.complete())
+        for n in pair_carry:
+            if fix.src[n] >= 0:
+                self.carry[n] = fix.read(n)
+                self.carry_have |= 1 << n
+            elif self.carry_have & (1 << n):
+                fix.put(n, self.carry[n])
+                if fix.part == fix_whole:
+                    fix.part = fix_partial
+
+    def pr_stats(self):
+        print("pairing: partial fixes: {}, joined later: {}, bursts split by UTC time: {}".format(
+            self.nr_partial, self.nr_joined, self.nr_split))
+
+"""
+    burst_reader(framer, late) -> class
+        @brief
+        Turns the sentences that the nmea_framer has received into gps_fix records, one per burst.
+        read(fix) adds the complete sentences of the framer to fix. Corrupt sentences never get here: the framer
+        hands off a sentence only when its checksum has been verified.
+        A burst is complete when fix holds all the sentence types of the previous burst (expect),
+        or when a type arrives a second time. That sentence then stays in the framer for the next burst
+        and the types in fix become the new expect. So any mix of registered sentences
+        (e.g. $GPRMC + $GPGGA, $GPRMC + $GPVTG or $GPGGA + $GPGLL) is handled without configuration.
+        A sentence with another UTC time than the burst also starts the next burst, and a burst that holds a
+        position is published without its late sentences, which are joined later (see fix_pairer).
+        A burst that lacks a type of expect is counted as a lost fix (nr_lost); that type is
+        only dropped from expect when the next burst lacks it too.
+        read() returns the number of bytes in the sentences when the burst is complete, otherwise 0. It does not wait.
+        complete(fix) then completes the record: fix is valid if one of its sentences provides a position and none
+        of them is void (e.g. $GPRMC status 'V', $GPGGA fix quality 0, empty position fields: see gps_fix.void()), and the
+        items it has no sentence for are carried from the last fix that had one (see fix_pairer.complete()).
+        t_rx is the framer's t_rx of the last complete burst. lost() counts the lost fixes, also those of the pairer.
+        With verbose each sentence received is printed to REPL.
+"""
+class burst_reader:
+    def __init__(self, framer, late):
+        self.framer = framer
+        self.pairer = fix_pairer(framer, late)
+        self.expect = 0   # the sentence types of a complete burst, learned from the data
+        self.prev = 0     # the sentence types of the previous burst
+        self.t_rx = 0
+        self.nr_lost = 0
+        self.verbose = True
+
+    def read(self, fix):
+        TAG = "burst_reader.read(): "
+        framer = self.framer
+        pairer = self.pairer
+        lComplete = False
+        lLate = False
+        while True:
+            slot = framer.peek()
+            if slot < 0:
+                if pairer.t_due and monotonic_ns() >= pairer.t_due:  # a sentence of the burst is late
+                    lLate = True
+                    self.expect = fix.have | (self.expect & self.prev)
+                    self.prev = fix.have
+                    lComplete = True
+                break
+            tp = framer.types[slot]
+            p = framer.start(slot)
+            le = framer.lens[slot]
+            utc = pairer.snt_utc(tp, framer.mv, p, le)
+            lSplit = utc >= 0 and pairer.utc >= 0 and utc != pairer.utc
+            if lSplit or fix.have & (1 << tp):  # another second, or a second sentence of this type: the next burst
+                if lSplit:
+                    pairer.nr_split += 1
+                if self.expect & ~fix.have:  # a sentence of the burst was lost
+                    self.nr_lost += 1
+                # a type that is missing from two bursts in a row is no longer expected
+                self.expect = fix.have | (self.expect & self.prev)
+                self.prev = fix.have
+                lComplete = True
+                break
+            framer.pop()
+            if fix.have == 0 and pairer.join(fix, tp, utc):
+                self.expect |= 1 << tp  # expected again (it was dropped when it came late twice)
+                if self.verbose:
+                    print(TAG+"{} msg received late: joined".format(snt_names[tp]))
+            fix.add(tp, framer.mv[p:p+le])
+            pairer.added(fix, utc, self.expect)
+            if self.verbose:
+                print(TAG+"{} msg received".format(snt_names[tp]))
+            if self.expect and (fix.have & self.expect) == self.expect:
+                self.prev = fix.have
+                lComplete = True
+                break
+        if lComplete:
+            pairer.done(fix, lLate)
+            self.t_rx = framer.t_rx
+            return fix.nr_bytes()
+        return 0
+
+    def complete(self, fix):
+        fix.valid = fix.src[_lat] >= 0 and not fix.void()
+        fix.t_rx = self.t_rx
+        if fix.valid:
+            self.pairer.complete(fix)
+        return fix.valid
+
+    def lost(self):
+        return self.nr_lost + self.pairer.nr_lost
@@ -0,0 +1,308 @@
+"""
+    msfs_gps.flight -> module
+        @brief
+        What the fixes tell about the flight: the flight phase (flight_state), the metrics since the take-off
+        (flight_metrics) and the prediction of the position between two fixes (dead_reckoner).
+        The thresholds (fs_..., fm_vs_shift) are read when they are used: they can be changed after the import.
+"""
+import math
+from msfs_gps.nmea import _lat, _lon, _gs, _crs, _alt
+from msfs_gps.stats import lat_histogram
+
+# Airplane movement status (see ph_am_stat)
+ac_none = 0
+ac_stopped = 1
+ac_taxying = 2
+ac_flying = 4
+
+# Flight phases of flight_state. ph_none: before the first fix
+ph_none = -1
+ph_stopped = 0
+ph_taxi = 1
+ph_takeoff = 2   # take-off roll
+ph_climb = 3
+ph_cruise = 4
+ph_descent = 5
+ph_landing = 6   # from the end of the descent until taxi speed
+ph_names = ("stopped", "taxi", "takeoff", "climb", "cruise", "descent", "landing", "none")  # ph_none = -1: the last
+ph_am_stat = (ac_stopped, ac_taxying, ac_flying, ac_flying, ac_flying, ac_flying, ac_flying)
+# Thresholds of flight_state. A pair is (rise, fall): the band between them is the hysteresis
+fs_stop_kts = (3, 1)       # stopped -> taxi above 3 kts, taxi -> stopped below 1 kt (smoothed ground speed)
+fs_fast_kts = (35, 25)     # taxi -> take-off above 35 kts; take-off / landing -> taxi below 25 kts
+fs_climb_fpm = 300         # climb above +300 fpm, descent below -300 fpm (smoothed vertical speed)
+fs_level_fpm = 150         # cruise between -150 and +150 fpm
+fs_field_ft = 200          # the end of a descent below the take-off altitude + 200 ft is a landing
+fs_dwell_ms = (6000, 2000, 2000, 3000, 5000, 3000, 2000)  # per phase: how long it must be indicated, mSecs
+fs_gs_shift = 1            # smoothing of the ground speed: an exponential average with weight 1/2**shift
+fm_vs_shift = 2            # idem, the vertical speed of flight_metrics
+
+"""
+    dead_reckoner(max_age) -> class
+        @brief
+        Position and altitude prediction between two fixes.
+        update(fix) takes a new fix as the base of the prediction: its position, altitude and time of reception,
+        its ground speed and track as north and east rates (1/10000 minutes per nSec), and the vertical rate
+        from the previous fix. The trigonometry (cos/sin of the track, cos of the latitude) is done here,
+        once per fix: predict() only multiplies.
+        Before that, update() predicts where the aircraft would be at the time of the new fix and adds the
+        distance to the real position (in metres) to the histogram err (the prediction error).
+        predict(fix, t) fills fix (see gps_fix.put()) with the prediction for monotonic_ns() t.
+        next_time(t, t_free) returns when the next predicted frame is due: not before 1/fps seconds
+        after the base fix or the last prediction, nor before t_free (when the governor can draw it, see render_governor),
+        at most max_age seconds after the base fix, and not in the last min_gap nSecs before the next fix
+        is expected (the fix interval is learned): the governor would then hold back the real fix.
+"""
+class dead_reckoner:
+    def __init__(self, max_age, fps, min_gap):
+        self.max_age = int(max_age * 1000000000)  # nSecs
+        self.frame = 1000000000 // fps
+        self.min_gap = min_gap
+        self.period = 1000000000  # learned interval between two fixes
+        self.t = 0        # monotonic_ns() of the base fix. 0 = no base
+        self.t_pred = 0   # monotonic_ns() of the last prediction
+        self.lat = 0
+        self.lon = 0
+        self.alt = 0
+        self.gs = 0
+        self.crs = 0
+        self.v_n = 0.0    # 1/10000 minutes per nSec
+        self.v_e = 0.0
+        self.v_alt = 0.0  # feet per nSec
+        self.cos_lat = 1.0
+        self.nr_predicted = 0
+        self.err = lat_histogram("dr error m")
+
+    def offset(self, t):
+        dt = t - self.t
+        return int(self.v_n * dt), int(self.v_e * dt), int(self.v_alt * dt)
+
+    def update(self, fix):
+        t = fix.t_rx
+        lat = fix.read(_lat)
+        lon = fix.read(_lon)
+        alt = fix.read(_alt)
+        if self.t and t - self.t <= self.max_age:
+            d_n, d_e, d_alt = self.offset(t)
+            d_n += self.lat - lat
+            d_e = (d_e + self.lon - lon) * self.cos_lat
+            self.err.add(int(math.sqrt(d_n * d_n + d_e * d_e) * 0.1852 + 0.5))  # 1/10000 minute = 0.1852 m
+            if fix.src[_alt] < 0:  # carried (see fix_pairer): keep the vertical rate
+                alt = self.alt + d_alt
+            else:
+                self.v_alt = (alt - self.alt) / (t - self.t)
+            self.period += (t - self.t - self.period) // 4
+        else:
+            self.v_alt = 0.0
+        self.t = t
+        self.lat = lat
+        self.lon = lon
+        self.alt = alt
+        self.gs = fix.read(_gs)
+        self.crs = fix.read(_crs)
+        v = self.gs / 3600000000  # 1/10 kts -> 1/10000 minutes per nSec
+        a = math.radians(self.crs / 10)
+        self.cos_lat = math.cos(math.radians(lat / 600000))
+        self.v_n = v * math.cos(a)
+        self.v_e = v * math.sin(a) / self.cos_lat if self.cos_lat > 0.01 else 0.0
+
+    def next_time(self, t, t_free):
+        # 0 = no prediction
+        if self.t == 0:
+            return 0
+        c = max(t, t_free, self.t + self.frame, self.t_pred + self.frame)
+        t_fix = self.t + self.period
+        if t_fix - self.min_gap < c < t_fix + self.frame // 2:
+            c = t_fix + self.frame // 2  # after the fix that is due (if it does not come)
+        return c if c - self.t <= self.max_age else 0
+
+    def predict(self, fix, t):
+        d_n, d_e, d_alt = self.offset(t)
+        lon = self.lon + d_e
+        if lon > 108000000:  # 180 degrees
+            lon -= 216000000
+        elif lon < -108000000:
+            lon += 216000000
+        fix.put(_lat, self.lat + d_n)
+        fix.put(_lon, lon)
+        fix.put(_alt, self.alt + d_alt)
+        fix.put(_gs, self.gs)
+        fix.put(_crs, self.crs)
+        fix.valid = True
+        fix.t_rx = t
+        self.t_pred = t
+        self.nr_predicted += 1
+
+    def pr_stats(self):
+        n, mn, p50, p95, p99, mx = self.err.summary()
+        print("dead reckoning: {} frames predicted. Error at the next fix (m): n {} p50 {} p95 {} max {}".format(
+            self.nr_predicted, n, p50, p95, mx))
+
+"""
+    flight_state() -> class
+        @brief
+        Flight-phase state machine (see ph_stopped ... ph_landing).
+        update(fix, vs) smooths the ground speed with an exponential average and lets next_phase() pick the phase
+        that it and vs (the smoothed vertical speed in fpm, see flight_metrics) indicate.
+        Every threshold has a hysteresis band (see fs_stop_kts, fs_fast_kts, fs_climb_fpm and fs_level_fpm).
+        A new phase is confirmed only when it has been indicated for its dwell time (fs_dwell_ms):
+        then update() returns True. A candidate phase that disappears before is counted in nr_suppressed.
+        nr_transitions counts the confirmed transitions, flight_transitions those since the last take-off.
+"""
+class flight_state:
+    def __init__(self):
+        self.phase = ph_none
+        self.last = ph_none
+        self.cand = ph_none  # the phase indicated, waiting for its dwell time
+        self.t_cand = 0      # monotonic_ns() at which cand was first indicated
+        self.gs = 0          # smoothed ground speed, 1/10 kts
+        self.vs = 0          # smoothed vertical speed, fpm
+        self.alt = 0
+        self.field_alt = 0   # altitude at the take-off
+        self.nr_transitions = 0
+        self.flight_transitions = 0
+        self.nr_suppressed = 0
+
+    def update(self, fix, vs):
+        t = fix.t_rx
+        self.vs = vs
+        if fix.valid:
+            gs = fix.read(_gs)
+            self.alt = fix.read(_alt)
+        else:
+            gs = 0  # no (new) fix
+        if self.phase == ph_none:
+            self.gs = gs  # the first fix (e.g. after a reboot in flight): nothing to smooth, no dwell time
+        else:
+            self.gs += (gs - self.gs) >> fs_gs_shift
+        ph = self.next_phase()
+        if ph != self.cand:
+            if self.cand != self.phase:
+                self.nr_suppressed += 1
+            self.cand = ph
+            self.t_cand = t
+        if ph == self.phase or (self.phase != ph_none and t - self.t_cand < fs_dwell_ms[ph] * 1000000):
+            return False
+        self.last = self.phase
+        self.phase = ph
+        self.nr_transitions += 1
+        self.flight_transitions += 1
+        if ph == ph_takeoff:
+            self.field_alt = self.alt
+            self.flight_transitions = 1
+        return True
+
+    def next_phase(self):
+        ph = self.phase
+        gs = self.gs
+        vs = self.vs
+        if ph == ph_none:
+            return ph_stopped if gs < fs_stop_kts[0] * 10 else ph_taxi if gs < fs_fast_kts[0] * 10 else ph_cruise
+        if ph == ph_stopped:
+            return ph_taxi if gs > fs_stop_kts[0] * 10 else ph
+        if ph == ph_taxi:
+            if gs < fs_stop_kts[1] * 10:
+                return ph_stopped
+            return ph_takeoff if gs > fs_fast_kts[0] * 10 else ph
+        if ph == ph_takeoff or ph == ph_landing:
+            if vs > fs_climb_fpm:
+                return ph_climb  # lift-off or go-around
+            return ph_taxi if gs < fs_fast_kts[1] * 10 else ph
+        # airborne
+        if vs > fs_climb_fpm:
+            return ph_climb
+        if vs < -fs_climb_fpm:
+            return ph_descent
+        c = ph_cruise if -fs_level_fpm < vs < fs_level_fpm else ph
+        if c != ph_climb and (gs < fs_fast_kts[0] * 10 or
+                              (c == ph_cruise and self.alt < self.field_alt + fs_field_ft)):
+            return ph_landing
+        return c
+
+    def pr_stats(self):
+        print("flight state: {}, transitions: {} ({} this flight), suppressed: {}".format(
+            ph_names[self.phase], self.nr_transitions, self.flight_transitions, self.nr_suppressed))
+
+"""
+    flight_metrics() -> class
+        @brief
+        Metrics derived from the fixes, updated in O(1) per fix (update(fix, phase)): nothing is kept but totals.
+        vs          vertical speed in fpm, from the altitude of the previous fix (exponential average, fm_vs_shift).
+                    Carried altitudes (see fix_pairer) are skipped
+        dist        distance flown since the take-off in 1/1000000 minutes (1/100 of the gps_fix unit) while flying
+                    (take-off .. landing). Between two fixes the earth is flat: sqrt(dlat**2 + (dlon*cos(lat))**2).
+                    cos(lat) is cached and only computed again after the latitude has changed by more than 0.1 degree
+        t_aloft     nSecs in the climb, cruise and descent phases since the take-off
+        max_gs, gs_sum / nr_gs  ground speed (1/10 kts) while flying, since the take-off
+        reset() starts a new flight (at the take-off, see ac_status()). vs is not reset.
+"""
+class flight_metrics:
+    def __init__(self):
+        self.vs = 0
+        self.t = 0       # monotonic_ns() of the previous valid fix. 0 = none
+        self.t_alt = 0   # idem, of the previous fix with an altitude of its own (not carried, see fix_pairer)
+        self.lat = 0
+        self.lon = 0
+        self.alt = 0
+        self.cos_lat = 1.0
+        self.lat_cos = -1000000000  # latitude at which cos_lat was computed
+        self.reset()
+
+    def reset(self):
+        self.dist = 0
+        self.t_aloft = 0
+        self.max_gs = 0
+        self.gs_sum = 0
+        self.nr_gs = 0
+
+    def update(self, fix, phase):
+        if not fix.valid:
+            return
+        t = fix.t_rx
+        lat = fix.read(_lat)
+        lon = fix.read(_lon)
+        if fix.src[_alt] >= 0:
+            alt = fix.read(_alt)
+            dt = t - self.t_alt
+            if self.t_alt and 0 < dt <= 5000000000:
+                self.vs += ((alt - self.alt) * 60000000000 // dt - self.vs) >> fm_vs_shift
+            self.t_alt = t
+            self.alt = alt
+        dt = t - self.t
+        if self.t and 0 < dt <= 5000000000:
+            if phase >= ph_takeoff:  # flying
+                if abs(lat - self.lat_cos) > 60000:  # 0.1 degree
+                    self.cos_lat = math.cos(math.radians(lat / 600000))
+                    self.lat_cos = lat
+                d_n = lat - self.lat
+                d_e = lon - self.lon
+                if d_e > 108000000:  # crossed 180 degrees
+                    d_e -= 216000000
+                elif d_e < -108000000:
+                    d_e += 216000000
+                d_e *= self.cos_lat
+                self.dist += int(math.sqrt(d_n * d_n + d_e * d_e) * 100)
+                gs = fix.read(_gs)
+                self.gs_sum += gs
+                self.nr_gs += 1
+                if gs > self.max_gs:
+                    self.max_gs = gs
+                if ph_climb <= phase <= ph_descent:
+                    self.t_aloft += dt
+        self.t = t
+        self.lat = lat
+        self.lon = lon
+
+    def dist_nm(self):
+        return self.dist // 1000000  # 1 minute = 1 nm
+
+    def avg_gs(self):
+        return self.gs_sum // self.nr_gs if self.nr_gs else 0
+
+    def aloft_min(self):
+        return self.t_aloft // 60000000000
+
+    def pr_stats(self):
+        m = self.aloft_min()
+        print("flight: vs {} fpm, distance {} nm, aloft {}:{:02d}, gs avg {} max {} kts".format(
+            self.vs, self.dist_nm(), m // 60, m % 60, self.avg_gs() // 10, self.max_gs // 10))
+
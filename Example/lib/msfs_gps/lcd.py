@@ -0,0 +1,302 @@
+"""
+    msfs_gps.lcd -> module
+        @brief
+        The lcd side: the shadow-framebuffer renderer of the serLCD (lcd_renderer) and the pages it shows.
+        lcd_fmt_nav() and lcd_fmt_flight() write a fix into the frame of a renderer over a fixed template:
+        nothing is allocated, nothing is sent. The caller flushes the frame (see lcd_renderer.aflush()).
+"""
+import asyncio
+from time import monotonic_ns
+from msfs_gps.nmea import _utc, _lat, _lon, _gs, _crs, _alt
+
+"""
+    lcd_renderer(lcd, nr_rows, row_len, inline_cursor, max_gap, tracer, sid) -> class
+        @brief
+        Shadow-framebuffer renderer for the Sparkfun serLCD.
+        The text to show is composed in rows (one preallocated bytearray per lcd row) with clear() and put().
+        shadow holds what is on the glass. flush() compares rows with shadow and sends only the changed runs:
+        one cursor move plus one bulk write per run.
+        set_cursor() of the sparkfun_serlcd library sleeps 50 mSec after each cursor move.
+        With inline_cursor the cursor command is put in front of the run's characters
+        and both are sent in one I2C write, without that sleep.
+        Changed cells in a row that are at most max_gap cells apart are sent as one run:
+        re-sending a few unchanged cells is cheaper than an extra cursor move.
+        Without inline_cursor max_gap defaults to a full row (at most one cursor move per row).
+        The shadow of a run is updated when its write has succeeded: a run that raised (OSError) is sent again.
+        hard_clear() clears the glass with lcd.clear() and marks the shadow blank.
+        put_chr() and put_int() write a character or the digits of an int straight into a row,
+        and flush() copies the runs into a preallocated buffer: once the frame has been set up, nothing is allocated.
+        The counters nr_bytes, nr_moves and nr_flushes count the bytes sent, cursor moves and flush() calls.
+        With a span_tracer tracer each i2c write is traced as a span of stage sid.
+"""
+lcd_row_offsets = (0x00, 0x40, 0x14, 0x54)  # DDRAM address of the first cell of each row
+
+class lcd_renderer:
+    def __init__(self, lcd, nr_rows=4, row_len=20, inline_cursor=True, max_gap=-1, tracer=None, sid=0):
+        self.lcd = lcd
+        self.tracer = tracer
+        self.sid = sid
+        self.nr_rows = nr_rows
+        self.row_len = row_len
+        self.inline_cursor = inline_cursor
+        if max_gap < 0:
+            max_gap = 4 if inline_cursor else row_len
+        self.max_gap = max_gap
+        self.out = bytearray(row_len + 2)  # cursor command + characters of one run
+        out_mv = memoryview(self.out)
+        views = []
+        for n in range(row_len + 3):
+            views.append(out_mv[:n])
+        self.out_views = tuple(views)  # out_views[n]: the first n bytes of out. Slicing at run time would allocate
+        self.rows = []
+        self.shadow = []
+        for _ in range(nr_rows):
+            self.rows.append(bytearray(b' ' * row_len))
+            self.shadow.append(bytearray(b' ' * row_len))  # The lcd is cleared when it is initialized
+        self.nr_bytes = 0
+        self.nr_moves = 0
+        self.nr_flushes = 0
+
+    def clear(self, fm_row=0, to_row=-1):
+        # blank rows fm_row until and including to_row of the frame (the glass is updated by flush())
+        if to_row < 0:
+            to_row = self.nr_rows - 1
+        for r in range(fm_row, to_row + 1):
+            row = self.rows[r]
+            for c in range(self.row_len):
+                row[c] = 0x20
+
+    def put(self, col, row, s):
+        # put str or bytes s in the frame at col, row. Text longer than the row continues on the next row
+        for i in range(len(s)):
+            if col >= self.row_len:
+                col = 0
+                row += 1
+            if row >= self.nr_rows:
+                break
+            c = s[i]
+            self.rows[row][col] = (ord(c) if isinstance(c, str) else c) & 0xFF
+            col += 1
+
+    def put_chr(self, col, row, c):
+        # put the character with code c in the frame at col, row
+        self.rows[row][col] = c
+
+    def put_int(self, col, row, v, width, fill=0x20):
+        # put int v right-aligned in width cells at col, row, padded with fill (0x20 ' ' or 0x30 '0').
+        # A negative v gets a '-' in front. Digits that do not fit in width are left out. Nothing is allocated
+        buf = self.rows[row]
+        neg = v < 0
+        if neg:
+            v = -v
+        i = col + width - 1
+        while i >= col:
+            buf[i] = 0x30 + v % 10
+            v //= 10
+            i -= 1
+            if v == 0:
+                break
+        if neg and i >= col:
+            buf[i] = 0x2D  # '-'
+            i -= 1
+        while i >= col:
+            buf[i] = fill
+            i -= 1
+
+    def send_run(self, r, c):
+        # send the first changed run in row r at or after column c.
+        # Returns the column after the run (row_len if there was none) and sets self.run_len
+        row = self.rows[r]
+        shadow = self.shadow[r]
+        self.run_len = 0
+        while c < self.row_len and row[c] == shadow[c]:
+            c += 1
+        if c >= self.row_len:
+            return c
+        start = end = c  # changed run: start .. end (inclusive)
+        c += 1
+        while c < self.row_len and c - end <= self.max_gap:
+            if row[c] != shadow[c]:
+                end = c
+            c += 1
+        end += 1
+        out = self.out
+        n = 0
+        if self.inline_cursor:
+            out[0] = 0xFE  # special command
+            out[1] = 0x80 | (start + lcd_row_offsets[r])  # set DDRAM address
+            n = 2
+        for i in range(start, end):
+            out[n] = row[i]
+            n += 1
+        tracer = self.tracer
+        if tracer and tracer.on:
+            t0 = monotonic_ns()
+        if not self.inline_cursor:
+            self.lcd.set_cursor(start, r)
+        self.lcd._write_bytes(self.out_views[n])
+        for i in range(start, end):  # only now: after an OSError the run is sent again at the next flush
+            shadow[i] = row[i]
+        if tracer and tracer.on:
+            tracer.add(self.sid, t0, monotonic_ns(), n)
+        self.nr_moves += 1
+        self.run_len = end - start + 2  # + 2 bytes for the cursor command
+        self.nr_bytes += self.run_len
+        return end
+
+    def flush(self):
+        nr_sent = 0
+        for r in range(self.nr_rows):
+            c = 0
+            while c < self.row_len:
+                c = self.send_run(r, c)
+                nr_sent += self.run_len
+        self.nr_flushes += 1
+        return nr_sent
+
+    async def aflush(self):
+        # as flush(), but lets the other asyncio tasks (e.g. the uart task) run between two runs
+        nr_sent = 0
+        for r in range(self.nr_rows):
+            c = 0
+            while c < self.row_len:
+                c = self.send_run(r, c)
+                if self.run_len:
+                    nr_sent += self.run_len
+                    await asyncio.sleep(0)
+        self.nr_flushes += 1
+        return nr_sent
+
+    def hard_clear(self):
+        self.lcd.clear()
+        for r in range(self.nr_rows):
+            shadow = self.shadow[r]
+            for c in range(self.row_len):
+                shadow[c] = 0x20
+
+# The pages of a display (see display_backend)
+page_nav = 0     # position, gs, altitude, track (lcd_fmt_nav())
+page_flight = 1  # time, phase, vertical speed, distance, nearest airport (lcd_fmt_flight())
+
+ph_lcd_names = (b"       ", b"       ", b"TAKEOFF", b"CLIMB  ", b"CRUISE ", b"DESCENT", b"LANDING")  # per flight phase
+# Extra field of page_nav (row 3, after the track): one or more of fld_phase ... fld_apt_brg (see lcd_fmt_extra())
+fld_phase = 0      # flight phase (see flight_state)
+fld_vs = 1         # vertical speed, fpm
+fld_dist = 2       # distance flown since the take-off, nm
+fld_aloft = 3      # time aloft since the take-off, hh:mm
+fld_avg_gs = 4     # average ground speed since the take-off, kts
+fld_max_gs = 5     # maximum idem
+fld_airport = 6    # nearest airport: ICAO code and distance, nm (see airport_index)
+fld_apt_brg = 7    # idem, bearing to it
+
+# The fixed parts of the four rows of page_nav. The numbers are written over them by lcd_fmt_pos() and put_int()
+lcd_row_tpl = (b"N    00\xdf00'00.00\"   ",   # latitude:  hemisphere, degrees, minutes, 1/100 minutes (shown as seconds)
+               b"E   000\xdf00'00.00\"   ",   # longitude
+               b"GS    0 ALT     0 FT",
+               b"CRS 000 DEGS        ")
+
+# The fixed parts of the four rows of page_flight
+lcd_flight_tpl = (b"UTC 00:00:00        ",
+                  b"VS      0 FPM       ",
+                  b"DIST    0 NM T   :00",
+                  b"APT ----   0 NM 000\xdf")
+
+"""
+    lcd_fmt_nav(rd, fix, fld, msg_nr, fsm, metrics, airports) -> None
+        @brief
+        Writes page_nav of fix in the frame of the renderer rd: the position, ground speed, altitude and track,
+        the extra field fld (see lcd_fmt_extra()) and msg_nr. fsm, metrics and airports: see lcd_fmt_extra().
+"""
+def lcd_fmt_nav(rd, fix, fld, msg_nr, fsm, metrics, airports):
+    for r in range(4):
+        rd.put(0, r, lcd_row_tpl[r])
+    lcd_fmt_pos(rd, 0, fix.read(_lat), 0x53, 0x4E)  # 'S', 'N'
+    lcd_fmt_pos(rd, 1, fix.read(_lon), 0x57, 0x45)  # 'W', 'E'
+    rd.put_int(4, 2, fix.read(_gs) // 10, 3)
+    rd.put_int(12, 2, fix.read(_alt), 5)
+    rd.put_int(4, 3, fix.read(_crs) // 10, 3, 0x30)
+    lcd_fmt_extra(rd, fld, fsm, metrics, airports)
+    rd.put_int(18, 0, msg_nr, 2, 0x30)
+
+"""
+    lcd_fmt_flight(rd, fix, fsm, metrics, airports) -> None
+        @brief
+        Writes page_flight of fix in the frame of the renderer rd: the UTC time and flight phase (fsm, see flight_state),
+        the vertical speed, the distance and time aloft since the take-off (metrics, see flight_metrics)
+        and the nearest airport (airports, see airport_index: None when not used).
+"""
+def lcd_fmt_flight(rd, fix, fsm, metrics, airports):
+    for r in range(4):
+        rd.put(0, r, lcd_flight_tpl[r])
+    utc = fix.read(_utc)
+    rd.put_int(4, 0, utc // 1000000, 2, 0x30)
+    rd.put_int(7, 0, utc // 10000 % 100, 2, 0x30)
+    rd.put_int(10, 0, utc // 100 % 100, 2, 0x30)
+    if fsm.phase >= 0:
+        rd.put(13, 0, ph_lcd_names[fsm.phase])
+    rd.put_chr(3, 1, 0x2D if metrics.vs < 0 else 0x2B)  # '-', '+'
+    rd.put_int(4, 1, min(abs(metrics.vs), 9999), 4)
+    rd.put_int(5, 2, min(metrics.dist_nm(), 9999), 4)
+    m = metrics.aloft_min()
+    rd.put_int(15, 2, min(m // 60, 99), 2)
+    rd.put_int(18, 2, m % 60, 2, 0x30)
+    if airports and airports.found:
+        rd.put(4, 3, airports.ident)
+        rd.put_int(9, 3, min(airports.dist // 10, 999), 3)
+        rd.put_int(16, 3, airports.brg, 3, 0x30)
+
+"""
+    lcd_fmt_pos(rd, row, v, neg_chr, pos_chr) -> None
+        @brief
+        Writes the position v (1/10000 minutes, see gps_fix) in row row of the frame of the renderer rd:
+        hemisphere character (neg_chr if v < 0, else pos_chr), degrees (2 digits in row 0, 3 in row 1),
+        minutes and 1/100 minutes, over the template lcd_row_tpl[row]. Nothing is allocated.
+"""
+def lcd_fmt_pos(rd, row, v, neg_chr, pos_chr):
+    rd.put_chr(0, row, neg_chr if v < 0 else pos_chr)
+    if v < 0:
+        v = -v
+    mins = v % 600000  # 1/10000 minutes
+    if row == 0:
+        rd.put_int(5, row, v // 600000, 2, 0x30)
+    else:
+        rd.put_int(4, row, v // 600000, 3, 0x30)
+    rd.put_int(8, row, mins // 10000, 2, 0x30)
+    rd.put_int(11, row, (mins % 10000) // 100, 2, 0x30)
+    rd.put_int(14, row, mins % 100, 2, 0x30)
+
+"""
+    lcd_fmt_extra(rd, fld, fsm, metrics, airports) -> None
+        @brief
+        Writes the extra field fld (see fld_phase ... fld_apt_brg) in the last 7 cells of row 3
+        of the frame of the renderer rd, from the flight_state fsm, the flight_metrics metrics and
+        the airport_index airports (None when not used). Nothing is allocated.
+"""
+def lcd_fmt_extra(rd, fld, fsm, metrics, airports):
+    if fld == fld_phase:
+        if fsm.phase >= 0:
+            rd.put(13, 3, ph_lcd_names[fsm.phase])
+    elif fld == fld_vs:
+        rd.put_chr(13, 3, 0x2D if metrics.vs < 0 else 0x2B)  # '-', '+'
+        rd.put_int(14, 3, min(abs(metrics.vs), 9999), 4)
+        rd.put(18, 3, b"FM")
+    elif fld == fld_dist:
+        rd.put_int(13, 3, min(metrics.dist_nm(), 99999), 5)
+        rd.put(18, 3, b"NM")
+    elif fld == fld_aloft:
+        m = metrics.aloft_min()
+        rd.put(13, 3, b"T   :  ")
+        rd.put_int(15, 3, min(m // 60, 99), 2)
+        rd.put_int(18, 3, m % 60, 2, 0x30)
+    elif fld == fld_airport or fld == fld_apt_brg:
+        if not airports or not airports.found:
+            rd.put(13, 3, b"----   ")
+        elif fld == fld_airport:
+            rd.put(13, 3, airports.ident)
+            rd.put_int(17, 3, min(airports.dist // 10, 999), 3)
+        else:
+            rd.put(13, 3, b"BRG   \xdf")
+            rd.put_int(16, 3, airports.brg, 3, 0x30)
+    else:
+        rd.put(13, 3, b"AVG    " if fld == fld_avg_gs else b"MAX    ")
+        rd.put_int(17, 3, (metrics.avg_gs() if fld == fld_avg_gs else metrics.max_gs) // 10, 3)
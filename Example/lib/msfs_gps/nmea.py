@@ -0,0 +1,444 @@
+"""
+    msfs_gps.nmea -> module
+        @brief
+        NMEA 0183 sentences: the framer that cuts them out of the uart stream and checks them (nmea_framer),
+        the tokenizer and field decoders (nmea_tokens) and the registry of the sentence types with their decoders.
+        Pure Python: it runs on CircuitPython and on CPython (see Tools/replay.py).
+"""
+from array import array
+from time import monotonic_ns
+
+encoding = 'utf-8'
+nmea_max_len = 82    # NMEA 0183: max 82 characters, including the '$' and the '\r\n'
+
+# Index of the items in gps_fix.a
+_utc = 0  # UTC time hhmmss.ss as an int: hhmmssss
+_lat = 1  # latitude in 1/10000 minutes. Negative = South
+_lon = 2  # longitude in 1/10000 minutes. Negative = West
+_gs = 3   # ground speed in 1/10 kts
+_crs = 4  # track made good (true) in 1/10 degrees
+_alt = 5  # altitude in feet
+_hdop = 6 # horizontal dilution of precision in 1/10
+_date = 7 # UTC date as an int: yyyymmdd
+_nr_fix_items = 8
+
+"""
+    hex_val(b) -> int
+        @brief
+        Value of the hexadecimal ASCII digit b (an int). -1 if b is not a hexadecimal digit.
+"""
+def hex_val(b):
+    if b >= 0x30 and b <= 0x39:
+        return b - 0x30
+    if b >= 0x41 and b <= 0x46:
+        return b - 0x37
+    if b >= 0x61 and b <= 0x66:
+        return b - 0x57
+    return -1
+
+"""
+    nmea_framer(uart, chunk_len, nr_slots, slot_len) -> class
+        @brief
+        Incremental NMEA sentence framer with checksum validation.
+        poll() reads the available uart bytes with readinto() into a preallocated chunk
+        and feeds them, byte by byte, into a fixed ring of sentence slots.
+        A '$' starts a new sentence in the slot at the head of the ring.
+        While framing, the XOR of the characters between '$' and '*' is computed.
+        A sentence is complete as soon as its '\n' lands, its tail has the shape '*hh\r\n'
+        and hh equals the computed XOR. Other sentences are rejected in place: the slot is simply reused.
+        The sentence type is looked up (see snt_registry) as soon as the talker + sentence ID have been received.
+        Sentences of a type that is not registered are skipped right there.
+        Per sentence type the accepted and rejected sentences are counted in nr_ok and nr_bad.
+        A line that ends before its type is known is rejected as nr_bad[snt_other].
+        nr_ok[snt_other] counts the skipped sentences. nr_cut counts the sentences cut off by the next '$'
+        (bytes lost in between, e.g. an overrun of the uart receive buffer) and nr_cut_bytes their bytes.
+        nr_lost_bytes counts the bytes of all the sentences that were thrown away (cut off, rejected or too long).
+        Completed sentences are handed off via pop(), which returns the slot index (or -1).
+        The data stays in the ring: start(slot), lens[slot] and types[slot] give its position, length and type.
+        When the ring is full the oldest sentence is dropped.
+        No memory is allocated once the framer has been created.
+"""
+class nmea_framer:
+    def __init__(self, uart, chunk_len, nr_slots=8, slot_len=nmea_max_len):
+        self.uart = uart
+        self.chunk = bytearray(chunk_len)
+        self.nr_slots = nr_slots
+        self.slot_len = slot_len
+        self.ring = bytearray(nr_slots * slot_len)
+        self.mv = memoryview(self.ring)
+        self.lens = array('B', [0] * nr_slots)
+        self.types = array('B', [0] * nr_slots)
+        self.nr_ok = array('L', [0] * (snt_other + 1))
+        self.nr_bad = array('L', [0] * (snt_other + 1))
+        self.clear_stats()
+        self.reset()
+
+    def clear_stats(self):
+        for tp in range(snt_other + 1):
+            self.nr_ok[tp] = 0
+            self.nr_bad[tp] = 0
+        self.dropped = 0  # complete sentences overwritten because the ring was full
+        self.bad = 0      # lines that were too long to be NMEA sentences
+        self.nr_cut = 0
+        self.nr_cut_bytes = 0
+        self.nr_lost_bytes = 0
+
+    def set_uart(self, uart, chunk_len):
+        # after a change of baudrate: the new uart and its chunk size (see uart_sizes())
+        self.uart = uart
+        if chunk_len != len(self.chunk):
+            self.chunk = bytearray(chunk_len)
+        self.reset()
+
+    def reset(self):
+        self.head = 0   # slot being filled
+        self.tail = 0   # oldest complete sentence
+        self.count = 0  # nr of complete sentences in the ring
+        self.pos = -1   # write position in the head slot. -1 = hunting for a '$'
+        self.xor = 0    # running checksum of the sentence being framed
+        self.in_cs = False  # True after the '*' has been received
+        self.tp = snt_other # type of the sentence being framed
+        self.t_rx = 0   # monotonic_ns() of the poll() in which the last sentence completed
+        if self.uart:
+            self.uart.reset_input_buffer()
+
+    def start(self, slot):
+        return slot * self.slot_len
+
+    def poll(self):
+        n = self.uart.readinto(self.chunk)
+        if not n:
+            return 0
+        return self.feed(n)
+
+    def feed(self, n):
+        ring = self.ring
+        chunk = self.chunk
+        slot_len = self.slot_len
+        base = self.head * slot_len
+        pos = self.pos
+        xor = self.xor
+        in_cs = self.in_cs
+        tp = self.tp
+        nr_done = 0
+        for i in range(n):
+            b = chunk[i]
+            if b == 0x24:  # '$' always starts a new sentence, also when the previous one was cut-off
+                if pos > 0:
+                    self.nr_cut += 1
+                    self.nr_cut_bytes += pos
+                    self.nr_lost_bytes += pos
+                pos = 0
+                xor = 0
+                in_cs = False
+                tp = snt_other  # until the ID has been received: a line cut off before it is not counted against a type
+            elif pos < 0:
+                continue
+            elif pos >= slot_len:
+                self.bad += 1
+                self.nr_lost_bytes += pos
+                pos = -1
+                continue
+            elif b == 0x2A:  # '*'
+                in_cs = True
+            elif not in_cs:
+                xor ^= b
+            ring[base + pos] = b
+            pos += 1
+            if pos == 6:  # '$' + talker + sentence ID
+                tp = self.snt_type(base)
+                if tp == snt_other:
+                    self.nr_ok[tp] += 1
+                    pos = -1
+            elif b == 0x0A:  # '\n'
+                if (pos >= 6 and ring[base + pos - 5] == 0x2A and  # '*hh\r\n'
+                        hex_val(ring[base + pos - 4]) == xor >> 4 and
+                        hex_val(ring[base + pos - 3]) == xor & 0x0F and
+                        ring[base + pos - 2] == 0x0D):
+                    self.nr_ok[tp] += 1
+                    self.lens[self.head] = pos
+                    self.types[self.head] = tp
+                    self.head = (self.head + 1) % self.nr_slots
+                    base = self.head * slot_len
+                    self.count += 1
+                    nr_done += 1
+                    if self.head == self.tail:  # the next slot to fill holds the oldest sentence: drop it
+                        self.tail = (self.tail + 1) % self.nr_slots
+                        self.count -= 1
+                        self.dropped += 1
+                else:
+                    self.nr_bad[tp] += 1
+                    self.nr_lost_bytes += pos
+                pos = -1
+        self.pos = pos
+        self.xor = xor
+        self.in_cs = in_cs
+        self.tp = tp
+        if nr_done:
+            self.t_rx = monotonic_ns()
+        return nr_done
+
+    def snt_type(self, base):
+        # sentence type from the talker + ID (e.g. 'GPRMC') without slicing the ring
+        return snt_registry.get(snt_key(self.ring, base + 1), snt_other)
+
+    def peek(self):
+        # as pop(), but the sentence stays in the ring
+        if self.count == 0:
+            return -1
+        return self.tail
+
+    def pop(self):
+        if self.count == 0:
+            return -1
+        slot = self.tail
+        self.tail = (slot + 1) % self.nr_slots
+        self.count -= 1
+        return slot
+
+    def pr_stats(self):
+        for tp in range(snt_other):
+            print("{:<7s} accepted: {:6d}, rejected: {:4d}".format(snt_names[tp], self.nr_ok[tp], self.nr_bad[tp]))
+        print("other   skipped: {:6d}, rejected: {:4d}".format(self.nr_ok[snt_other], self.nr_bad[snt_other]))
+        print("dropped (ring full): {}, too long: {}, cut off: {} ({} bytes), bytes lost: {}".format(
+            self.dropped, self.bad, self.nr_cut, self.nr_cut_bytes, self.nr_lost_bytes))
+
+"""
+    nmea_tokens(max_fields) -> class
+        @brief
+        Single-pass, zero-copy NMEA tokenizer.
+        scan() walks once over a sentence in a memoryview and records, in a preallocated array,
+        the position of the '$', of every ',' and of the '*' that precedes the checksum.
+        Field n lies between sep[n] and sep[n+1]. Field 0 is the ID without the '$', e.g. 'GPRMC'.
+        The field_...() functions decode only the field asked for, directly from the buffer.
+        Only field_str() allocates (a str), the others return ints.
+"""
+class nmea_tokens:
+    def __init__(self, max_fields=24):
+        self.max_fields = max_fields
+        self.sep = array('H', [0] * (max_fields + 1))
+        self.buf = None
+        self.nr_fields = 0
+
+    def scan(self, buf, start, length):
+        sep = self.sep
+        self.buf = buf
+        self.nr_fields = 0
+        sep[0] = start
+        n = 1
+        for i in range(start + 1, start + length):
+            b = buf[i]
+            if b == 0x2C:  # ','
+                if n >= self.max_fields:
+                    return 0
+                sep[n] = i
+                n += 1
+            elif b == 0x2A:  # '*'
+                sep[n] = i
+                self.nr_fields = n
+                return n
+        return 0  # no '*' found
+
+    def field_len(self, n):
+        if n >= self.nr_fields:
+            return 0
+        return self.sep[n + 1] - self.sep[n] - 1
+
+    def field_chr(self, n):
+        # first character of field n as an int. 0 if the field is empty
+        if self.field_len(n) == 0:
+            return 0
+        return self.buf[self.sep[n] + 1]
+
+    def field_is(self, n, tag):
+        if self.field_len(n) != len(tag):
+            return False
+        p = self.sep[n] + 1
+        for i in range(len(tag)):
+            if self.buf[p + i] != tag[i]:
+                return False
+        return True
+
+    def field_int(self, n, decimals=0, default=0):
+        # decimal number in field n as an int, scaled by 10**decimals. Extra decimals are truncated.
+        # Returns default if the field is empty or is not a number
+        if self.field_len(n) == 0:
+            return default
+        buf = self.buf
+        i = self.sep[n] + 1
+        end = self.sep[n + 1]
+        neg = buf[i] == 0x2D  # '-'
+        if neg:
+            i += 1
+        v = 0
+        nr_digits = 0
+        frac = -1  # nr of decimals taken. -1 = no decimal point seen yet
+        while i < end:
+            b = buf[i]
+            if b == 0x2E:  # '.'
+                if frac >= 0:
+                    return default
+                frac = 0
+            elif b >= 0x30 and b <= 0x39:
+                nr_digits += 1
+                if frac < 0:
+                    v = v * 10 + b - 0x30
+                elif frac < decimals:
+                    v = v * 10 + b - 0x30
+                    frac += 1
+            else:
+                return default
+            i += 1
+        if nr_digits == 0:
+            return default
+        if frac < 0:
+            frac = 0
+        while frac < decimals:
+            v *= 10
+            frac += 1
+        return -v if neg else v
+
+    def field_str(self, n):
+        if self.field_len(n) == 0:
+            return ""
+        return str(bytes(self.buf[self.sep[n] + 1:self.sep[n + 1]]), encoding)
+
+"""
+    nmea_deg_min(tok, n, neg_chr) -> int
+        @brief
+        Converts the NMEA position in field n of tok ('ddmm.mmmm' or 'dddmm.mmmm')
+        and the hemisphere in field n+1 into 1/10000 minutes. Negative for hemisphere neg_chr (S or W).
+"""
+def nmea_deg_min(tok, n, neg_chr):
+    v = tok.field_int(n, 4)  # e.g. 3830.0600 -> 38300600
+    v = (v // 1000000) * 600000 + v % 1000000
+    if tok.field_chr(n + 1) == neg_chr:
+        v = -v
+    return v
+
+# +--------------------------------------+
+# | Sentence types                       |
+# +--------------------------------------+
+# The sentence types are kept in a registry. Each has a decoder: decoder(tok, n) returns item n
+# (see _utc ... _date) of a gps_fix from a sentence that has been tokenized in tok (see nmea_tokens).
+# A type with a position can have a void test: void(tok) is True when the sentence tells that the receiver
+# has no fix (e.g. the status 'V' of $GPRMC) or its position fields are empty (see burst_reader.complete()).
+# The framer looks up the talker + sentence ID (e.g. 'GPRMC') of each sentence as soon as its 6th byte
+# has been received and skips, without buffering or checking, the types that are not registered.
+# To handle another sentence type: write its decoder and add a snt_register() line below.
+snt_registry = {}     # snt_key() of the talker + sentence ID -> sentence type
+snt_ids = []          # per sentence type: talker + sentence ID, e.g. b'GPRMC'
+snt_names = []        # idem: name for the REPL, e.g. '$GPRMC'
+snt_min_fields = []   # idem: nr of fields (incl. the ID) the sentence must have to be decoded
+snt_items = []        # idem: the gps_fix items it provides
+snt_decoders = []     # idem: decoder(tok, n)
+snt_voids = []        # idem: void(tok), or None
+
+"""
+    snt_key(buf, i) -> int
+        @brief
+        Key in snt_registry of the talker + sentence ID in buf[i:i+5].
+        5 bits per character: a small int, so a lookup does not allocate.
+"""
+def snt_key(buf, i):
+    return (((((((buf[i] & 0x1F) << 5) | (buf[i+1] & 0x1F)) << 5 | (buf[i+2] & 0x1F)) << 5)
+             | (buf[i+3] & 0x1F)) << 5) | (buf[i+4] & 0x1F)
+
+"""
+    snt_register(talker_id, min_fields, items, decoder, void) -> int
+        @brief
+        Adds a sentence type to the registry. Returns the sentence type (its index in snt_ids ...).
+        The order of registration is the order of preference when two types provide the same item.
+"""
+def snt_register(talker_id, min_fields, items, decoder, void=None):
+    tp = len(snt_ids)
+    snt_registry[snt_key(talker_id, 0)] = tp
+    snt_ids.append(talker_id)
+    snt_names.append("$" + str(talker_id, 'utf-8'))
+    snt_min_fields.append(min_fields)
+    snt_items.append(items)
+    snt_decoders.append(decoder)
+    snt_voids.append(void)
+    return tp
+
+# $GPRMC,hhmmss.ss,A,ddmm.mmmm,N,dddmm.mmmm,W,gs,crs,ddmmyy,magvar,E
+def rmc_item(tok, n):
+    if n == _utc:
+        return tok.field_int(1, 2)
+    if n == _lat:
+        return nmea_deg_min(tok, 3, 0x53)  # 'S'
+    if n == _lon:
+        return nmea_deg_min(tok, 5, 0x57)  # 'W'
+    if n == _gs:
+        return tok.field_int(7, 1)
+    if n == _crs:
+        return tok.field_int(8, 1)
+    if n == _date:
+        v = tok.field_int(9)  # ddmmyy
+        return 20000000 + (v % 100) * 10000 + (v // 100 % 100) * 100 + v // 10000
+    return 0
+
+def rmc_void(tok):
+    return tok.field_chr(2) != 0x41 or tok.field_len(3) == 0 or tok.field_len(5) == 0  # status not 'A', no position
+
+# $GPGGA,hhmmss.ss,ddmm.mmmm,N,dddmm.mmmm,W,q,nr_sats,hdop,alt,M,geoid,M,age,station
+def gga_item(tok, n):
+    if n == _utc:
+        return tok.field_int(1, 2)
+    if n == _lat:
+        return nmea_deg_min(tok, 2, 0x53)
+    if n == _lon:
+        return nmea_deg_min(tok, 4, 0x57)
+    if n == _hdop:
+        return tok.field_int(8, 1)
+    if n == _alt:
+        return round(tok.field_int(9) * 3.2808)  # altitude in meters to feet
+    return 0
+
+def gga_void(tok):
+    return tok.field_int(6) == 0 or tok.field_len(2) == 0 or tok.field_len(4) == 0  # fix quality 0, no position
+
+# $GPVTG,crs,T,crs_mag,M,gs,N,gs_kmh,K
+def vtg_item(tok, n):
+    if n == _crs:
+        return tok.field_int(1, 1)
+    if n == _gs:
+        return tok.field_int(5, 1)
+    return 0
+
+# $GPGLL,ddmm.mmmm,N,dddmm.mmmm,W,hhmmss.ss,A
+def gll_item(tok, n):
+    if n == _lat:
+        return nmea_deg_min(tok, 1, 0x53)
+    if n == _lon:
+        return nmea_deg_min(tok, 3, 0x57)
+    if n == _utc:
+        return tok.field_int(5, 2)
+    return 0
+
+def gll_void(tok):
+    return tok.field_chr(6) != 0x41 or tok.field_len(1) == 0 or tok.field_len(3) == 0
+
+# $GPGSA,A,3,sv1,...,sv12,pdop,hdop,vdop
+def gsa_item(tok, n):
+    if n == _hdop:
+        return tok.field_int(16, 1)
+    return 0
+
+# $GPZDA,hhmmss.ss,dd,mm,yyyy,zone_h,zone_m
+def zda_item(tok, n):
+    if n == _utc:
+        return tok.field_int(1, 2)
+    if n == _date:
+        return tok.field_int(4) * 10000 + tok.field_int(3) * 100 + tok.field_int(2)
+    return 0
+
+snt_rmc = snt_register(b'GPRMC', 12, (_utc, _lat, _lon, _gs, _crs, _date), rmc_item, rmc_void)  # NMEA 2.3 adds a 13th field (mode)
+snt_gga = snt_register(b'GPGGA', 15, (_utc, _lat, _lon, _hdop, _alt), gga_item, gga_void)
+snt_vtg = snt_register(b'GPVTG', 9, (_crs, _gs), vtg_item)
+snt_gll = snt_register(b'GPGLL', 7, (_lat, _lon, _utc), gll_item, gll_void)
+snt_gsa = snt_register(b'GPGSA', 18, (_hdop,), gsa_item)
+snt_zda = snt_register(b'GPZDA', 7, (_utc, _date), zda_item)
+snt_other = len(snt_ids)  # not registered: skipped by the framer
+snt_names.append("other")
+
@@ -0,0 +1,142 @@
+"""
+    msfs_gps.pipeline -> module
+        @brief
+        The parts between the asyncio tasks of the app: the bounded queue of fixes (msg_queue), the frame pacing
+        of a display (render_governor) and a display with its own queue and governor (display_backend).
+"""
+import asyncio
+from array import array
+from time import monotonic_ns
+from msfs_gps.stats import lat_histogram
+
+"""
+    msg_queue(size) -> class
+        @brief
+        Small bounded FIFO of ints (indexes in fix_pool, or a status frame < -1: see app.render_task())
+        between two asyncio tasks.
+        put() never blocks: when the queue is full the oldest item is dropped (counted in nr_dropped).
+        get() waits until an item is available.
+"""
+class msg_queue:
+    def __init__(self, size):
+        self.size = size
+        self.items = array('h', [0] * size)
+        self.head = 0
+        self.tail = 0
+        self.count = 0
+        self.nr_dropped = 0
+        self.event = asyncio.Event()
+
+    def put(self, v):
+        if self.count == self.size:
+            self.tail = (self.tail + 1) % self.size
+            self.count -= 1
+            self.nr_dropped += 1
+        self.items[self.head] = v
+        self.head = (self.head + 1) % self.size
+        self.count += 1
+        self.event.set()
+
+    async def get(self):
+        while self.count == 0:
+            self.event.clear()
+            await self.event.wait()
+        v = self.items[self.tail]
+        self.tail = (self.tail + 1) % self.size
+        self.count -= 1
+        return v
+
+    def get_nowait(self):
+        # as get(), but returns -1 at once when the queue is empty
+        if self.count == 0:
+            return -1
+        v = self.items[self.tail]
+        self.tail = (self.tail + 1) % self.size
+        self.count -= 1
+        return v
+
+"""
+    render_governor(q, max_fps, rx_busy, tracer, sid) -> class
+        @brief
+        Decides which fix from msg_queue q the render task draws next, and when.
+        next() waits for a fix, keeps at least 1/max_fps seconds between two frames and then takes the newest fix:
+        the fixes it supersedes are not drawn (coalesced). Fixes dropped by a full q count as coalesced too.
+        A predicted fix (dr_slot, see dead_reckoner) never supersedes a real one.
+        Before it returns, next() lets the uart task go first while rx_busy() is True (the uart receive buffer is
+        more than half full): a frame drawn then could make the buffer overrun (counted in nr_overruns_avoided).
+        The waits are traced as spans of stage sid of the span_tracer tracer.
+        Counters: nr_rendered, nr_coalesced (see coalesced()) and nr_overruns_avoided.
+"""
+class render_governor:
+    def __init__(self, q, max_fps, rx_busy=None, tracer=None, sid=0):
+        self.q = q
+        self.rx_busy = rx_busy
+        self.tracer = tracer
+        self.sid = sid
+        self.dr_slot = -1  # the index of the predicted fix. -1 = none
+        self.min_interval = 1000000000 // max_fps  # nSecs
+        self.t_last = 0  # monotonic_ns() of the last frame
+        self.nr_rendered = 0
+        self.nr_coalesced = 0
+        self.nr_overruns_avoided = 0
+
+    async def next(self):
+        p = await self.q.get()
+        if self.t_last:
+            wait = self.min_interval - (monotonic_ns() - self.t_last)
+            if wait > 0:
+                t0 = monotonic_ns()
+                await asyncio.sleep(wait / 1000000000)
+                self.trace(t0, p)
+        if self.rx_busy and self.rx_busy():
+            self.nr_overruns_avoided += 1
+            t0 = monotonic_ns()
+            while self.rx_busy():
+                await asyncio.sleep(0)
+            self.trace(t0, p)
+        n = self.q.get_nowait()
+        while n != -1:  # newer fixes (or status frames) arrived meanwhile: draw only the newest
+            self.nr_coalesced += 1
+            if n != self.dr_slot or p == self.dr_slot:
+                p = n
+            n = self.q.get_nowait()
+        self.nr_rendered += 1
+        self.t_last = monotonic_ns()
+        return p
+
+    def trace(self, t0, p):
+        if self.tracer and self.tracer.on:
+            self.tracer.add(self.sid, t0, monotonic_ns(), p)
+
+    def coalesced(self):
+        return self.nr_coalesced + self.q.nr_dropped
+
+    def pr_stats(self):
+        print("frames rendered: {}, coalesced: {}, uart overruns avoided: {}".format(
+            self.nr_rendered, self.coalesced(), self.nr_overruns_avoided))
+
+"""
+    display_backend(name, renderer, page, q_len, max_fps, rx_busy, tracer, sid) -> class
+        @brief
+        One display of the pipeline: its lcd_renderer, the page it shows (page_nav, page_flight: see msfs_gps.lcd),
+        its own msg_queue q of fixes to draw (q_len) and render_governor (max_fps, rx_busy, tracer, sid).
+        The state task puts each fix in the queue of every display and a render task per display draws it:
+        a display that is slow only coalesces or drops its own frames, and one that raises an I2C error (OSError,
+        e.g. a locked-up serLCD) is skipped for display_retry seconds (nr_errors).
+        lat is the histogram of the time from the reception of a fix until it is on this display (uSecs).
+"""
+class display_backend:
+    def __init__(self, name, renderer, page, q_len, max_fps, rx_busy=None, tracer=None, sid=0):
+        self.name = name
+        self.renderer = renderer
+        self.page = page
+        self.q = msg_queue(q_len)
+        self.governor = render_governor(self.q, max_fps, rx_busy, tracer, sid)
+        self.lat = lat_histogram(name)
+        self.nr_errors = 0
+
+    def pr_stats(self):
+        n, mn, p50, p95, p99, mx = self.lat.summary()
+        print("{}: frames {}, coalesced {}, errors {}. rx -> lcd (mSecs) p50 {:.2f} p99 {:.2f} max {:.2f}".format(
+            self.name, self.governor.nr_rendered, self.governor.coalesced(), self.nr_errors,
+            p50 / 1000, p99 / 1000, mx / 1000))
@@ -0,0 +1,87 @@
+"""
+    msfs_gps.rx -> module
+        @brief
+        Overrun detection of the uart receive side (rx_monitor).
+"""
+"""
+    rx_monitor(budget, hold, reader) -> class
+        @brief
+        Overrun detection and adaptive sizing of the uart receive buffer and read chunk.
+        An overrun shows as sentences cut off by the next '$' (framer.nr_cut) and bursts that miss a sentence type
+        (reader.lost(), see burst_reader). Line noise causes these too, and checksum failures (framer.nr_bad,
+        left out here), but without filling the receive buffer. So the uart task calls fill(in_waiting) before
+        each read, and a loss counts as an overrun only when the buffer was at least 3/4 full (nr_full) since the
+        previous check. Other losses are counted in nr_line_losses.
+        check(t), for each burst (the parse task), sees whether the losses went up since the previous check (nr_overruns).
+        Then it asks for a buffer and chunk of twice the size (want_rx, want_chunk), together at most budget bytes
+        and at most once per hold seconds. The uart task re-creates the uart with them while the line is quiet
+        and calls grown().
+        set_sizes(rx_len, chunk_len) tells the sizes of the uart in use (rx_len, chunk_len).
+        Counters: nr_overruns, nr_line_losses, nr_full, nr_grown and, in the framer, nr_lost_bytes.
+"""
+class rx_monitor:
+    def __init__(self, budget, hold, reader):
+        self.budget = budget
+        self.hold = int(hold * 1000000000)
+        self.reader = reader
+        self.framer = reader.framer
+        self.rx_len = 0
+        self.chunk_len = 0
+        self.nr_grown = 0
+        self.reset()
+
+    def reset(self):
+        # after framer.clear_stats()
+        self.last = 0     # events at the previous check
+        self.t_grow = 0   # monotonic_ns() of the last growth
+        self.want_rx = 0
+        self.want_chunk = 0
+        self.full = False  # the receive buffer was 3/4 full since the previous check
+        self.nr_full = 0
+        self.nr_overruns = 0
+        self.nr_line_losses = 0
+
+    def set_sizes(self, rx_len, chunk_len):
+        self.rx_len = rx_len
+        self.chunk_len = chunk_len
+
+    def fill(self, n):
+        # n: the bytes in the receive buffer (uart.in_waiting), before a read
+        if n >= self.rx_len - (self.rx_len >> 2):
+            self.full = True
+            self.nr_full += 1
+
+    def events(self):
+        return self.framer.nr_cut + self.reader.lost()
+
+    def check(self, t):
+        n = self.events()
+        full = self.full
+        self.full = False
+        if n <= self.last:
+            return
+        d = n - self.last
+        self.last = n
+        if not full:  # the buffer had room: the line, not an overrun
+            self.nr_line_losses += d
+            return
+        self.nr_overruns += d
+        if self.want_rx or (self.t_grow and t - self.t_grow < self.hold):
+            return
+        rx = self.rx_len * 2
+        chunk = max(self.chunk_len, min(self.chunk_len * 2, rx // 2))
+        if rx + chunk > self.budget:
+            rx = self.budget - chunk
+        if rx > self.rx_len:
+            self.want_rx = rx
+            self.want_chunk = chunk
+
+    def grown(self, t):
+        self.want_rx = 0
+        self.want_chunk = 0
+        self.t_grow = t
+        self.nr_grown += 1
+
+    def pr_stats(self):
+        print("uart: receive buffer {} bytes, read chunk {} bytes (grown {} times). Overruns: {}, line losses: {}, fixes lost: {}".format(
+            self.rx_len, self.chunk_len, self.nr_grown, self.nr_overruns, self.nr_line_losses, self.reader.lost()))
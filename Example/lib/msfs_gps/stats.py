@@ -0,0 +1,228 @@
+"""
+    msfs_gps.stats -> module
+        @brief
+        Instrumentation with a fixed memory footprint: latency histograms (lat_histogram), heap use per stage
+        (heap_stats) and a ring of spans (span_tracer).
+"""
+import gc
+from array import array
+from time import monotonic_ns
+
+"""
+    lat_histogram(name, nr_buckets) -> class
+        @brief
+        Latency histogram with a fixed memory footprint: one preallocated array of counters.
+        add(us) counts a duration in microseconds in a log bucket: 4 buckets per power of 2
+        (at most 25% wide), so 104 buckets cover 0 us to over 2 minutes. Longer durations go in the last bucket.
+        Nothing is allocated after creation and nothing is ever thrown away: the histogram runs for a whole flight.
+        percentile(p) returns the upper edge of the bucket that holds the p-th percentile,
+        bounded by the exact min and max. summary() returns (n, min, p50, p95, p99, max).
+"""
+class lat_histogram:
+    def __init__(self, name, nr_buckets=104):
+        self.name = name
+        self.nr_buckets = nr_buckets
+        self.counts = array('L', [0] * nr_buckets)
+        self.reset()
+
+    def reset(self):
+        for i in range(self.nr_buckets):
+            self.counts[i] = 0
+        self.n = 0
+        self.min = 0
+        self.max = 0
+
+    def bucket(self, v):
+        if v < 4:
+            return v if v > 0 else 0
+        e = 2  # v has e+1 bits
+        while v >> (e + 1):
+            e += 1
+        i = 4 * (e - 1) + ((v >> (e - 2)) & 3)
+        return i if i < self.nr_buckets else self.nr_buckets - 1
+
+    def upper(self, i):
+        # highest value that goes in bucket i
+        if i < 4:
+            return i
+        e = i // 4 + 1
+        return ((4 + i % 4 + 1) << (e - 2)) - 1
+
+    def add(self, us):
+        self.counts[self.bucket(us)] += 1
+        if self.n == 0 or us < self.min:
+            self.min = us
+        if us > self.max:
+            self.max = us
+        self.n += 1
+
+    def add_since(self, t0):
+        # adds the time since monotonic_ns() t0
+        self.add((monotonic_ns() - t0) // 1000)
+
+    def percentile(self, p):
+        if self.n == 0:
+            return 0
+        rank = (self.n * p + 99) // 100  # nr of values at or below the percentile
+        cnt = 0
+        for i in range(self.nr_buckets):
+            cnt += self.counts[i]
+            if cnt >= rank:
+                v = self.upper(i)
+                return self.min if v < self.min else self.max if v > self.max else v
+        return self.max
+
+    def summary(self):
+        return (self.n, self.min, self.percentile(50), self.percentile(95), self.percentile(99), self.max)
+
+"""
+    heap_stats(names) -> class
+        @brief
+        Heap instrumentation per stage (names: a tuple with the name of each stage).
+        start(st) and stop(st) are called around each call of stage st. stop() adds the growth of gc.mem_alloc()
+        to the stage's rolling total. When the heap use went down during the stage, a garbage collection ran:
+        it is counted and the allocation of that call is unknown (not added).
+        On a host build (CPython: no gc.mem_alloc()) tracemalloc is used instead: the growth of the peak of the
+        traced memory during the call, and the collections counted by a gc callback.
+        A stage that awaits (lcd_pr_msgs()) includes what the other tasks allocate meanwhile.
+        report() prints the rolling totals since the previous report (and since the start) and starts a new period.
+        The counters are preallocated arrays: the instrumentation itself does not allocate on CircuitPython.
+"""
+class heap_stats:
+    def __init__(self, names):
+        self.names = names
+        n = len(names)
+        self.m0 = array('L', [0] * n)        # heap use at start() of each stage
+        self.g0 = array('L', [0] * n)        # host: nr_collections at start()
+        self.calls = array('L', [0] * n)     # since the previous report
+        self.alloc = array('L', [0] * n)     # idem: bytes
+        self.nr_gc = array('L', [0] * n)     # idem: collections
+        self.calls_total = array('L', [0] * n)
+        self.alloc_total = array('L', [0] * n)
+        self.nr_gc_total = array('L', [0] * n)
+        self.host = not hasattr(gc, 'mem_alloc')
+        self.tracemalloc = None
+        self.nr_collections = 0
+
+    def enable(self):
+        # on a host build: start tracemalloc and count the collections
+        if self.host and self.tracemalloc is None:
+            import tracemalloc
+            self.tracemalloc = tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            gc.callbacks.append(self.gc_callback)
+
+    def gc_callback(self, phase, info):
+        if phase == 'stop':
+            self.nr_collections += 1
+
+    def start(self, st):
+        if self.host:
+            self.tracemalloc.reset_peak()
+            self.m0[st] = self.tracemalloc.get_traced_memory()[0]
+            self.g0[st] = self.nr_collections
+        else:
+            self.m0[st] = gc.mem_alloc()
+
+    def stop(self, st):
+        self.calls[st] += 1
+        if self.host:
+            d = self.tracemalloc.get_traced_memory()[1] - self.m0[st]
+            self.nr_gc[st] += self.nr_collections - self.g0[st]
+        else:
+            d = gc.mem_alloc() - self.m0[st]
+            if d < 0:
+                self.nr_gc[st] += 1
+                d = 0
+        if d > 0:
+            self.alloc[st] += d
+
+    def report(self):
+        print("Heap (bytes)   calls    alloc  per call   gc |  calls    alloc   gc (since start)")
+        for st in range(len(self.names)):
+            self.calls_total[st] += self.calls[st]
+            self.alloc_total[st] += self.alloc[st]
+            self.nr_gc_total[st] += self.nr_gc[st]
+            print("{:<12s} {:>7d} {:>8d} {:>9d} {:>4d} | {:>6d} {:>8d} {:>4d}".format(
+                self.names[st], self.calls[st], self.alloc[st], self.alloc[st] // self.calls[st] if self.calls[st] else 0,
+                self.nr_gc[st], self.calls_total[st], self.alloc_total[st], self.nr_gc_total[st]))
+            self.calls[st] = 0
+            self.alloc[st] = 0
+            self.nr_gc[st] = 0
+        if not self.host:
+            print("mem_free: {}, mem_alloc: {}".format(gc.mem_free(), gc.mem_alloc()))
+
+"""
+    span_tracer(names, size) -> class
+        @brief
+        Records spans: (stage id, start, end, arg) in a preallocated ring of size entries.
+        names holds the name of each stage as 'task/step', e.g. 'parse_task/ck_uart'.
+        start and end are in microseconds since t_base (set by app.loop()); arg is a small int (e.g. an index in fix_pool).
+        Spans are added with add(sid, t0, t1, arg) (t0 and t1 from monotonic_ns()), or with a context manager:
+            with tracer.span(sid, arg):
+                ...
+        span() returns the preallocated trace_span of the stage: no allocation per span. So two spans of one stage
+        may not overlap: a span around an await, in a task that runs more than once (e.g. a render task per display),
+        takes t0 itself and calls add().
+        Nothing is recorded while on is False. When the ring is full the oldest spans are overwritten.
+        dump() prints the ring to REPL as 'TRACE sid start end arg' lines, after a 'TRACE_STAGES' line with the names.
+"""
+class span_tracer:
+    def __init__(self, names, size=512):
+        self.names = names
+        self.size = size
+        self.ids = array('B', [0] * size)
+        self.t0 = array('q', [0] * size)
+        self.t1 = array('q', [0] * size)
+        self.args = array('h', [0] * size)
+        self.head = 0
+        self.count = 0
+        self.on = False
+        self.t_base = monotonic_ns()
+        spans = []
+        for sid in range(len(names)):
+            spans.append(trace_span(self, sid))
+        self.spans = tuple(spans)
+
+    def span(self, sid, arg=0):
+        sp = self.spans[sid]
+        sp.arg = arg
+        return sp
+
+    def add(self, sid, t0, t1, arg=0):
+        i = self.head
+        self.ids[i] = sid
+        self.t0[i] = (t0 - self.t_base) // 1000
+        self.t1[i] = (t1 - self.t_base) // 1000
+        self.args[i] = arg
+        self.head = (i + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def dump(self):
+        print("TRACE_STAGES " + ",".join(self.names))
+        i = (self.head - self.count) % self.size
+        for _ in range(self.count):
+            print("TRACE {} {} {} {}".format(self.ids[i], self.t0[i], self.t1[i], self.args[i]))
+            i = (i + 1) % self.size
+
+class trace_span:
+    __slots__ = ('tracer', 'sid', 'arg', 't0')
+
+    def __init__(self, tracer, sid):
+        self.tracer = tracer
+        self.sid = sid
+        self.arg = 0
+        self.t0 = 0
+
+    def __enter__(self):
+        if self.tracer.on:
+            self.t0 = monotonic_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if self.tracer.on:
+            self.tracer.add(self.sid, self.t0, monotonic_ns(), self.arg)
+        return False
+
@@ -0,0 +1,159 @@
+"""
+    msfs_gps.track -> module
+        @brief
+        The flight track recorder (track_recorder) and the record format of its file.
+"""
+import os
+import struct
+import asyncio
+from msfs_gps.nmea import _utc, _lat, _lon, _gs, _crs, _alt, _date
+
+# Record of the track file: date (yyyymmdd), utc (hhmmssss), lat, lon (1/10000 minutes),
+# gs (1/10 kts), crs (1/10 degrees), alt (feet). See gps_fix. The file starts with track_magic + the record length
+track_fmt = "<IIiiHHi"
+track_rec_len = struct.calcsize(track_fmt)  # 24
+track_magic = b'TRK1'
+_u32 = 0xFFFFFFFF
+_i32 = 0x7FFFFFFF
+
+def track_clamp(v, lo, hi):
+    return lo if v < lo else hi if v > hi else v
+
+"""
+    track_recorder(path, page_len, flush_interval, max_len) -> class
+        @brief
+        Flight track recorder. add(fix) packs the fix with struct.pack_into() into the active one of two
+        preallocated RAM pages: no flash access and no allocation. Each item is brought within its field
+        (the course to 0..359.9 degrees, the others clamped), so a sentence with a valid checksum but a course
+        of -3.0 or a speed of 7000.0 kts does not make add() raise.
+        A page is written to the file (appended) when it is full, or when flush_interval seconds have passed
+        since the last write. The writing is done by run(), an asyncio task, in chunks of track_write_chunk bytes
+        with an await in between, so the uart task keeps running. While one page is written, add() fills the other.
+        When both are full, records are dropped (nr_dropped). Each write opens and closes the file:
+        at most flush_interval seconds of track are lost at a power cut.
+        close() writes what is left at once (at Ctrl-C). When run() was stopped in the middle of a page, close()
+        closes its file and appends only the part of the page that was not written yet (written).
+        Counters: nr_records, nr_flushes, nr_dropped and nr_errors (e.g. a read-only filesystem: see boot.py).
+"""
+track_write_chunk = 512
+
+class track_recorder:
+    def __init__(self, path, page_len=4096, flush_interval=60, max_len=4000000):
+        self.path = path
+        self.page_len = page_len - page_len % track_rec_len
+        self.flush_interval = flush_interval
+        self.max_len = max_len
+        self.pages = (bytearray(self.page_len), bytearray(self.page_len))
+        self.mvs = (memoryview(self.pages[0]), memoryview(self.pages[1]))
+        self.active = 0   # page that add() fills
+        self.pos = 0      # bytes in the active page
+        self.full = -1    # page waiting to be written. -1 = none
+        self.full_len = 0
+        self.written = 0  # bytes of the full page that run() has written
+        self.f = None     # the file that run() is writing to
+        self.t_flush = 0  # nr of run() ticks since the last write
+        self.nr_records = 0
+        self.nr_flushes = 0
+        self.nr_dropped = 0
+        self.nr_errors = 0
+        self.stopped = False
+
+    def add(self, fix):
+        if self.pos + track_rec_len > self.page_len and not self.swap():
+            self.nr_dropped += 1
+            return
+        struct.pack_into(track_fmt, self.pages[self.active], self.pos,
+                         track_clamp(fix.read(_date), 0, _u32), track_clamp(fix.read(_utc), 0, _u32),
+                         track_clamp(fix.read(_lat), -_i32, _i32), track_clamp(fix.read(_lon), -_i32, _i32),
+                         track_clamp(fix.read(_gs), 0, 0xFFFF), fix.read(_crs) % 3600,
+                         track_clamp(fix.read(_alt), -_i32, _i32))
+        self.pos += track_rec_len
+        self.nr_records += 1
+
+    def swap(self):
+        # hand the active page over to run(). False if the other page has not been written yet
+        if self.full >= 0:
+            return False
+        self.full = self.active
+        self.full_len = self.pos
+        self.active ^= 1
+        self.pos = 0
+        return True
+
+    def open(self):
+        # open path to append. Returns None when the file is full or cannot be written
+        if self.stopped:
+            return None
+        try:
+            size = os.stat(self.path)[6]
+        except OSError:
+            size = 0
+        if size + self.full_len > self.max_len:
+            print("track_recorder: {} has reached {} bytes. Recording stopped".format(self.path, size))
+            self.stopped = True
+            return None
+        try:
+            f = open(self.path, "ab")
+            if size == 0:
+                f.write(track_magic + struct.pack("<HH", track_rec_len, 0))
+            return f
+        except OSError as e:
+            self.nr_errors += 1
+            print("track_recorder: cannot write {}: {}".format(self.path, e))
+            return None
+
+    def done(self):
+        self.full = -1
+        self.written = 0
+        self.t_flush = 0
+        self.nr_flushes += 1
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(1)
+            self.t_flush += 1
+            if self.full < 0 and self.pos > 0 and self.t_flush >= self.flush_interval:
+                self.swap()
+            if self.full >= 0:
+                f = self.open()
+                if f:
+                    self.f = f
+                    mv = self.mvs[self.full]
+                    try:
+                        for i in range(0, self.full_len, track_write_chunk):
+                            end = min(i + track_write_chunk, self.full_len)
+                            f.write(mv[i:end])
+                            self.written = end
+                            await asyncio.sleep(0)
+                    except OSError:
+                        self.nr_errors += 1
+                    self.f = None
+                    f.close()
+                self.done()
+
+    def close(self):
+        if self.f:  # run() was stopped while writing: what it wrote is in this file
+            try:
+                self.f.close()
+            except OSError:
+                self.nr_errors += 1
+            self.f = None
+        for _ in range(2):
+            if self.full < 0 and not self.swap():
+                break
+            if self.full_len > self.written:
+                f = self.open()
+                if f:
+                    try:
+                        f.write(self.mvs[self.full][self.written:self.full_len])
+                    except OSError:
+                        self.nr_errors += 1
+                    f.close()
+            self.done()
+            if self.pos == 0:
+                break
+
+    def pr_stats(self):
+        print("track: {} records, {} page writes, {} dropped, {} errors".format(
+            self.nr_records, self.nr_flushes, self.nr_dropped, self.nr_errors))
+
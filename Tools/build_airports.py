@@ -0,0 +1,125 @@
+"""
+    build_airports.py -> host tool (CPython)
+        @brief
+        Builds the airport file that Example/code.py reads when use_airports is True (see airport_index):
+        copy the output to the CIRCUITPY drive as /airports.bin.
+        Input: a CSV with the columns of the OurAirports airports.csv (ident, type, latitude_deg, longitude_deg;
+        gps_code and icao_code are used when ident is not a 4 letter code).
+        The airports are bucketed in a grid of --cell degrees. File layout (little endian):
+            header       magic 'APT1', cell size (1/100 degrees), nr of rows, nr of columns,
+                         max records per cell, nr of non-empty cells          (apt_head_fmt)
+            row table    nr of rows + 1 uint32: index of the first directory entry of each row
+            directory    per non-empty cell, by row and column: column, file offset, nr of records (apt_dir_fmt)
+            records      per airport: lat, lon in 1/10000 minutes, ICAO code (apt_rec_fmt)
+        A cell holds at most --max-per-cell airports (the device preallocates a buffer of that size per cached cell):
+        larger airports are kept first.
+        --synthetic n writes n random airports instead (to check that the lookup time does not depend on the size).
+
+    Usage: python Tools/build_airports.py airports.csv [-o airports.bin] [--cell deg] [--max-per-cell n]
+                                          [--types large_airport,medium_airport,small_airport]
+           python Tools/build_airports.py --synthetic n [-o airports.bin] [--seed n]
+"""
+import argparse
+import csv
+import random
+import struct
+import sys
+
+apt_magic = b'APT1'         # as in Example/lib/msfs_gps/airports.py
+apt_head_fmt = "<4sHHHHI"
+apt_dir_fmt = "<HIH"
+apt_rec_fmt = "<ii4s"
+default_types = "large_airport,medium_airport,small_airport"
+
+def icao_code(row):
+    for k in ("ident", "icao_code", "gps_code"):
+        v = (row.get(k) or "").strip().upper()
+        if len(v) == 4 and v.isalnum():
+            return v
+    return None
+
+def read_csv(path, types):
+    # yields (rank, lat, lon, ident). rank: the place of the type in types (larger airports first)
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            t = row.get("type", "")
+            if t not in types:
+                continue
+            ident = icao_code(row)
+            if not ident:
+                continue
+            try:
+                lat = float(row["latitude_deg"])
+                lon = float(row["longitude_deg"])
+            except (KeyError, ValueError):
+                continue
+            yield types.index(t), lat, lon, ident
+
+def synthetic(n, seed):
+    rnd = random.Random(seed)
+    for i in range(n):
+        ident = ""
+        for _ in range(4):
+            ident = chr(0x41 + i % 26) + ident
+            i //= 26
+        yield rnd.randrange(3), rnd.uniform(-60, 75), rnd.uniform(-180, 180), ident
+
+def build(airports, cell_size=100, max_per_cell=64):
+    # airports: (rank, lat, lon, ident). Returns (bytes, nr of airports, nr of cells, nr dropped)
+    nr_rows = 18000 // cell_size
+    nr_cols = 36000 // cell_size
+    cells = {}
+    for rank, lat, lon, ident in airports:
+        row = min(nr_rows - 1, int((lat + 90) * 100) // cell_size)
+        col = int((lon + 180) * 100) // cell_size % nr_cols
+        cells.setdefault((row, col), []).append((rank, int(round(lat * 600000)), int(round(lon * 600000)), ident))
+    keys = sorted(cells)
+    head_len = struct.calcsize(apt_head_fmt)
+    dir_len = struct.calcsize(apt_dir_fmt)
+    offset = head_len + (nr_rows + 1) * 4 + len(keys) * dir_len
+    rows = [0] * (nr_rows + 1)
+    directory = bytearray()
+    records = bytearray()
+    nr = nr_dropped = 0
+    for i, (row, col) in enumerate(keys):
+        lst = sorted(cells[(row, col)], key=lambda a: a[0])
+        nr_dropped += max(0, len(lst) - max_per_cell)
+        lst = lst[:max_per_cell]
+        rows[row + 1] = i + 1  # made cumulative below
+        directory += struct.pack(apt_dir_fmt, col, offset + len(records), len(lst))
+        for _, lat, lon, ident in lst:
+            records += struct.pack(apt_rec_fmt, lat, lon, ident.encode("ascii"))
+        nr += len(lst)
+    for r in range(1, nr_rows + 1):
+        rows[r] = max(rows[r], rows[r - 1])
+    data = struct.pack(apt_head_fmt, apt_magic, cell_size, nr_rows, nr_cols, max_per_cell, len(keys))
+    data += struct.pack("<{}I".format(nr_rows + 1), *rows) + directory + records
+    return data, nr, len(keys), nr_dropped
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("csv", nargs="?")
+    ap.add_argument("-o", "--output", default="airports.bin")
+    ap.add_argument("--cell", type=float, default=1.0)
+    ap.add_argument("--max-per-cell", type=int, default=64)
+    ap.add_argument("--types", default=default_types)
+    ap.add_argument("--synthetic", type=int, default=0)
+    ap.add_argument("--seed", type=int, default=2022)
+    args = ap.parse_args()
+    cell_size = int(round(args.cell * 100))
+    if cell_size <= 0 or 18000 % cell_size or 36000 % cell_size:
+        sys.exit("--cell must divide 180 degrees (e.g. 0.5, 1, 2)")
+    if args.synthetic:
+        airports = synthetic(args.synthetic, args.seed)
+    elif args.csv:
+        airports = read_csv(args.csv, args.types.split(","))
+    else:
+        sys.exit("no airports.csv given (or --synthetic n)")
+    data, nr, nr_cells, nr_dropped = build(airports, cell_size, args.max_per_cell)
+    with open(args.output, "wb") as f:
+        f.write(data)
+    print("{} airports in {} cells ({} dropped: more than {} in a cell), {} bytes written to {}".format(
+        nr, nr_cells, nr_dropped, args.max_per_cell, len(data), args.output))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""
+    Host stand-in for the 'adafruit_dotstar' library.
+"""
+class DotStar:
+    def __init__(self, clock, data, n, brightness=1.0, auto_write=True):
+        self.pixels = [(0, 0, 0)] * n
+
+    def __setitem__(self, i, v):
+        self.pixels[i] = v
+
+    def __getitem__(self, i):
+        return self.pixels[i]
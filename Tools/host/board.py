@@ -0,0 +1,26 @@
+"""
+    Host stand-in for the CircuitPython 'board' module of an Unexpected Maker FeatherS2.
+    Only what msfs_gps.adapters uses is defined.
+"""
+board_id = 'unexpectedmaker_feathers2'
+
+TX = 'TX'
+RX = 'RX'
+APA102_SCK = 'APA102_SCK'
+APA102_MOSI = 'APA102_MOSI'
+
+class _I2C:
+    def try_lock(self):
+        return True
+
+    def unlock(self):
+        pass
+
+    def scan(self):
+        return [0x72]
+
+def STEMMA_I2C():
+    return _I2C()
+
+def I2C():
+    return _I2C()
@@ -0,0 +1,160 @@
+"""
+    Host stand-in for the CircuitPython 'busio' module.
+    busio.UART replays a recorded NMEA capture (see load_capture()) as sent at the feed's baudrate.
+
+    The capture is split in bursts: all sentences with the same UTC time field are sent
+    back-to-back, one burst every 'period' seconds, like FSUIPC7 GPS Out does.
+    Inside a burst the bytes arrive at baudrate / 10 bytes per second.
+    A UART opened at another baudrate than the feed receives garbage: every byte is replaced
+    by a fixed, per-baudrate, random byte (a crude model of the framing errors on the line).
+    The capture runs on one clock for all UARTs: a UART created later (e.g. after a baudrate change)
+    only receives the bytes that arrive after it was opened.
+    At host_clock.speed 0 (as fast as possible) the whole capture has arrived at once: a UART created later
+    receives the bytes that no UART at the feed's baudrate has read yet, and reset_input_buffer() drops nothing.
+    Like the CircuitPython uart, the receiver buffer holds receiver_buffer_size bytes:
+    bytes arriving while it is full are lost (counted in UART.nr_lost).
+    When the whole capture has been read (and end_grace seconds have passed),
+    readinto() raises KeyboardInterrupt, which ends app.loop() as a Ctrl-C does.
+"""
+import bisect
+import random
+import host_clock
+
+_capture = b''
+_baudrate = 4800    # baudrate of the feed
+_t0 = None          # host_clock.monotonic() at which the capture started
+_bursts = []        # (start time in seconds, offset in _capture, length)
+_burst_starts = []
+_end_grace = 2.0
+_taken = 0          # speed 0: offset in _capture of the first byte not yet read by a UART at the feed's baudrate
+uarts = []          # all UART instances created, for the replay report
+
+def _utc_of(line):
+    f = line.split(b',', 2)
+    if len(f) > 2 and f[0][3:] in (b'RMC', b'GGA', b'GLL', b'ZDA'):
+        return f[1]
+    return None
+
+def load_capture(data, period=1.0, end_grace=2.0, baudrate=4800):
+    global _capture, _bursts, _burst_starts, _end_grace, _baudrate, _t0, _taken
+    _capture = bytes(data)
+    _taken = 0
+    _baudrate = baudrate
+    _t0 = None
+    _bursts = []
+    _end_grace = end_grace
+    utc = None
+    ofs = 0
+    for line in _capture.splitlines(keepends=True):
+        t = _utc_of(line)
+        if not _bursts or (t is not None and utc is not None and t != utc):
+            _bursts.append([len(_bursts) * period, ofs, 0])
+        if t is not None:
+            utc = t
+        _bursts[-1][2] += len(line)
+        ofs += len(line)
+    _burst_starts = [b[0] for b in _bursts]
+
+class UART:
+    def __init__(self, tx, rx, baudrate=9600, bits=8, parity=None, stop=1, timeout=1,
+                 receiver_buffer_size=64):
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.receiver_buffer_size = receiver_buffer_size
+        self._rx = bytearray()
+        self._next = 0 if _t0 is None else None  # offset in _capture of the next byte to arrive. None: see _receive()
+        if host_clock.speed <= 0:
+            self._next = _taken
+        self._garble = None
+        if baudrate != _baudrate:
+            table = list(range(256))
+            random.Random(baudrate).shuffle(table)
+            self._garble = bytes(table)
+        self.nr_lost = 0        # bytes lost because the receiver buffer was full
+        self.nr_read = 0
+        uarts.append(self)
+
+    def deinit(self):
+        if self in uarts:
+            uarts.remove(self)
+
+    def _elapsed(self):
+        global _t0
+        if _t0 is None:
+            _t0 = host_clock.monotonic()
+        if host_clock.speed <= 0:
+            return float('inf')
+        return (host_clock.monotonic() - _t0) * host_clock.speed
+
+    def _arrived(self, t):
+        # offset in _capture up to which the bytes have arrived at time t
+        i = bisect.bisect_right(_burst_starts, t) - 1
+        if i < 0:
+            return 0
+        start, ofs, le = _bursts[i]
+        n = int((t - start) * _baudrate / 10)
+        return ofs + min(le, n)
+
+    def _receive(self):
+        t = self._elapsed()
+        arrived = len(_capture) if t == float('inf') else self._arrived(t)
+        if self._next is None:
+            self._next = arrived  # opened while the capture runs
+        if arrived > self._next:
+            if host_clock.speed <= 0:
+                # as fast as possible: do not simulate overruns
+                n = arrived - self._next
+            else:
+                room = self.receiver_buffer_size - len(self._rx)
+                n = max(0, min(room, arrived - self._next))
+                self.nr_lost += arrived - self._next - n
+            data = _capture[self._next:self._next + n]
+            if self._garble:
+                data = data.translate(self._garble)
+            self._rx += data
+            self._next = arrived
+        if not self._rx and self._next >= len(_capture):
+            if t == float('inf'):
+                if not self._garble:  # (a UART at another baudrate, e.g. while detecting it, does not end the replay)
+                    raise KeyboardInterrupt  # end of the capture
+            elif t > _bursts[-1][0] + _end_grace:
+                raise KeyboardInterrupt  # end of the capture
+
+    def _taken_up_to(self):
+        global _taken
+        if host_clock.speed <= 0 and not self._garble:
+            _taken = self._next - len(self._rx)
+
+    @property
+    def in_waiting(self):
+        self._receive()
+        return len(self._rx)
+
+    def readinto(self, buf, nbytes=None):
+        self._receive()
+        n = min(len(buf) if nbytes is None else nbytes, len(self._rx))
+        if n == 0:
+            return None
+        buf[:n] = self._rx[:n]
+        del self._rx[:n]
+        self.nr_read += n
+        self._taken_up_to()
+        return n
+
+    def read(self, nbytes=None):
+        self._receive()
+        if not self._rx:
+            return None
+        n = len(self._rx) if nbytes is None else min(nbytes, len(self._rx))
+        data = bytes(self._rx[:n])
+        del self._rx[:n]
+        self.nr_read += n
+        self._taken_up_to()
+        return data
+
+    def reset_input_buffer(self):
+        if host_clock.speed <= 0:
+            # as fast as possible: the whole capture has arrived at once, there is nothing stale to drop
+            return
+        self._receive()
+        self._rx = bytearray()
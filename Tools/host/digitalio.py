@@ -0,0 +1,3 @@
+"""
+    Host stand-in for the CircuitPython 'digitalio' module (not used by msfs_gps).
+"""
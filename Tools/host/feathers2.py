@@ -0,0 +1,21 @@
+"""
+    Host stand-in for the Unexpected Maker 'feathers2' helper library.
+    led_changes counts the changes of the built-in blue led.
+"""
+led_state = 0
+led_changes = 0
+
+def enable_LDO2(state):
+    pass
+
+def led_set(state):
+    global led_state, led_changes
+    if state != led_state:
+        led_changes += 1
+    led_state = state
+
+def led_blink():
+    led_set(0 if led_state else 1)
+
+def dotstar_color_wheel(wheel_pos):
+    return 0, 0, 0
@@ -0,0 +1,24 @@
+"""
+    host_clock -> module
+        @brief
+        Shared time base of the host stand-in modules (see replay.py).
+        speed > 1 replays a capture faster than real time: sleep() and the
+        simulated uart/i2c transfer times are divided by speed.
+        speed 0 means 'as fast as possible': sleep() returns at once.
+        monotonic_ns() is the clock of the replayed device: the host clock multiplied by speed.
+"""
+import time
+
+speed = 1.0
+
+def sleep(s):
+    if speed > 0 and s > 0:
+        time.sleep(s / speed)
+
+def monotonic():
+    return time.monotonic()
+
+def monotonic_ns():
+    if speed > 0:
+        return int(time.monotonic() * speed * 1e9)
+    return time.monotonic_ns()
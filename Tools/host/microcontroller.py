@@ -0,0 +1,9 @@
+"""
+    Host stand-in for the CircuitPython 'microcontroller' module.
+"""
+class _cpu:
+    uid = bytearray(b'\x07\xfd\x1a\x01\xa3\xe0\x00\x00')
+    frequency = 240000000
+
+cpu = _cpu()
+nvm = bytearray(8192)  # all 0: nothing stored (see baud_order() in msfs_gps/app.py)
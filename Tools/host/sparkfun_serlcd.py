@@ -0,0 +1,133 @@
+"""
+    Host stand-in for the 'sparkfun_serlcd' library (Sparkfun_SerLCD_I2C).
+    The public methods send the same bytes, with the same sleeps, as the real library.
+    _write_bytes() does not go to a bus: it interprets the bytes on a 4x20 'glass'
+    and counts the i2c traffic:
+        nr_bytes   bytes written
+        nr_writes  i2c write transactions
+        nr_moves   cursor moves (set_cursor() or an inline 0xFE 0x80|addr command)
+        nr_clears  clear commands
+    Each write also takes the time the bytes need on the bus (i2c_hz, ~9 bits per byte),
+    so the replay latencies include the cost of the lcd traffic.
+    A locked-up display is simulated with fail_writes = (first, last): those i2c writes (counted from 1)
+    raise OSError, as busio does when the serLCD does not acknowledge (nr_failed).
+"""
+import host_clock
+
+i2c_hz = 100000
+displays = []   # all instances created, for the replay report
+
+_SETTING_COMMAND = 0x7C
+_SPECIAL_COMMAND = 0xFE
+_CLEAR_COMMAND = 0x2D
+_LCD_SETDDRAMADDR = 0x80
+_ROW_OFFSETS = (0x00, 0x40, 0x14, 0x54)
+_MAX_ROWS = 4
+_MAX_COLS = 20
+
+class Sparkfun_SerLCD_I2C:
+    def __init__(self, i2c, address=0x72):
+        self.address = address
+        self.glass = [bytearray(b' ' * _MAX_COLS) for _ in range(_MAX_ROWS)]
+        self.col = 0
+        self.row = 0
+        self.backlight = None
+        self.nr_bytes = 0
+        self.nr_writes = 0
+        self.nr_moves = 0
+        self.nr_clears = 0
+        self.fail_writes = None
+        self.nr_failed = 0
+        displays.append(self)
+        self._write_bytes(bytearray((_SPECIAL_COMMAND, 0x0C, _SPECIAL_COMMAND, 0x06,
+                                     _SETTING_COMMAND, _CLEAR_COMMAND)))
+        host_clock.sleep(0.050)
+
+    # --- public api used by msfs_gps ---
+    def command(self, command):
+        self._write_bytes(bytearray((_SETTING_COMMAND, command & 0xFF)))
+        host_clock.sleep(0.010)
+
+    def clear(self):
+        self.command(_CLEAR_COMMAND)
+
+    def write(self, message):
+        self._write_bytes(str(message).encode())
+
+    def set_cursor(self, col, row):
+        row = min(max(0, row), _MAX_ROWS - 1)
+        self._special_command(_LCD_SETDDRAMADDR | (col + _ROW_OFFSETS[row]))
+
+    def set_backlight(self, rgb):
+        self.backlight = rgb
+
+    def set_backlight_rgb(self, red, green, blue):
+        self.backlight = (red, green, blue)
+
+    def system_messages(self, enable):
+        pass
+
+    def set_contrast(self, value):
+        pass
+
+    def cursor(self, value):
+        pass
+
+    def blink(self, value):
+        pass
+
+    def display(self, value):
+        pass
+
+    def _special_command(self, command, count=1):
+        data = bytearray((_SPECIAL_COMMAND,))
+        for _ in range(count):
+            data.append(command & 0xFF)
+        self._write_bytes(data)
+        host_clock.sleep(0.050)  # like the real library
+
+    def _put_char(self, char):
+        self._write_bytes(bytearray((char & 0xFF,)))
+
+    def _write_bytes(self, data):
+        data = bytes(data)
+        self.nr_writes += 1
+        if self.fail_writes and self.fail_writes[0] <= self.nr_writes <= self.fail_writes[1]:
+            self.nr_failed += 1
+            raise OSError(19, "No such device")  # (errno.ENODEV)
+        self.nr_bytes += len(data)
+        host_clock.sleep((len(data) + 1) * 9 / i2c_hz)  # + 1: the address byte
+        i = 0
+        while i < len(data):
+            b = data[i]
+            if b == _SPECIAL_COMMAND and i + 1 < len(data):
+                cmd = data[i + 1]
+                if cmd & _LCD_SETDDRAMADDR:
+                    self._set_addr(cmd & 0x7F)
+                i += 2
+                continue
+            if b == _SETTING_COMMAND and i + 1 < len(data):
+                if data[i + 1] == _CLEAR_COMMAND:
+                    self.glass = [bytearray(b' ' * _MAX_COLS) for _ in range(_MAX_ROWS)]
+                    self.col = self.row = 0
+                    self.nr_clears += 1
+                i += 2
+                continue
+            if self.col >= _MAX_COLS:  # the serLCD firmware continues on the next row
+                self.col = 0
+                self.row = (self.row + 1) % _MAX_ROWS
+            self.glass[self.row][self.col] = b
+            self.col += 1
+            i += 1
+
+    def _set_addr(self, addr):
+        self.nr_moves += 1
+        for r in range(_MAX_ROWS - 1, -1, -1):
+            if addr >= _ROW_OFFSETS[r] and addr < _ROW_OFFSETS[r] + _MAX_COLS:
+                self.row = r
+                self.col = addr - _ROW_OFFSETS[r]
+                return
+
+    # --- host only ---
+    def screen(self):
+        return [row.decode('latin-1').replace('\xdf', '\xb0') for row in self.glass]
@@ -0,0 +1,187 @@
+"""
+    make_capture.py -> host tool (CPython)
+        @brief
+        Writes a synthetic FSUIPC7 'GPS Out' capture: one $GPRMC + $GPGGA pair per second
+        for a short flight (parked, taxi, take-off, climb, cruise, descent, landing, taxi).
+        Used to replay the pipeline of Example/code.py on a pc (see replay.py)
+        when no capture recorded from MSFS2020 is at hand.
+
+    Usage: python Tools/make_capture.py [-o file] [--sentences ids] [--noise p] [--corrupt p] [--seed n]
+        --sentences ids  sentence IDs to send each second, in that order (default RMC,GGA).
+                         One or more of RMC, GGA, VTG, GLL, GSA, ZDA, GSV
+        --noise p        corrupt each byte with probability p (line noise)
+        --corrupt p      corrupt each sentence with probability p, in one of the ways of corrupt_kinds
+                         (truncated, doubled '$', empty or garbage fields, ...). See parse_bench.py
+"""
+import argparse
+import math
+import random
+import sys
+
+# (duration s, ground speed kts at the end of the phase, vertical speed fpm, turn rate deg/s)
+flight_profile = (
+    (20, 0, 0, 0),       # parked
+    (60, 15, 0, 0.5),    # taxi
+    (10, 0, 0, 0),       # holding short
+    (35, 140, 0, 0),     # take-off roll
+    (120, 180, 1500, 0), # climb
+    (30, 250, 0, 1.0),   # turn
+    (90, 250, 0, 0),     # cruise
+    (120, 160, -1000, 0),# descent
+    (30, 60, 0, 0),      # landing roll
+    (40, 12, 0, -0.5),   # taxi
+    (20, 0, 0, 0),       # parked
+)
+
+def nmea_sentence(body):
+    cs = 0
+    for c in body:
+        cs ^= ord(c)
+    return "${}*{:02X}\r\n".format(body, cs)
+
+def nmea_pos(v, deg_digits, pos_chr, neg_chr):
+    hemi = pos_chr if v >= 0 else neg_chr
+    v = abs(v)
+    d = int(v)
+    m = (v - d) * 60
+    return "{:0{}d}{:07.4f}".format(d, deg_digits, m), hemi
+
+def generate(sentences=("RMC", "GGA"), lat=38.7813, lon=-9.1359, alt_ft=374.0, crs=35.0, start=(12, 0, 0)):
+    gs = 0.0
+    t = start[0] * 3600 + start[1] * 60 + start[2]
+    for duration, gs_end, vs, turn in flight_profile:
+        gs_step = (gs_end - gs) / duration
+        for _ in range(duration):
+            hh, mm, ss = t // 3600 % 24, t // 60 % 60, t % 60
+            utc = "{:02d}{:02d}{:02d}.00".format(hh, mm, ss)
+            la, ns = nmea_pos(lat, 2, "N", "S")
+            lo, ew = nmea_pos(lon, 3, "E", "W")
+            bodies = {
+                "RMC": "GPRMC,{},A,{},{},{},{},{:.1f},{:.1f},180722,0.0,E".format(utc, la, ns, lo, ew, gs, crs),
+                "GGA": "GPGGA,{},{},{},{},{},1,08,0.9,{:.1f},M,0.0,M,,".format(utc, la, ns, lo, ew, alt_ft / 3.2808),
+                "VTG": "GPVTG,{:.1f},T,{:.1f},M,{:.1f},N,{:.1f},K".format(crs, crs, gs, gs * 1.852),
+                "GLL": "GPGLL,{},{},{},{},{},A".format(la, ns, lo, ew, utc),
+                "GSA": "GPGSA,A,3,02,05,07,09,13,16,20,29,,,,,1.6,0.9,1.3",
+                "ZDA": "GPZDA,{},18,07,2022,00,00".format(utc),
+                "GSV": "GPGSV,2,1,08,02,45,123,40,05,30,045,38,07,60,270,42,09,15,310,35",
+            }
+            for snt in sentences:
+                yield nmea_sentence(bodies[snt])
+            # one second of flight
+            gs = max(0.0, gs + gs_step)
+            crs = (crs + turn) % 360
+            dist_nm = gs / 3600
+            lat += dist_nm * math.cos(math.radians(crs)) / 60
+            lon += dist_nm * math.sin(math.radians(crs)) / 60 / math.cos(math.radians(lat))
+            alt_ft = max(374.0, alt_ft + vs / 60)
+            t += 1
+
+def nmea_body(snt):
+    # the sentence without the '$' and the '*hh\r\n' (bytes)
+    return snt[1:snt.rfind(b"*")]
+
+def nmea_bytes(body):
+    # body (bytes) with a valid checksum
+    cs = 0
+    for c in body:
+        cs ^= c
+    return b"$" + body + b"*%02X\r\n" % cs
+
+def garbage(rnd, n, binary=False):
+    if binary:
+        return bytes(rnd.randrange(256) for _ in range(n))
+    return bytes(rnd.choice(b"0123456789.-+,*$AEINSWXZ \t") for _ in range(n))
+
+# The ways in which corrupt_sentence() damages a sentence. Those marked (valid) keep a valid checksum:
+# the framer passes them on and the decoders must cope with their fields
+corrupt_kinds = (
+    "truncate",    # cut off anywhere: the next sentence starts mid-buffer
+    "drop",        # one byte lost (uart overrun)
+    "dollar",      # a doubled '$', or a '$' in the middle
+    "flip",        # one bit flipped (line noise): bad checksum
+    "checksum",    # another checksum
+    "lowercase",   # checksum in lowercase hex (valid)
+    "no_crlf",     # no '\r\n': runs into the next sentence
+    "empty",       # an empty field (valid)
+    "all_empty",   # all fields empty (valid)
+    "garbage",     # a field of garbage, e.g. '3.8.-1' for the altitude (valid)
+    "missing",     # the last fields missing (valid)
+    "many",        # more fields than the tokenizer holds (valid)
+    "long",        # longer than 82 characters (valid)
+    "binary",      # binary bytes in between
+)
+
+def corrupt_sentence(snt, kind, rnd):
+    # snt: one sentence (bytes, '$' to '\n'). Returns the damaged bytes
+    body = nmea_body(snt)
+    fields = body.split(b",")
+    if kind == "truncate":
+        return snt[:rnd.randrange(1, len(snt) - 1)]
+    if kind == "drop":
+        i = rnd.randrange(len(snt))
+        return snt[:i] + snt[i+1:]
+    if kind == "dollar":
+        i = rnd.randrange(len(snt) - 2)
+        return snt[:i] + b"$" + snt[i:]
+    if kind == "flip":
+        i = rnd.randrange(1, len(snt) - 2)
+        return snt[:i] + bytes((snt[i] ^ (1 << rnd.randrange(7)),)) + snt[i+1:]
+    if kind == "checksum":
+        cs = int(snt[-4:-2], 16)
+        return snt[:-4] + b"%02X\r\n" % (cs ^ rnd.randrange(1, 256))
+    if kind == "lowercase":
+        return snt[:-4] + snt[-4:-2].lower() + b"\r\n"
+    if kind == "no_crlf":
+        return snt[:-2]
+    if kind == "empty":
+        fields[rnd.randrange(1, len(fields))] = b""
+    elif kind == "all_empty":
+        fields = [fields[0]] + [b""] * (len(fields) - 1)
+    elif kind == "garbage":
+        fields[rnd.randrange(1, len(fields))] = garbage(rnd, rnd.randrange(1, 12)).replace(b",", b"").replace(b"*", b"")
+    elif kind == "missing":
+        fields = fields[:rnd.randrange(1, len(fields))]
+    elif kind == "many":
+        fields += [b"1"] * rnd.randrange(24, 40)
+    elif kind == "long":
+        fields[-1] += b"0" * rnd.randrange(82, 120)
+    elif kind == "binary":
+        i = rnd.randrange(len(snt))
+        return snt[:i] + garbage(rnd, rnd.randrange(1, 20), binary=True) + snt[i:]
+    return nmea_bytes(b",".join(fields))
+
+def corrupt(sentences, p, rnd, kinds=corrupt_kinds):
+    # yields the sentences (str), each corrupted with probability p in one of kinds (bytes)
+    for snt in sentences:
+        snt = snt.encode("ascii")
+        if p > 0 and rnd.random() < p:
+            snt = corrupt_sentence(snt, rnd.choice(kinds), rnd)
+        yield snt
+
+def add_noise(data, p, rnd):
+    data = bytearray(data)
+    for i in range(len(data)):
+        if rnd.random() < p:
+            data[i] ^= 1 << rnd.randrange(7)
+    return bytes(data)
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-o", "--output", default="-")
+    ap.add_argument("--sentences", default="RMC,GGA")
+    ap.add_argument("--noise", type=float, default=0.0)
+    ap.add_argument("--corrupt", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=2022)
+    args = ap.parse_args()
+    rnd = random.Random(args.seed)
+    data = b"".join(corrupt(generate(args.sentences.upper().split(",")), args.corrupt, rnd))
+    if args.noise > 0:
+        data = add_noise(data, args.noise, rnd)
+    if args.output == "-":
+        sys.stdout.buffer.write(data)
+    else:
+        with open(args.output, "wb") as f:
+            f.write(data)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+"""
+    parse_bench.py -> host tool (CPython)
+        @brief
+        Speed, allocation and robustness check of the NMEA parser of msfs_gps: nmea_framer -> burst_reader -> gps_fix.read(),
+        without the rest of the app. The sentences come from memory (see mem_uart) in chunks, as from the uart,
+        at the clock of the baudrate: the app's monotonic_ns() is replaced by that clock, so the runs are repeatable.
+        bench  A clean capture (make_capture.generate()) and a capture with --corrupt of its sentences damaged
+               (make_capture.corrupt()) are each parsed --rounds times. Every item of every fix is decoded.
+               Reported: sentences/s (best round), bytes allocated per sentence (tracemalloc, as heap_stats does on
+               a host build) and what the parser made of the corrupted capture.
+        fuzz   --cases random streams: a random part of the flight with a random mix of sentence types, each sentence
+               damaged with a random probability in one of the corrupt_kinds of make_capture, sometimes binary garbage
+               in between, read in random chunks into a ring of random size, with or without an idle second
+               between the bursts (so late sentences are published as partial fixes and joined).
+               Properties checked: the parser never raises, and every sentence of a published fix has the form
+               '$' ID ... '*hh\r\n', at most nmea_max_len bytes, the ID of its type and a valid checksum
+               (checked here, apart from the framer). A failing case is shrunk to the fewest sentences that
+               still fail; these are written to fuzz_case_<n>.nmea in --out (default: the temp directory).
+               --case n runs case n alone. The fixes published by all cases are counted (fixes, partial, joined):
+               a fuzz run in which not one fix comes out checks nothing, and fails.
+        The results are compared with a baseline (Tools/data/parse_baseline.json). The run fails (exit status 1) when
+        sentences/s drop more than --tolerance below the baseline, more bytes are allocated per sentence,
+        fewer sentences or fixes come out of the corrupted capture or the fuzz cases, or a fuzz case fails.
+        --update writes the results as the new baseline. sentences/s depend on the pc: update the baseline on
+        the pc that runs the check.
+
+    Usage: python Tools/parse_bench.py [--rounds n] [--corrupt p] [--cases n] [--case n] [--seed n] [--out dir] [--baseline file] [--tolerance x] [--update] [--json]
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import traceback
+
+tools_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(tools_dir)
+sys.path.insert(0, os.path.join(repo_dir, "Example", "lib"))
+
+import make_capture                                                      # noqa: E402
+from msfs_gps import fix as fix_mod, nmea as nmea_mod                    # noqa: E402
+from msfs_gps.nmea import nmea_framer, nmea_max_len, snt_ids, snt_other, _nr_fix_items  # noqa: E402
+from msfs_gps.fix import gps_fix, burst_reader, fix_partial, fix_joined  # noqa: E402
+from msfs_gps.stats import heap_stats                                    # noqa: E402
+
+default_baseline = os.path.join(tools_dir, "data", "parse_baseline.json")
+snt_all = ("RMC", "GGA", "VTG", "GLL", "GSA", "ZDA", "GSV")
+
+class sim_clock:
+    # replaces monotonic_ns() in msfs_gps.nmea and msfs_gps.fix
+    def __init__(self):
+        self.t = 1000000000
+
+    def now(self):
+        return self.t
+
+    def advance(self, s):
+        self.t += int(s * 1000000000)
+
+class mem_uart:
+    # uart that hands out the bytes of load() in chunks. The clock advances with the bytes, at baud.
+    # With rnd the chunks have a random length (at most the framer's chunk), else they fill the chunk
+    def __init__(self, clock, baud, rnd=None):
+        self.clock = clock
+        self.baud = baud
+        self.rnd = rnd
+        self.data = b""
+        self.pos = 0
+
+    def load(self, data):
+        self.data = data
+        self.pos = 0
+
+    def pending(self):
+        return self.pos < len(self.data)
+
+    def readinto(self, buf):
+        n = min(len(buf), len(self.data) - self.pos)
+        if self.rnd and n > 1:
+            n = self.rnd.randint(1, n)
+        if n <= 0:
+            return None
+        buf[:n] = self.data[self.pos:self.pos + n]
+        self.pos += n
+        self.clock.advance(n * 10 / self.baud)
+        return n
+
+    def reset_input_buffer(self):
+        pass
+
+class parser_rig:
+    # the parse side of the app (see app.parse_task()): a framer, a burst reader and a pool of fix records
+    def __init__(self, chunk_len=2 * nmea_max_len, nr_slots=8, baud=4800, late=1.5, rnd=None, heap=None):
+        self.clock = sim_clock()
+        fix_mod.monotonic_ns = self.clock.now
+        nmea_mod.monotonic_ns = self.clock.now
+        self.uart = mem_uart(self.clock, baud, rnd)
+        self.framer = nmea_framer(self.uart, chunk_len, nr_slots)
+        self.reader = burst_reader(self.framer, late)
+        self.reader.pairer.baud = baud
+        self.reader.verbose = False
+        self.pool = [gps_fix() for _ in range(4)]
+        self.p = 0
+        self.heap = heap  # heap_stats with the stages of heap_stages, or None
+        self.nr_fixes = 0
+
+    def drain(self, on_fix=None):
+        # the complete bursts in the framer -> fixes, each decoded in full
+        heap = self.heap
+        while True:
+            fix = self.pool[self.p]
+            if heap:
+                heap.start(1)
+            n = self.reader.read(fix)
+            if n:
+                self.reader.complete(fix)
+            if heap:
+                heap.stop(1)
+            if not n:
+                return
+            if fix.valid:
+                if heap:
+                    heap.start(2)
+                for i in range(_nr_fix_items):
+                    fix.read(i)
+                if heap:
+                    heap.stop(2)
+                self.nr_fixes += 1
+                if on_fix:
+                    on_fix(fix)
+                self.p = (self.p + 1) % len(self.pool)
+            self.pool[self.p].clean()
+
+    def feed(self, data, gap=1.0, on_fix=None):
+        # data: the bytes of one burst. gap: seconds of silence after it (the parse task wakes at t_due meanwhile)
+        self.uart.load(data)
+        while self.uart.pending():
+            if self.heap:
+                self.heap.start(0)
+            self.framer.poll()
+            if self.heap:
+                self.heap.stop(0)
+            self.drain(on_fix)
+        if gap:
+            t_end = self.clock.t + int(gap * 1000000000)
+            t_due = self.reader.pairer.t_due
+            if t_due and t_due < t_end:
+                self.clock.t = max(self.clock.t, t_due)
+                self.drain(on_fix)
+            self.clock.t = max(self.clock.t, t_end)
+
+    def stats(self):
+        framer = self.framer
+        pairer = self.reader.pairer
+        return {"accepted": sum(framer.nr_ok[:snt_other]), "rejected": sum(framer.nr_bad),
+                "skipped": framer.nr_ok[snt_other], "too_long": framer.bad, "cut": framer.nr_cut,
+                "dropped": framer.dropped, "fixes": self.nr_fixes, "partial": pairer.nr_partial,
+                "joined": pairer.nr_joined, "lost": self.reader.lost()}
+
+heap_stages = ("framer.poll", "reader.read", "fix.read")
+
+def bursts_of(sentences, per_burst):
+    # groups the sentences of make_capture.generate() (or corrupt()) by second
+    bursts = []
+    burst = []
+    for snt in sentences:
+        burst.append(snt if isinstance(snt, bytes) else snt.encode("ascii"))
+        if len(burst) == per_burst:
+            bursts.append(burst)
+            burst = []
+    return bursts
+
+# +--------------------------------------+
+# | Benchmark                            |
+# +--------------------------------------+
+def bench(bursts, rounds):
+    data = [b"".join(b) for b in bursts]
+    best = 0.0
+    for _ in range(rounds):
+        rig = parser_rig()
+        gc.collect()
+        t0 = time.perf_counter()
+        for d in data:
+            rig.feed(d)
+        t = time.perf_counter() - t0
+        best = max(best, rig.stats()["accepted"] / t)
+    # one more round for the allocations: tracemalloc slows it down
+    heap = heap_stats(heap_stages)
+    heap.enable()
+    rig = parser_rig(heap=heap)
+    for d in data:
+        rig.feed(d)
+    heap.tracemalloc.stop()
+    gc.callbacks.remove(heap.gc_callback)
+    r = rig.stats()
+    r["bytes"] = sum(len(d) for d in data)
+    r["sentences_per_s"] = int(best)
+    r["alloc_per_sentence"] = {name: round(heap.alloc[st] / max(1, r["accepted"]), 1) for st, name in enumerate(heap_stages)}
+    r["alloc_per_sentence"]["total"] = round(sum(heap.alloc) / max(1, r["accepted"]), 1)
+    return r
+
+# +--------------------------------------+
+# | Fuzzer                               |
+# +--------------------------------------+
+snt_form = re.compile(rb"\$([^$*\r\n]*)\*([0-9A-Fa-f]{2})\r\n\Z")
+
+def snt_error(tp, snt):
+    # why sentence snt (bytes) of type tp may not be in a published fix. None if it may
+    if len(snt) > nmea_max_len:
+        return "longer than {} bytes".format(nmea_max_len)
+    m = snt_form.match(snt)
+    if not m:
+        return "not of the form $...*hh<CR><LF>"
+    cs = 0
+    for c in m.group(1):
+        cs ^= c
+    if cs != int(m.group(2), 16):
+        return "checksum {} instead of {:02X}".format(m.group(2).decode(), cs)
+    if snt[1:6] != snt_ids[tp]:
+        return "not a {}".format(snt_ids[tp].decode())
+    return None
+
+def fix_errors(fix):
+    errors = []
+    for tp in range(snt_other):
+        if fix.have & (1 << tp):
+            p = tp * nmea_max_len
+            snt = bytes(fix.mv[p:p + fix.lens[tp]])
+            e = snt_error(tp, snt)
+            if e:
+                errors.append("{!r}: {}".format(snt, e))
+    return errors
+
+def fuzz_case(n, seed):
+    # case n: (bursts, parameters of the rig)
+    rnd = random.Random(seed * 1000003 + n)
+    ids = rnd.sample(snt_all, rnd.randint(1, 4))
+    bursts = bursts_of(make_capture.generate(ids), len(ids))
+    first = rnd.randrange(len(bursts) - 20)
+    bursts = bursts[first:first + rnd.randint(2, 20)]
+    p = rnd.choice((0.05, 0.2, 0.5, 1.0))
+    kinds = make_capture.corrupt_kinds if rnd.random() < 0.5 else rnd.sample(make_capture.corrupt_kinds, 2)
+    for burst in bursts:
+        for i in range(len(burst)):
+            if rnd.random() < p:
+                burst[i] = make_capture.corrupt_sentence(burst[i], rnd.choice(kinds), rnd)
+        if rnd.random() < 0.1:
+            burst.insert(rnd.randrange(len(burst) + 1), make_capture.garbage(rnd, rnd.randrange(1, 100), binary=True))
+    params = {"nr_slots": rnd.choice((2, 4, 8)), "chunk_len": rnd.choice((nmea_max_len, 2 * nmea_max_len, 512)),
+              "baud": rnd.choice((4800, 115200)), "gaps": [rnd.choice((0, 0, 0.05, 1.0)) for _ in bursts],
+              "chunks": rnd.randrange(1 << 30)}
+    return bursts, params
+
+def run_case(bursts, params, counts=None):
+    # returns the errors: an exception of the parser or a published fix that should not have been.
+    # The fixes published are added to counts (fixes, partial, joined)
+    errors = []
+
+    def on_fix(fix):
+        errors.extend(fix_errors(fix))
+        if counts is not None:
+            counts["fixes"] += 1
+            if fix.part == fix_partial:
+                counts["partial"] += 1
+            elif fix.part == fix_joined:
+                counts["joined"] += 1
+
+    try:
+        rig = parser_rig(params["chunk_len"], params["nr_slots"], params["baud"], rnd=random.Random(params["chunks"]))
+        for burst, gap in zip(bursts, params["gaps"]):
+            rig.feed(b"".join(burst), gap, on_fix)
+    except Exception:
+        errors.append(traceback.format_exc(limit=-3).strip())
+    return errors
+
+def shrink(bursts, params):
+    # the fewest sentences (whole bursts first) with which the case still fails
+    def fails(b):
+        p = dict(params, gaps=params["gaps"][:len(b)])
+        return len(run_case(b, p)) > 0
+
+    i = 0
+    while i < len(bursts):
+        b = bursts[:i] + bursts[i + 1:]
+        if b and fails(b):
+            bursts = b
+            params = dict(params, gaps=params["gaps"][:i] + params["gaps"][i + 1:])
+        else:
+            i += 1
+    for i in range(len(bursts)):
+        j = 0
+        while j < len(bursts[i]):
+            b = bursts[:i] + [bursts[i][:j] + bursts[i][j + 1:]] + bursts[i + 1:]
+            if fails(b):
+                bursts = b
+            else:
+                j += 1
+    return bursts, params
+
+def fuzz(cases, seed, only=None, verbose=False, out_dir=None):
+    r = {"cases": 0, "failed": [], "sentences": 0, "fixes": 0, "partial": 0, "joined": 0}
+    for n in ([only] if only is not None else range(cases)):
+        bursts, params = fuzz_case(n, seed)
+        r["cases"] += 1
+        r["sentences"] += sum(len(b) for b in bursts)
+        errors = run_case(bursts, params, r)
+        if errors:
+            bursts, params = shrink(bursts, params)
+            path = os.path.join(out_dir or tempfile.gettempdir(), "fuzz_case_{}.nmea".format(n))
+            with open(path, "wb") as f:
+                f.write(b"".join(b"".join(b) for b in bursts))
+            r["failed"].append({"case": n, "errors": errors[:3], "file": path})
+            if verbose:
+                print("case {}: {} ({} sentences in {})".format(n, errors[0], sum(len(b) for b in bursts), path))
+        elif verbose and only is not None:
+            print("case {}: ok ({} bursts, {} fixes, {})".format(n, len(bursts), r["fixes"], params))
+    return r
+
+# +--------------------------------------+
+# | Baseline                             |
+# +--------------------------------------+
+def regressions(r, base, tolerance):
+    # the ways in which the results r are worse than the baseline base
+    found = []
+    for name in ("clean", "corrupted"):
+        if name not in base:
+            continue
+        now = r[name]
+        was = base[name]
+        if now["sentences_per_s"] < was["sentences_per_s"] * (1 - tolerance):
+            found.append("{}: {} sentences/s, baseline {}".format(name, now["sentences_per_s"], was["sentences_per_s"]))
+        a = now["alloc_per_sentence"]["total"]
+        b = was["alloc_per_sentence"]["total"]
+        if a > b * (1 + tolerance) + 1:
+            found.append("{}: {} bytes allocated per sentence, baseline {}".format(name, a, b))
+    if base.get("seed") == r["seed"] and base.get("corrupt") == r["corrupt"] and "corrupted" in base:
+        for k in ("accepted", "fixes"):
+            if r["corrupted"][k] < base["corrupted"][k]:
+                found.append("corrupted: {} {}, baseline {}".format(k, r["corrupted"][k], base["corrupted"][k]))
+    f = r["fuzz"]
+    if f["cases"] and f["fixes"] == 0:
+        found.append("fuzz: not one fix published in {} cases".format(f["cases"]))
+    elif base.get("seed") == r["seed"] and base.get("fuzz", {}).get("cases") == f["cases"]:
+        if f["fixes"] < base["fuzz"].get("fixes", 0):
+            found.append("fuzz: fixes {}, baseline {}".format(f["fixes"], base["fuzz"]["fixes"]))
+    for f in r["fuzz"]["failed"]:
+        found.append("fuzz case {} fails: {} (see {})".format(f["case"], f["errors"][0].splitlines()[-1], f["file"]))
+    return found
+
+def print_report(r):
+    for name in ("clean", "corrupted"):
+        b = r[name]
+        print("{} capture ({} bytes):".format(name, b["bytes"]))
+        print("  sentences/s        : {}".format(b["sentences_per_s"]))
+        print("  accepted / rejected / skipped: {} / {} / {} (too long {}, cut off {}, ring full {})".format(
+            b["accepted"], b["rejected"], b["skipped"], b["too_long"], b["cut"], b["dropped"]))
+        print("  fixes              : {} ({} partial, {} joined later, {} lost)".format(
+            b["fixes"], b["partial"], b["joined"], b["lost"]))
+        print("  alloc (bytes/sentence, tracemalloc): " + ", ".join(
+            "{} {}".format(k, v) for k, v in b["alloc_per_sentence"].items()))
+    f = r["fuzz"]
+    print("fuzz: {} cases, {} sentences, {} fixes ({} partial, {} joined later), {} failed".format(
+        f["cases"], f["sentences"], f["fixes"], f["partial"], f["joined"], len(f["failed"])))
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--corrupt", type=float, default=0.1)
+    ap.add_argument("--cases", type=int, default=500)
+    ap.add_argument("--case", type=int)
+    ap.add_argument("--seed", type=int, default=2022)
+    ap.add_argument("--out", default=tempfile.gettempdir(), help="directory of the fuzz_case_<n>.nmea files")
+    ap.add_argument("--baseline", default=default_baseline)
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    ap.add_argument("--update", action="store_true")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    if args.case is not None:
+        f = fuzz(0, args.seed, args.case, verbose=True, out_dir=args.out)
+        sys.exit(1 if f["failed"] else 0)
+    clean = bursts_of(make_capture.generate(), 2)
+    corrupted = bursts_of(make_capture.corrupt(make_capture.generate(), args.corrupt, random.Random(args.seed)), 2)
+    r = {"seed": args.seed, "corrupt": args.corrupt,
+         "clean": bench(clean, args.rounds), "corrupted": bench(corrupted, args.rounds),
+         "fuzz": fuzz(args.cases, args.seed, verbose=not args.json, out_dir=args.out)}
+    if args.json:
+        print(json.dumps(r, indent=2))
+    else:
+        print_report(r)
+    if args.update:
+        with open(args.baseline, "w") as f:
+            json.dump(r, f, indent=2)
+            f.write("\n")
+        print("baseline written to {}".format(args.baseline))
+        return
+    if not os.path.exists(args.baseline):
+        print("no baseline ({}): run with --update".format(args.baseline))
+        return
+    with open(args.baseline) as f:
+        found = regressions(r, json.load(f), args.tolerance)
+    for s in found:
+        print("REGRESSION: " + s)
+    if found:
+        sys.exit(1)
+    print("no regressions against {}".format(args.baseline))
+
+if __name__ == "__main__":
+    main()
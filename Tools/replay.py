@@ -0,0 +1,372 @@
+"""
+    replay.py -> host tool (CPython)
+        @brief
+        Runs the asyncio pipeline of Example/code.py (uart_task() -> parse_task() -> state_task() -> render_task())
+        on a pc. code.py is loaded as on the device: it imports the app of the msfs_gps package (Example/lib)
+        and changes its settings; the replay then sets its own (see below) and runs app.init(), setup() and loop().
+        The CircuitPython modules that msfs_gps.adapters uses (board, busio, feathers2, sparkfun_serlcd, ...) are
+        replaced by the stand-ins in Tools/host: the uart replays an NMEA capture at its baudrate (optionally accelerated)
+        and the lcd counts the i2c bytes, cursor moves and clears.
+        At the end a report is printed: sentences/s, accepted vs rejected (and skipped) sentences,
+        uart bytes lost, lcd traffic and the rx -> lcd latency percentiles
+        (the same measure as the 'Duration rx -> lcd' that code.py prints).
+        With --speed x the clock of the app (monotonic_ns() in each msfs_gps module) runs x times faster, so the sleeps and bus times are
+        reported as on the device. The cpu time of the pc is then over-counted x times:
+        use a low --speed when the latencies matter.
+
+    Usage: python Tools/replay.py [capture ...] [--speed x] [--period s] [--baud n] [--i2c-hz n] [--diagnostics] [--heap] [--trace file] [--track file] [--dead-reckoning] [--airports file] [--lcd2] [--lcd-fail a:b] [--slow-boot] [--json] [-v]
+        --speed x   replay x times faster than real time (sleeps and bus times are scaled). 0 = as fast as possible:
+                    the whole capture has arrived at the start, for the sentences/s of the parser. The app's clock
+                    is then the pc's, so the dwell times of the flight state and the frame pacing are not those of a flight
+        --period s  seconds between two bursts of sentences (FSUIPC7 sends one burst per second)
+        --baud n    baudrate of the feed (default 4800). code.py detects it, unless its gps_baudrate is set
+        --diagnostics  switch on use_diagnosics in code.py and add its latency histogram per stage to the report
+        --heap      switch on use_heap_diagnostics in code.py (tracemalloc) and add the bytes allocated per stage
+        --trace f   switch on use_tracer in code.py and write its span ring as a Chrome trace to file f
+                    (see trace2chrome.py). The ring holds the last trace_ring_len spans
+        --track f   switch on use_track_recorder in code.py with track_file f (appended to, see track2gpx.py)
+        --dead-reckoning  switch on use_dead_reckoning in code.py: predicted frames between the fixes.
+                    They are counted apart (dr_frames) and not in the rx -> lcd latencies
+        --airports f  switch on use_airports in code.py with airport_file f (see build_airports.py)
+        --lcd2      add a second serLCD (lcd2_address) showing the flight page, with its own render queue
+        --lcd-fail a:b  the i2c writes a to b (counted from 1) of the first serLCD raise OSError, as a locked-up display.
+                    The pipeline must go on (the render task skips the display for display_retry seconds)
+        --slow-boot switch off fast_boot in code.py: the splash screens and sleeps of init() and setup() before the
+                    pipeline. The report shows the boot marks
+        --json      print the report as json (e.g. to compare runs)
+        -v          show the REPL output of code.py
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import io
+import json
+import logging
+import os
+import sys
+import time
+
+tools_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(tools_dir)
+sys.path.insert(0, os.path.join(tools_dir, "host"))
+
+import busio            # noqa: E402  (the stand-ins in Tools/host)
+import trace2chrome     # noqa: E402
+import host_clock       # noqa: E402
+import sparkfun_serlcd  # noqa: E402
+
+default_capture = os.path.join(tools_dir, "captures", "sample_flight.nmea")
+default_script = os.path.join(repo_dir, "Example", "code.py")
+
+class scaled_asyncio:
+    # asyncio for the app, with asyncio.sleep() scaled like host_clock.sleep()
+    def __getattr__(self, name):
+        return getattr(asyncio, name)
+
+    @staticmethod
+    async def sleep(t):
+        await asyncio.sleep(t / host_clock.speed if host_clock.speed > 0 else 0)
+
+def load_script(path):
+    # runs code.py (not as __main__: it does not start the app) and returns the module of the app it imports,
+    # with the clock of each msfs_gps module replaced by host_clock. A fresh import for each replay
+    lib_dir = os.path.join(os.path.dirname(os.path.abspath(path)), "lib")
+    if lib_dir not in sys.path:
+        sys.path.insert(0, lib_dir)
+    for name in [n for n in sys.modules if n == "msfs_gps" or n.startswith("msfs_gps.")]:
+        del sys.modules[name]
+    spec = importlib.util.spec_from_file_location("code_py", path)
+    script = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(script)
+    for name, mod in list(sys.modules.items()):
+        if name.startswith("msfs_gps."):
+            if hasattr(mod, "sleep"):
+                mod.sleep = host_clock.sleep
+            if hasattr(mod, "monotonic_ns"):
+                mod.monotonic_ns = host_clock.monotonic_ns
+            if hasattr(mod, "asyncio"):
+                mod.asyncio = scaled_asyncio()
+    return script.app
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    v = sorted(values)
+    k = max(0, min(len(v) - 1, int(round(p / 100 * len(v) + 0.5)) - 1))
+    return v[k]
+
+def heap_report(m):
+    h = m.heap
+    r = {}
+    for st, name in enumerate(h.names):
+        calls = h.calls_total[st] + h.calls[st]
+        alloc = h.alloc_total[st] + h.alloc[st]
+        r[name] = {"calls": calls, "alloc": alloc, "alloc_per_call": alloc // calls if calls else 0,
+                   "gc": h.nr_gc_total[st] + h.nr_gc[st]}
+    return r
+
+def run(script, capture, speed=1.0, period=1.0, i2c_hz=100000, verbose=False, diagnostics=False, baud=4800,
+        heap=False, trace=None, track=None, dead_reckoning=False,
+        airports=None, lcd2=False, slow_boot=False, lcd_fail=None):
+    # the end of the capture is a KeyboardInterrupt raised in uart_task(): asyncio would log it
+    logging.getLogger("asyncio").setLevel(logging.CRITICAL)
+    host_clock.speed = speed
+    sparkfun_serlcd.i2c_hz = i2c_hz
+    busio.uarts.clear()
+    sparkfun_serlcd.displays.clear()
+    busio.load_capture(capture, period, baudrate=baud)
+    latencies = []
+    dr_frames = []
+    frame = []
+    out = sys.stdout if verbose else io.StringIO()
+    with contextlib.redirect_stdout(out):
+        m = load_script(script)
+        if diagnostics:
+            m.use_diagnosics = True
+        if heap:
+            m.use_heap_diagnostics = True
+        if trace:
+            m.use_tracer = True
+        if track:
+            m.use_track_recorder = True
+            m.track_file = track
+        if lcd2:
+            m.use_lcd2 = True
+        if airports:
+            m.use_airports = True
+            m.airport_file = airports
+        if dead_reckoning:
+            m.use_dead_reckoning = True
+        if slow_boot:
+            m.fast_boot = False
+        m.t_boot = m.monotonic_ns()  # the boot marks are measured from init()
+        m.init()
+        if lcd_fail:
+            sparkfun_serlcd.displays[0].fail_writes = lcd_fail
+        lcd_pr_msgs = m.lcd_pr_msgs
+
+        async def timed_lcd_pr_msgs(rd, fix):
+            await lcd_pr_msgs(rd, fix)
+            if dead_reckoning and fix is m.fix_pool[m.dr_slot]:
+                dr_frames.append(fix.t_rx)
+            else:
+                latencies.append((m.monotonic_ns() - fix.t_rx) / 1e6)
+            frame[:] = sparkfun_serlcd.displays[0].screen()
+
+        m.lcd_pr_msgs = timed_lcd_pr_msgs
+        m.setup()
+        t0 = time.monotonic()
+        m.loop()
+        wall = time.monotonic() - t0
+    if trace:
+        t = m.tracer
+        i = (t.head - t.count) % t.size
+        spans = []
+        for _ in range(t.count):
+            spans.append((t.ids[i], t.t0[i], t.t1[i], t.args[i]))
+            i = (i + 1) % t.size
+        with open(trace, "w") as f:
+            json.dump(trace2chrome.to_chrome(t.names, spans), f)
+    framer = m.framer
+    names = sys.modules["msfs_gps.nmea"].snt_names
+    nr_ok_lst = list(framer.nr_ok)
+    nr_bad_lst = list(framer.nr_bad)
+    uart = busio.uarts[-1]  # the uart in use at the end
+    lcd = sparkfun_serlcd.displays[0]
+    nr_skipped = 0
+    if "other" in names and len(nr_ok_lst) == len(names):  # sentences that are not registered are skipped
+        nr_skipped = nr_ok_lst[-1]
+        nr_ok_lst[-1] = 0
+    nr_ok = sum(nr_ok_lst)
+    nr_bad = sum(nr_bad_lst)
+    frames = max(1, len(latencies))
+    governor = getattr(m, "governor", None)
+    recorder = getattr(m, "recorder", None)
+    fsm = getattr(m, "fsm", None)
+    fm = getattr(m, "metrics", None)
+    disp = {}
+    for d in getattr(m, "displays", ()):
+        n, mn, p50, p95, p99, mx = d.lat.summary()
+        disp[d.name] = {"frames": d.governor.nr_rendered, "coalesced": d.governor.coalesced(), "errors": d.nr_errors,
+                        "p50_ms": round(p50 / 1000, 2), "p99_ms": round(p99 / 1000, 2),
+                        "screen": sparkfun_serlcd.displays[len(disp)].screen()}
+    apt = {}
+    if airports and m.airports.f:
+        a = m.airports
+        n, mn, p50, p95, p99, mx = a.t_lookup.summary()
+        apt = {"nearest": a.ident.decode() if a.found else "", "dist_nm": a.dist / 10, "brg": a.brg,
+               "lookup_us": {"n": n, "p50": p50, "p99": p99, "max": mx}, "cells_loaded": a.nr_loads}
+    dr = {}
+    if dead_reckoning:
+        n, mn, p50, p95, p99, mx = m.predictor.err.summary()
+        dr = {"dr_frames": len(dr_frames), "error_m": {"n": n, "p50": p50, "p95": p95, "max": mx}}
+    stages = {}
+    if diagnostics:
+        for h in getattr(m, "diagn", ()):
+            n, mn, p50, p95, p99, mx = h.summary()
+            f = 1 / 1000  # uSecs to mSecs
+            stages[h.name] = {"n": n, "min": round(mn * f, 2), "p50": round(p50 * f, 2), "p95": round(p95 * f, 2),
+                              "p99": round(p99 * f, 2), "max": round(mx * f, 2)}
+    return {
+        "capture_bytes": len(capture),
+        "wall_s": round(wall, 3),
+        "sentences_per_s": round(nr_ok / wall, 1) if wall else 0.0,
+        "sentences_accepted": dict(zip(names, nr_ok_lst)),
+        "sentences_rejected": dict(zip(names, nr_bad_lst)),
+        "accepted": nr_ok,
+        "rejected": nr_bad,
+        "skipped": nr_skipped,
+        "uart_baudrate": uart.baudrate,
+        "uart_bytes_read": uart.nr_read,
+        "uart_bytes_lost": uart.nr_lost,
+        "rx": {"buffer": m.rx_buffer_len, "chunk": m.rx_chunk_len, "grown": m.rx_mon.nr_grown,
+               "overruns": m.rx_mon.nr_overruns, "line_losses": m.rx_mon.nr_line_losses, "fixes_lost": m.reader.lost(),
+               "sentences_cut": framer.nr_cut, "cut_bytes": framer.nr_cut_bytes,
+               "rejected_bytes": framer.nr_lost_bytes - framer.nr_cut_bytes},
+        "pairing": {"partial": m.reader.pairer.nr_partial, "joined": m.reader.pairer.nr_joined,
+                    "split": m.reader.pairer.nr_split},
+        "boot_ms": {"uart": m.boot_uart_ms, "first_rx": m.boot_rx_ms, "first_lcd": m.boot_lcd_ms,
+                    "fast": m.fast_boot},
+        "frames": len(latencies),
+        "frames_coalesced": governor.coalesced() if governor else 0,
+        "uart_overruns_avoided": governor.nr_overruns_avoided if governor else 0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p90": round(percentile(latencies, 90), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(max(latencies) if latencies else 0.0, 2),
+        },
+        "lcd": {
+            "i2c_bytes": lcd.nr_bytes,
+            "i2c_writes": lcd.nr_writes,
+            "cursor_moves": lcd.nr_moves,
+            "clears": lcd.nr_clears,
+            "i2c_errors": lcd.nr_failed,
+            "bytes_per_frame": round(lcd.nr_bytes / frames, 1),
+        },
+        "stages_ms": stages,
+        "heap": heap_report(m) if heap else {},
+        "flight_state": {"phase": m.ph_names[fsm.phase], "transitions": fsm.nr_transitions,
+                         "suppressed": fsm.nr_suppressed} if fsm else {},
+        "metrics": {"vs_fpm": fm.vs, "distance_nm": round(fm.dist / 1000000, 2),
+                    "aloft_s": fm.t_aloft // 1000000000, "gs_avg_kts": fm.avg_gs() / 10,
+                    "gs_max_kts": fm.max_gs / 10} if fm else {},
+        "displays": disp,
+        "airport": apt,
+        "dead_reckoning": dr,
+        "track": {"records": recorder.nr_records, "page_writes": recorder.nr_flushes,
+                  "dropped": recorder.nr_dropped, "errors": recorder.nr_errors} if recorder else {},
+        "last_frame": frame,
+    }
+
+def print_report(name, r):
+    print("Replay of {} ({} bytes) in {:.2f} s".format(name, r["capture_bytes"], r["wall_s"]))
+    print("  sentences/s        : {}".format(r["sentences_per_s"]))
+    print("  accepted / rejected / skipped: {} / {} / {}".format(r["accepted"], r["rejected"], r["skipped"]))
+    for k in r["sentences_accepted"]:
+        print("    {:<7s}: {:6d} / {:4d}".format(k, r["sentences_accepted"][k], r["sentences_rejected"][k]))
+    print("  uart at {} baud, bytes read / lost: {} / {}".format(r["uart_baudrate"], r["uart_bytes_read"], r["uart_bytes_lost"]))
+    if r["rx"]:
+        rx = r["rx"]
+        print("  uart buffer / chunk: {} / {} bytes (grown {}x), overruns {}, line losses {}, fixes lost {}, sentences cut {} ({} bytes)".format(
+            rx["buffer"], rx["chunk"], rx["grown"], rx["overruns"], rx["line_losses"], rx["fixes_lost"], rx["sentences_cut"],
+            rx["cut_bytes"]))
+        print("  sentences rejected : {} bytes (checksum or tail wrong, too long)".format(rx["rejected_bytes"]))
+    if r["pairing"]:
+        pr = r["pairing"]
+        print("  pairing by UTC     : {} partial fixes ({} joined later), {} bursts split by UTC time".format(
+            pr["partial"], pr["joined"], pr["split"]))
+    if r["boot_ms"]:
+        b = r["boot_ms"]
+        print("  boot (mSecs)       : uart {}, first fix rx {}, first fix on lcd {}{}".format(
+            b["uart"], b["first_rx"], b["first_lcd"], " (fast boot)" if b["fast"] else ""))
+    lat = r["latency_ms"]
+    print("  frames on lcd      : {} (coalesced: {}, uart overruns avoided: {})".format(
+        r["frames"], r["frames_coalesced"], r["uart_overruns_avoided"]))
+    print("  rx -> lcd (mSecs)  : p50 {} p90 {} p99 {} max {}".format(lat["p50"], lat["p90"], lat["p99"], lat["max"]))
+    lcd = r["lcd"]
+    print("  lcd i2c bytes {} ({} per frame), writes {}, cursor moves {}, clears {}, errors {}".format(
+        lcd["i2c_bytes"], lcd["bytes_per_frame"], lcd["i2c_writes"], lcd["cursor_moves"], lcd["clears"],
+        lcd["i2c_errors"]))
+    if r["stages_ms"]:
+        print("  stage (mSecs)           n      min      p50      p95      p99      max")
+        for name, st in r["stages_ms"].items():
+            print("    {:<14s} {:>8d} {:>8.2f} {:>8.2f} {:>8.2f} {:>8.2f} {:>8.2f}".format(
+                name, st["n"], st["min"], st["p50"], st["p95"], st["p99"], st["max"]))
+    if r["heap"]:
+        print("  heap (bytes, tracemalloc)  calls    alloc  per call   gc")
+        for name, st in r["heap"].items():
+            print("    {:<20s} {:>8d} {:>8d} {:>9d} {:>4d}".format(
+                name, st["calls"], st["alloc"], st["alloc_per_call"], st["gc"]))
+    if r["flight_state"]:
+        fs = r["flight_state"]
+        print("  flight state       : {} (transitions {}, suppressed {})".format(
+            fs["phase"], fs["transitions"], fs["suppressed"]))
+    if r["metrics"]:
+        fm = r["metrics"]
+        print("  flight metrics     : {} nm, {} s aloft, gs avg {} max {} kts, vs {} fpm".format(
+            fm["distance_nm"], fm["aloft_s"], fm["gs_avg_kts"], fm["gs_max_kts"], fm["vs_fpm"]))
+    if len(r["displays"]) > 1:
+        for name, d in r["displays"].items():
+            print("  {:<18s} : {} frames (coalesced {}, errors {}), rx -> lcd p50 {} p99 {} mSecs".format(
+                name, d["frames"], d["coalesced"], d["errors"], d["p50_ms"], d["p99_ms"]))
+    if r["airport"]:
+        a = r["airport"]
+        lk = a["lookup_us"]
+        print("  nearest airport    : {} {} nm {} deg (lookup uSecs p50 {} p99 {} max {}, cells loaded {})".format(
+            a["nearest"] or "-", a["dist_nm"], a["brg"], lk["p50"], lk["p99"], lk["max"], a["cells_loaded"]))
+    if r["dead_reckoning"]:
+        dr = r["dead_reckoning"]
+        e = dr["error_m"]
+        print("  predicted frames   : {} (error at the next fix, m: p50 {} p95 {} max {}, n {})".format(
+            dr["dr_frames"], e["p50"], e["p95"], e["max"], e["n"]))
+    if r["track"]:
+        t = r["track"]
+        print("  track: {} records, {} page writes, {} dropped, {} errors".format(
+            t["records"], t["page_writes"], t["dropped"], t["errors"]))
+    print("  +" + "-" * 20 + "+")
+    for row in r["last_frame"]:
+        print("  |" + row + "|")
+    print("  +" + "-" * 20 + "+")
+    for name, d in list(r["displays"].items())[1:]:
+        for row in d["screen"]:
+            print("  |" + row + "|  " + name)
+        print("  +" + "-" * 20 + "+")
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("captures", nargs="*", default=[default_capture])
+    ap.add_argument("--script", default=default_script)
+    ap.add_argument("--speed", type=float, default=1.0)
+    ap.add_argument("--period", type=float, default=1.0)
+    ap.add_argument("--baud", type=int, default=4800)
+    ap.add_argument("--i2c-hz", type=int, default=100000)
+    ap.add_argument("--diagnostics", action="store_true")
+    ap.add_argument("--heap", action="store_true")
+    ap.add_argument("--trace")
+    ap.add_argument("--track")
+    ap.add_argument("--dead-reckoning", action="store_true")
+    ap.add_argument("--airports")
+    ap.add_argument("--lcd2", action="store_true")
+    ap.add_argument("--lcd-fail")
+    ap.add_argument("--slow-boot", action="store_true")
+    ap.add_argument("--json", action="store_true")
+    ap.add_argument("-v", "--verbose", action="store_true")
+    args = ap.parse_args()
+    lcd_fail = tuple(int(v) for v in args.lcd_fail.split(":")) if args.lcd_fail else None
+    results = {}
+    for path in args.captures:
+        with open(path, "rb") as f:
+            capture = f.read()
+        results[path] = run(args.script, capture, args.speed, args.period, args.i2c_hz, args.verbose,
+                            args.diagnostics, args.baud, args.heap, args.trace, args.track,
+                            args.dead_reckoning, args.airports,
+                            args.lcd2, args.slow_boot, lcd_fail)
+        if not args.json:
+            print_report(path, results[path])
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+    trace2chrome.py -> host tool (CPython)
+        @brief
+        Converts the span ring that Example/code.py prints at Ctrl-C when use_tracer is True
+        (a 'TRACE_STAGES ...' line followed by 'TRACE sid start end arg' lines, see span_tracer)
+        into a Chrome trace: open the output in chrome://tracing or https://ui.perfetto.dev.
+        Each task (the part of a stage name before the '/') gets its own row.
+        Spans are complete events ('X'); spans without duration (e.g. 'fix rx') are instant events ('i').
+        arg is shown in the event's args. Other lines of the REPL log are ignored.
+
+    Usage: python Tools/trace2chrome.py repl_log.txt [-o trace.json]
+"""
+import argparse
+import json
+import sys
+
+def parse_log(lines):
+    # returns (names, [(sid, start_us, end_us, arg), ...]) of the last dump in lines
+    names = []
+    spans = []
+    for line in lines:
+        line = line.strip()
+        if line.startswith("TRACE_STAGES "):
+            names = line[len("TRACE_STAGES "):].split(",")
+            spans = []
+        elif line.startswith("TRACE "):
+            f = line.split()
+            if len(f) == 5:
+                spans.append((int(f[1]), int(f[2]), int(f[3]), int(f[4])))
+    return names, spans
+
+def to_chrome(names, spans, pid=1):
+    lanes = {}
+    for name in names:
+        lane = name.split("/", 1)[0]
+        if lane not in lanes:
+            lanes[lane] = len(lanes) + 1
+    events = []
+    for lane, tid in lanes.items():
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": lane}})
+        events.append({"name": "thread_sort_index", "ph": "M", "pid": pid, "tid": tid, "args": {"sort_index": tid}})
+    for sid, start, end, arg in spans:
+        name = names[sid] if sid < len(names) else "stage {}".format(sid)
+        lane, _, step = name.partition("/")
+        ev = {"name": step or lane, "pid": pid, "tid": lanes.get(lane, 0), "ts": start, "args": {"arg": arg}}
+        if end > start:
+            ev["ph"] = "X"
+            ev["dur"] = end - start
+        else:
+            ev["ph"] = "i"
+            ev["s"] = "t"
+        events.append(ev)
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("log")
+    ap.add_argument("-o", "--output", default="-")
+    args = ap.parse_args()
+    with open(args.log, encoding="utf-8", errors="replace") as f:
+        names, spans = parse_log(f)
+    if not spans:
+        sys.exit("no TRACE lines found in {}".format(args.log))
+    trace = to_chrome(names, spans)
+    if args.output == "-":
+        json.dump(trace, sys.stdout)
+    else:
+        with open(args.output, "w") as f:
+            json.dump(trace, f)
+        print("{} spans written to {}".format(len(spans), args.output))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+    track2gpx.py -> host tool (CPython)
+        @brief
+        Converts the flight track that Example/code.py records when use_track_recorder is True
+        (track_magic + record length, then fixed-size records of track_fmt, see track_recorder)
+        into a GPX track or a CSV file.
+        The file is read in blocks of whole records and unpacked with struct.iter_unpack(),
+        so multi-hour tracks are streamed and never held in memory.
+        A gap of more than --gap seconds between two records (e.g. the device was switched off) starts a new
+        track segment (GPX) or an empty line (CSV).
+        The GPX is version 1.1: the course and speed, which GPX 1.1 does not have, are in the <extensions> of each point
+        (Garmin TrackPointExtension v2). Records without a date (recorded before the first $GPRMC) get no <time> (GPX)
+        or an empty time (CSV).
+
+    Usage: python Tools/track2gpx.py track.bin [-o out.gpx] [--csv] [--gap s]
+"""
+import argparse
+import struct
+import sys
+
+track_fmt = "<IIiiHHi"      # as in Example/lib/msfs_gps/track.py
+track_magic = b'TRK1'
+rec_len = struct.calcsize(track_fmt)
+block_len = rec_len * 4096
+
+gpx_head = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<gpx version="1.1" creator="track2gpx" xmlns="http://www.topografix.com/GPX/1/1"'
+            ' xmlns:gpxtpx="http://www.garmin.com/xmlschemas/TrackPointExtension/v2">\n'
+            '<trk><name>{}</name>\n<trkseg>\n')
+gpx_trkpt = ('<trkpt lat="{:.6f}" lon="{:.6f}"><ele>{:.1f}</ele>{}<extensions><gpxtpx:TrackPointExtension>'
+             '<gpxtpx:speed>{:.2f}</gpxtpx:speed><gpxtpx:course>{:.1f}</gpxtpx:course>'
+             '</gpxtpx:TrackPointExtension></extensions></trkpt>\n')
+gpx_time = '<time>{}</time>'
+gpx_tail = '</trkseg>\n</trk>\n</gpx>\n'
+csv_head = "time,lat,lon,alt_ft,gs_kts,crs_deg\n"
+
+def records(f):
+    # yields the records of track file f
+    head = f.read(8)
+    if len(head) < 8 or head[:4] != track_magic:
+        raise ValueError("not a track file (no {} header)".format(track_magic.decode()))
+    n = struct.unpack("<H", head[4:6])[0]
+    if n != rec_len:
+        raise ValueError("record length {} != {}".format(n, rec_len))
+    tail = b''
+    while True:
+        block = f.read(block_len)
+        if not block:
+            break
+        if tail:
+            block = tail + block
+        end = len(block) - len(block) % rec_len
+        tail = block[end:]
+        yield from struct.iter_unpack(track_fmt, memoryview(block)[:end])
+
+def iso_time(date, utc):
+    # date yyyymmdd, utc hhmmssss -> ISO 8601. "" when there is no date
+    if date == 0:
+        return ""
+    return "{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}.{:02d}Z".format(
+        date // 10000, date // 100 % 100, date % 100, utc // 1000000, utc // 10000 % 100, utc // 100 % 100, utc % 100)
+
+def seconds(date, utc):
+    # for the gap test only: the days of a month are enough
+    return ((date % 100) * 24 + utc // 1000000) * 3600 + (utc // 10000 % 100) * 60 + utc // 100 % 100
+
+def deg(v):
+    return v / 600000  # 1/10000 minutes -> degrees
+
+def convert(f, out, csv=False, gap=10, name="track"):
+    out.write(csv_head if csv else gpx_head.format(name))
+    nr = 0
+    t_prev = None
+    for date, utc, lat, lon, gs, crs, alt in records(f):
+        t = seconds(date, utc)
+        if t_prev is not None and abs(t - t_prev) > gap:
+            out.write("\n" if csv else "</trkseg>\n<trkseg>\n")
+        t_prev = t
+        if csv:
+            out.write("{},{:.6f},{:.6f},{},{:.1f},{:.1f}\n".format(
+                iso_time(date, utc), deg(lat), deg(lon), alt, gs / 10, crs / 10))
+        else:
+            iso = iso_time(date, utc)
+            out.write(gpx_trkpt.format(deg(lat), deg(lon), alt / 3.2808, gpx_time.format(iso) if iso else "",
+                                       gs / 10 * 1852 / 3600, crs / 10))
+        nr += 1
+    if not csv:
+        out.write(gpx_tail)
+    return nr
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("track")
+    ap.add_argument("-o", "--output", default="-")
+    ap.add_argument("--csv", action="store_true")
+    ap.add_argument("--gap", type=float, default=10.0)
+    args = ap.parse_args()
+    with open(args.track, "rb") as f:
+        try:
+            if args.output == "-":
+                nr = convert(f, sys.stdout, args.csv, args.gap, args.track)
+            else:
+                with open(args.output, "w", buffering=1 << 20) as out:
+                    nr = convert(f, out, args.csv, args.gap, args.track)
+                print("{} points written to {}".format(nr, args.output))
+        except ValueError as e:
+            sys.exit("{}: {}".format(args.track, e))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+    Fixtures of the tests of the msfs_gps package (Example/lib/msfs_gps), run on CPython with pytest.
+    Only the hardware-independent modules are tested: nothing here imports board, busio or the serLCD library.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Example", "lib"))
+
+from msfs_gps import fix as fix_mod, nmea as nmea_mod, pipeline as pipeline_mod  # noqa: E402
+
+def nmea_bytes(body):
+    # body (str, without '$' and '*hh') -> the sentence with its checksum, as bytes
+    cs = 0
+    for c in body.encode("ascii"):
+        cs ^= c
+    return "${}*{:02X}\r\n".format(body, cs).encode("ascii")
+
+def rmc(utc="120000.00", lat="3846.8780,N", lon="00908.1540,W", gs="120.5", crs="35.0", date="180722"):
+    return nmea_bytes("GPRMC,{},A,{},{},{},{},{},0.0,E".format(utc, lat, lon, gs, crs, date))
+
+def gga(utc="120000.00", lat="3846.8780,N", lon="00908.1540,W", alt="114.0", hdop="0.9"):
+    return nmea_bytes("GPGGA,{},{},{},1,08,{},{},M,0.0,M,,".format(utc, lat, lon, hdop, alt))
+
+class feed_uart:
+    # uart that hands out the bytes of feed() at the next readinto(), at most the size of the buffer
+    def __init__(self):
+        self.data = b""
+
+    def feed(self, data):
+        self.data += data
+
+    def readinto(self, buf):
+        n = min(len(buf), len(self.data))
+        if n == 0:
+            return None
+        buf[:n] = self.data[:n]
+        self.data = self.data[n:]
+        return n
+
+    def reset_input_buffer(self):
+        self.data = b""
+
+class sim_clock:
+    def __init__(self):
+        self.t = 1000000000
+
+    def __call__(self):
+        return self.t
+
+    def advance_ms(self, ms):
+        self.t += ms * 1000000
+
+@pytest.fixture
+def clock(monkeypatch):
+    # monotonic_ns() of the modules that read the time
+    c = sim_clock()
+    for mod in (fix_mod, nmea_mod, pipeline_mod):
+        monkeypatch.setattr(mod, "monotonic_ns", c)
+    return c
+
+@pytest.fixture
+def uart():
+    return feed_uart()
@@ -0,0 +1,46 @@
+import os
+import sys
+
+from msfs_gps.airports import airport_index
+from msfs_gps.fix import gps_fix
+from msfs_gps.nmea import _lat, _lon
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Tools"))
+import build_airports  # noqa: E402
+
+def index_of(tmp_path, airports):
+    data, _, _, _ = build_airports.build((0, lat, lon, ident) for lat, lon, ident in airports)
+    path = tmp_path / "airports.bin"
+    path.write_bytes(data)
+    idx = airport_index(str(path))
+    assert idx.open()
+    return idx
+
+def at(lat, lon):
+    fix = gps_fix()
+    fix.put(_lat, int(round(lat * 600000)))
+    fix.put(_lon, int(round(lon * 600000)))
+    fix.valid = True
+    return fix
+
+def test_nearest_airport(tmp_path):
+    idx = index_of(tmp_path, [(38.7813, -9.1359, "LPPT"), (38.8311, -9.0389, "LPAR")])
+    idx.update(at(38.7, -9.1359))
+    assert idx.found and bytes(idx.ident) == b"LPPT"
+    assert 48 <= idx.dist <= 49  # 0.0813 degrees of latitude = 4.9 nm
+    assert idx.brg == 0
+
+def test_bearing_across_180_degrees(tmp_path):
+    idx = index_of(tmp_path, [(0.0, 179.95, "NFFW"), (0.0, -179.0, "NFFE")])
+    idx.update(at(0.0, -179.95))
+    assert bytes(idx.ident) == b"NFFW"
+    assert idx.dist == 60  # 0.1 degree of longitude at the equator = 6 nm
+    assert idx.brg == 270
+    idx.update(at(0.0, 179.95))
+    idx.update(at(0.0, 179.9))
+    assert bytes(idx.ident) == b"NFFW" and idx.brg == 90
+
+def test_no_airport_near(tmp_path):
+    idx = index_of(tmp_path, [(38.7813, -9.1359, "LPPT")])
+    idx.update(at(-33.9, 18.6))
+    assert not idx.found
@@ -0,0 +1,176 @@
+from conftest import gga, nmea_bytes, rmc
+from msfs_gps.fix import burst_reader, fix_joined, fix_partial, fix_whole, gps_fix
+from msfs_gps.nmea import _alt, _crs, _date, _gs, _hdop, _lat, _lon, _utc, nmea_framer, snt_gga, snt_rmc
+
+def rig(uart, late=1):
+    framer = nmea_framer(uart, 256)
+    reader = burst_reader(framer, late)
+    reader.verbose = False
+    return framer, reader
+
+def next_fix(framer, reader, fix):
+    # polls the framer and reads one burst into fix. The number of bytes of the burst, 0 when not complete
+    framer.poll()
+    n = reader.read(fix)
+    if n:
+        reader.complete(fix)
+    return n
+
+def test_fix_decoding(uart, clock):
+    framer, reader = rig(uart)
+    fix = gps_fix()
+    uart.feed(rmc() + gga() + rmc("120001.00"))
+    assert next_fix(framer, reader, fix) == len(rmc()) + len(gga())
+    assert fix.valid and fix.part == fix_whole
+    assert fix.read(_utc) == 12000000
+    assert fix.read(_lat) == 38 * 600000 + 468780
+    assert fix.read(_lon) == -(9 * 600000 + 81540)
+    assert fix.read(_gs) == 1205
+    assert fix.read(_crs) == 350
+    assert fix.read(_alt) == round(114.0 * 3.2808)
+    assert fix.read(_hdop) == 9
+    assert fix.read(_date) == 20220718
+    assert fix.t_rx == clock.t
+
+def test_fix_decodes_lazily(uart, clock):
+    framer, reader = rig(uart)
+    fix = gps_fix()
+    uart.feed(rmc() + gga() + rmc("120001.00"))
+    framer.poll()
+    assert reader.read(fix)
+    assert fix.scanned == 0
+    fix.read(_alt)
+    assert fix.scanned == 1 << snt_gga
+    fix.read(_alt)
+    assert fix.scanned == 1 << snt_gga
+
+def test_fix_prefers_first_registered_type(uart, clock):
+    # $GPRMC and $GPGGA both have a position: it is read from the $GPRMC
+    framer, reader = rig(uart)
+    fix = gps_fix()
+    uart.feed(rmc() + gga(lat="0000.0000,N") + rmc("120001.00"))
+    next_fix(framer, reader, fix)
+    assert fix.src[_lat] == snt_rmc
+    assert fix.read(_lat) == 38 * 600000 + 468780
+
+def test_fix_without_position_is_not_valid(uart, clock):
+    framer, reader = rig(uart)
+    fix = gps_fix()
+    vtg = nmea_bytes("GPVTG,35.0,T,34.0,M,120.5,N,223.2,K")
+    uart.feed(vtg + vtg)
+    assert next_fix(framer, reader, fix)
+    assert not fix.valid
+    assert fix.read(_gs) == 1205
+    fix.clean()
+    assert fix.have == 0 and fix.read(_gs) == 0
+
+def test_fix_short_sentence_decodes_to_zero():
+    fix = gps_fix()
+    fix.add(snt_gga, memoryview(gga()[:20] + b"*00\r\n"))
+    assert fix.read(_alt) == 0
+
+def test_burst_pairing_learns_the_burst(uart, clock):
+    framer, reader = rig(uart)
+    fixes = [gps_fix() for _ in range(3)]
+    uart.feed(rmc("120000.00") + gga("120000.00") + rmc("120001.00") + gga("120001.00"))
+    assert next_fix(framer, reader, fixes[0])  # ends at the UTC time of the next burst
+    assert reader.pairer.nr_split == 1
+    assert reader.expect == (1 << snt_rmc) | (1 << snt_gga)
+    assert next_fix(framer, reader, fixes[1])  # complete as soon as both types are in
+    assert fixes[1].read(_utc) == 12000100 and fixes[1].part == fix_whole
+    assert next_fix(framer, reader, fixes[2]) == 0
+    assert reader.lost() == 0
+
+def test_burst_pairing_partial_then_joined(uart, clock):
+    framer, reader = rig(uart)
+    fixes = [gps_fix() for _ in range(4)]
+    uart.feed(rmc("120000.00") + gga("120000.00", alt="100.0") + rmc("120001.00") + gga("120001.00", alt="200.0"))
+    next_fix(framer, reader, fixes[0])
+    next_fix(framer, reader, fixes[1])
+    # the $GPGGA of the next second is late
+    uart.feed(rmc("120002.00", gs="130.0"))
+    assert next_fix(framer, reader, fixes[2]) == 0
+    assert reader.pairer.t_due > clock.t
+    clock.advance_ms(1000)
+    assert next_fix(framer, reader, fixes[2]) == len(rmc())
+    partial = fixes[2]
+    assert partial.valid and partial.part == fix_partial
+    assert partial.read(_gs) == 1300
+    assert partial.read(_alt) == round(200.0 * 3.2808)  # carried from the last complete fix
+    assert reader.pairer.nr_partial == 1
+    # it arrives: joined with the $GPRMC of the partial fix
+    uart.feed(gga("120002.00", alt="300.0") + rmc("120003.00"))
+    assert next_fix(framer, reader, fixes[3])
+    joined = fixes[3]
+    assert joined.part == fix_joined
+    assert joined.read(_utc) == 12000200
+    assert joined.read(_gs) == 1300
+    assert joined.read(_alt) == round(300.0 * 3.2808)
+    assert reader.pairer.nr_joined == 1
+    assert reader.lost() == 0
+
+def test_burst_pairing_late_sentence_that_never_comes(uart, clock):
+    framer, reader = rig(uart)
+    fixes = [gps_fix() for _ in range(4)]
+    uart.feed(rmc("120000.00") + gga("120000.00") + rmc("120001.00") + gga("120001.00"))
+    next_fix(framer, reader, fixes[0])
+    next_fix(framer, reader, fixes[1])
+    uart.feed(rmc("120002.00"))
+    assert next_fix(framer, reader, fixes[2]) == 0
+    clock.advance_ms(1000)
+    assert next_fix(framer, reader, fixes[2])
+    assert fixes[2].part == fix_partial
+    uart.feed(rmc("120003.00") + gga("120003.00") + rmc("120004.00"))
+    assert next_fix(framer, reader, fixes[3])
+    assert fixes[3].part == fix_whole and fixes[3].read(_utc) == 12000300
+    assert reader.pairer.nr_joined == 0
+    assert reader.pairer.nr_lost == 1
+
+def test_burst_pairing_never_joins_two_seconds(uart, clock):
+    framer, reader = rig(uart)
+    fixes = [gps_fix() for _ in range(3)]
+    uart.feed(rmc("120000.00") + gga("120000.00") + rmc("120001.00") + gga("120001.00"))
+    next_fix(framer, reader, fixes[0])
+    next_fix(framer, reader, fixes[1])
+    # the $GPGGA of 12:00:02 is lost, the next one is of 12:00:03
+    uart.feed(rmc("120002.00") + gga("120003.00") + rmc("120003.00"))
+    assert next_fix(framer, reader, fixes[2])
+    assert fixes[2].read(_utc) == 12000200
+    assert fixes[2].src[_alt] < 0  # the altitude is carried, not taken from the other second
+    assert fixes[2].part == fix_partial
+    assert reader.lost() == 1
+
+def test_void_fix_is_not_valid(uart, clock):
+    framer, reader = rig(uart)
+    fixes = [gps_fix() for _ in range(2)]
+    uart.feed(nmea_bytes("GPRMC,120000.00,V,,,,,,,180722,,") + nmea_bytes("GPGGA,120000.00,,,,,0,00,,,M,,M,,") +
+              rmc("120001.00"))
+    assert next_fix(framer, reader, fixes[0])
+    assert not fixes[0].valid
+    assert fixes[0].void()
+
+def test_void_sentence_makes_the_burst_void(uart, clock):
+    # each of these alone voids a burst with a position
+    cases = (rmc().replace(b",A,", b",V,"),
+             rmc(lat=","),
+             rmc(lon=","),
+             gga().replace(b",1,08,", b",0,08,"),
+             nmea_bytes("GPGGA,120000.00,,,,,1,08,0.9,114.0,M,0.0,M,,"))
+    for snt in cases:
+        snt = nmea_bytes(snt[1:-5].decode())  # with its checksum again
+        uart.reset_input_buffer()
+        framer, reader = rig(uart)
+        fix = gps_fix()
+        other = gga() if snt[3:6] == b"RMC" else rmc()
+        uart.feed(snt + other + rmc("120001.00"))
+        assert next_fix(framer, reader, fix)
+        assert not fix.valid, snt
+
+def test_gll_status(uart, clock):
+    framer, reader = rig(uart)
+    fixes = [gps_fix() for _ in range(2)]
+    uart.feed(nmea_bytes("GPGLL,3846.8780,N,00908.1540,W,120000.00,A") +
+              nmea_bytes("GPGLL,3846.8780,N,00908.1540,W,120001.00,V") +
+              nmea_bytes("GPGLL,3846.8780,N,00908.1540,W,120002.00,A"))
+    assert next_fix(framer, reader, fixes[0]) and fixes[0].valid
+    assert next_fix(framer, reader, fixes[1]) and not fixes[1].valid
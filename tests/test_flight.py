@@ -0,0 +1,107 @@
+from msfs_gps.fix import gps_fix
+from msfs_gps.flight import (flight_state, fs_dwell_ms, ph_climb, ph_cruise, ph_none, ph_stopped, ph_takeoff,
+                             ph_taxi)
+from msfs_gps.nmea import _alt, _gs
+
+class fix_feed:
+    # one fix per second to flight_state fs, gs in kts
+    def __init__(self, fs):
+        self.fs = fs
+        self.fix = gps_fix()
+        self.t = 0
+
+    def __call__(self, gs, vs=0, alt=0, dt_ms=1000):
+        fix = self.fix
+        fix.clean()
+        fix.put(_gs, int(gs * 10))
+        fix.put(_alt, alt)
+        fix.valid = True
+        self.t += dt_ms * 1000000
+        fix.t_rx = self.t
+        return self.fs.update(fix, vs)
+
+    def hold(self, gs, ms, vs=0, alt=0):
+        # the same speed for ms milliseconds: the number of confirmed transitions
+        n = 0
+        for _ in range(ms // 1000):
+            n += self(gs, vs, alt)
+        return n
+
+def test_first_fix_sets_phase_at_once():
+    fs = flight_state()
+    assert fs.phase == ph_none
+    assert fix_feed(fs)(120, alt=3000)
+    assert fs.phase == ph_cruise
+
+def test_stop_taxi_hysteresis():
+    fs = flight_state()
+    feed = fix_feed(fs)
+    feed(0)
+    assert fs.phase == ph_stopped
+    feed.hold(2, 20000)  # below the rise threshold of 3 kts
+    assert fs.phase == ph_stopped
+    feed.hold(5, 10000)
+    assert fs.phase == ph_taxi
+    feed.hold(2, 20000)  # in the band between 1 and 3 kts: still taxi
+    assert fs.phase == ph_taxi
+    feed.hold(0, 20000)
+    assert fs.phase == ph_stopped
+    assert fs.nr_transitions == 3  # none, stopped, taxi, stopped: the first counts too
+
+def test_taxi_takeoff_hysteresis():
+    fs = flight_state()
+    feed = fix_feed(fs)
+    feed(10)
+    assert fs.phase == ph_taxi
+    feed.hold(40, 10000)
+    assert fs.phase == ph_takeoff
+    feed.hold(30, 20000)  # between 25 and 35 kts
+    assert fs.phase == ph_takeoff
+    feed.hold(20, 20000)
+    assert fs.phase == ph_taxi
+
+def test_dwell_time():
+    fs = flight_state()
+    feed = fix_feed(fs)
+    feed(0)
+    dwell = fs_dwell_ms[ph_taxi]
+    t0 = feed.t
+    while not feed(10):
+        assert feed.t - fs.t_cand < dwell * 1000000
+    assert fs.phase == ph_taxi
+    assert feed.t - t0 >= dwell * 1000000
+
+def test_short_excursion_is_suppressed():
+    fs = flight_state()
+    feed = fix_feed(fs)
+    feed(10)
+    feed.hold(10, 10000)
+    # one gust over the take-off speed, shorter than the dwell time of ph_takeoff
+    feed.hold(80, 1000)
+    feed.hold(10, 10000)
+    assert fs.phase == ph_taxi
+    assert fs.nr_suppressed == 1
+    assert fs.nr_transitions == 1
+
+def test_climb_from_takeoff():
+    fs = flight_state()
+    feed = fix_feed(fs)
+    feed(10)
+    feed.hold(60, 10000)
+    assert fs.phase == ph_takeoff
+    assert feed.hold(80, 10000, vs=800, alt=500) == 1
+    assert fs.phase == ph_climb
+    assert fs.last == ph_takeoff
+    assert fs.flight_transitions == 2
+
+def test_lost_fix_counts_as_zero_speed():
+    fs = flight_state()
+    feed = fix_feed(fs)
+    feed(10)
+    fix = feed.fix
+    for _ in range(20):
+        fix.clean()
+        feed.t += 1000000000
+        fix.t_rx = feed.t
+        fs.update(fix, 0)
+    assert fs.phase == ph_stopped
@@ -0,0 +1,149 @@
+import asyncio
+
+from msfs_gps.lcd import lcd_renderer, lcd_row_offsets
+
+class fake_lcd:
+    # records the i2c writes of a renderer. glass: what the lcd shows, from the cursor commands and characters
+    def __init__(self, nr_rows=4, row_len=20):
+        self.row_len = row_len
+        self.writes = []
+        self.moves = []
+        self.glass = [bytearray(b' ' * row_len) for _ in range(nr_rows)]
+        self.addr = 0
+        self.fail = False
+
+    def set_cursor(self, col, row):
+        self.moves.append((col, row))
+        self.addr = lcd_row_offsets[row] + col
+
+    def _write_bytes(self, data):
+        if self.fail:
+            raise OSError(19, "No such device")
+        data = bytes(data)
+        self.writes.append(data)
+        i = 0
+        while i < len(data):
+            if data[i] == 0xFE:
+                self.addr = data[i + 1] & 0x7F
+                i += 2
+                continue
+            r = max((o, n) for n, o in enumerate(lcd_row_offsets) if o <= self.addr)[1]
+            self.glass[r][self.addr - lcd_row_offsets[r]] = data[i]
+            self.addr += 1
+            i += 1
+
+    def clear(self):
+        for row in self.glass:
+            row[:] = b' ' * self.row_len
+
+    def text(self):
+        return [bytes(row) for row in self.glass]
+
+def rows(rd):
+    return [bytes(row) for row in rd.rows]
+
+def test_unchanged_frame_sends_nothing():
+    lcd = fake_lcd()
+    rd = lcd_renderer(lcd)
+    assert rd.flush() == 0
+    rd.put(0, 0, "HELLO")
+    rd.flush()
+    lcd.writes.clear()
+    assert rd.flush() == 0
+    assert lcd.writes == []
+    assert rd.nr_flushes == 3
+
+def test_only_changed_runs_are_sent():
+    lcd = fake_lcd()
+    rd = lcd_renderer(lcd)
+    rd.put(0, 2, "GS  120 ALT  5000 FT")
+    rd.flush()
+    lcd.writes.clear()
+    rd.put(0, 2, "GS  121 ALT  5000 FT")
+    assert rd.flush() == 3  # cursor command + '1'
+    assert lcd.writes == [bytes((0xFE, 0x80 | (lcd_row_offsets[2] + 6))) + b"1"]
+    assert lcd.text() == rows(rd)
+
+def test_close_changes_are_one_run():
+    lcd = fake_lcd()
+    rd = lcd_renderer(lcd)  # max_gap 4
+    rd.put(0, 0, "A   B")
+    rd.put(15, 0, "C")
+    rd.flush()
+    assert lcd.writes == [b"\xfe\x80A   B", b"\xfe\x8fC"]
+    assert rd.nr_moves == 2
+    assert lcd.text() == rows(rd)
+
+def test_wrapped_text_and_all_rows():
+    lcd = fake_lcd()
+    rd = lcd_renderer(lcd)
+    rd.put(15, 0, "0123456789")
+    rd.put(0, 3, "END")
+    rd.flush()
+    assert lcd.text()[0][15:] == b"01234"
+    assert lcd.text()[1][:5] == b"56789"
+    assert lcd.text()[3][:3] == b"END"
+    assert lcd.text() == rows(rd)
+
+def test_counters():
+    lcd = fake_lcd()
+    rd = lcd_renderer(lcd)
+    rd.put(0, 0, "AB")
+    rd.put(0, 1, "CD")
+    assert rd.flush() == 8
+    assert rd.nr_bytes == 8 and rd.nr_moves == 2
+    assert sum(len(w) for w in lcd.writes) == rd.nr_bytes
+
+def test_without_inline_cursor():
+    lcd = fake_lcd()
+    rd = lcd_renderer(lcd, inline_cursor=False)  # max_gap: a whole row
+    rd.put(0, 1, "A")
+    rd.put(19, 1, "B")
+    rd.flush()
+    assert lcd.moves == [(0, 1)]
+    assert lcd.writes == [b"A" + b" " * 18 + b"B"]
+    assert lcd.text() == rows(rd)
+
+def test_put_int():
+    rd = lcd_renderer(fake_lcd())
+    rd.put_int(0, 0, 42, 5)
+    rd.put_int(5, 0, -7, 4, fill=0x30)
+    rd.put_int(9, 0, 123456, 3)
+    assert bytes(rd.rows[0][:12]) == b"   4200-7456"  # the fill goes in front of the sign
+
+def test_clear_and_hard_clear():
+    lcd = fake_lcd()
+    rd = lcd_renderer(lcd)
+    rd.put(0, 0, "X" * 20)
+    rd.put(0, 1, "Y" * 20)
+    rd.flush()
+    rd.clear(1)
+    rd.flush()
+    assert lcd.text()[1] == b" " * 20 and lcd.text()[0] == b"X" * 20
+    rd.hard_clear()
+    lcd.writes.clear()
+    rd.flush()  # row 0 is sent again after the glass was cleared
+    assert lcd.text() == rows(rd)
+    assert len(lcd.writes) == 1
+
+def test_aflush_matches_flush():
+    lcd_a, lcd_b = fake_lcd(), fake_lcd()
+    rd_a, rd_b = lcd_renderer(lcd_a), lcd_renderer(lcd_b)
+    for rd in (rd_a, rd_b):
+        rd.put(3, 0, "N 38")
+        rd.put(0, 2, "GS 120")
+    assert asyncio.run(rd_a.aflush()) == rd_b.flush()
+    assert lcd_a.writes == lcd_b.writes
+
+def test_failed_write_is_sent_again():
+    lcd = fake_lcd()
+    rd = lcd_renderer(lcd)
+    rd.put(0, 0, "GS 120")
+    lcd.fail = True
+    try:
+        rd.flush()
+    except OSError:
+        pass
+    lcd.fail = False
+    rd.flush()
+    assert lcd.text() == rows(rd)
@@ -0,0 +1,126 @@
+from conftest import gga, nmea_bytes, rmc
+from msfs_gps.nmea import (nmea_deg_min, nmea_framer, nmea_max_len, nmea_tokens, snt_gga, snt_other, snt_rmc,
+                           snt_vtg)
+
+def framed(framer):
+    # the sentences in the ring, oldest first
+    out = []
+    while True:
+        slot = framer.pop()
+        if slot < 0:
+            return out
+        p = framer.start(slot)
+        out.append((framer.types[slot], bytes(framer.mv[p:p + framer.lens[slot]])))
+
+def test_framer_accepts_valid_checksum(uart, clock):
+    framer = nmea_framer(uart, 256)
+    uart.feed(rmc() + gga())
+    assert framer.poll() == 2
+    assert framed(framer) == [(snt_rmc, rmc()), (snt_gga, gga())]
+    assert framer.nr_ok[snt_rmc] == 1 and framer.nr_ok[snt_gga] == 1
+    assert framer.t_rx == clock.t
+
+def test_framer_accepts_lowercase_checksum(uart, clock):
+    framer = nmea_framer(uart, 256)
+    snt = rmc()
+    uart.feed(snt[:-4] + snt[-4:-2].lower() + b"\r\n")
+    assert framer.poll() == 1
+
+def test_framer_rejects_bad_checksum(uart, clock):
+    framer = nmea_framer(uart, 256)
+    snt = bytearray(gga())
+    snt[-4] = ord("0") if snt[-4] != ord("0") else ord("1")
+    uart.feed(bytes(snt) + rmc())
+    assert framer.poll() == 1
+    assert framed(framer) == [(snt_rmc, rmc())]
+    assert framer.nr_bad[snt_gga] == 1 and framer.nr_bad[snt_rmc] == 0
+    assert framer.nr_lost_bytes == len(snt)
+
+def test_framer_rejects_damaged_body(uart, clock):
+    framer = nmea_framer(uart, 256)
+    uart.feed(rmc().replace(b"120.5", b"121.5"))
+    assert framer.poll() == 0
+    assert framer.nr_bad[snt_rmc] == 1
+
+def test_framer_needs_cr_before_lf(uart, clock):
+    framer = nmea_framer(uart, 256)
+    uart.feed(rmc()[:-2] + b"\n")
+    assert framer.poll() == 0
+    assert framer.nr_bad[snt_rmc] == 1
+
+def test_framer_cut_sentence(uart, clock):
+    # a sentence cut off by the next '$' is lost, and is not counted against the type of the sentence before it
+    framer = nmea_framer(uart, 256)
+    uart.feed(rmc() + b"$GP" + gga())
+    assert framer.poll() == 2
+    assert framer.nr_cut == 1
+    assert framer.nr_cut_bytes == framer.nr_lost_bytes == 3
+    assert sum(framer.nr_bad) == 0
+
+def test_framer_line_without_type(uart, clock):
+    framer = nmea_framer(uart, 256)
+    uart.feed(rmc() + b"$GP\r\n")
+    assert framer.poll() == 1
+    assert framer.nr_bad[snt_rmc] == 0
+    assert framer.nr_bad[snt_other] == 1
+
+def test_framer_sentence_split_over_reads(uart, clock):
+    framer = nmea_framer(uart, 7)
+    uart.feed(rmc() + gga())
+    n = 0
+    while uart.data:
+        n += framer.poll()
+    assert n == 2
+    assert [tp for tp, _ in framed(framer)] == [snt_rmc, snt_gga]
+
+def test_framer_skips_unregistered_types(uart, clock):
+    framer = nmea_framer(uart, 256)
+    uart.feed(nmea_bytes("GPGSV,2,1,08,02,45,123,40") + rmc())
+    assert framer.poll() == 1
+    assert framer.nr_ok[snt_other] == 1
+
+def test_framer_drops_too_long_lines(uart, clock):
+    framer = nmea_framer(uart, 256)
+    uart.feed(nmea_bytes("GPVTG," + "1," * nmea_max_len) + rmc())
+    assert framer.poll() == 1
+    assert framer.bad == 1
+    assert framer.nr_ok[snt_vtg] == 0
+
+def test_framer_ring_full_drops_oldest(uart, clock):
+    framer = nmea_framer(uart, 1024, nr_slots=3)
+    uart.feed(rmc("120000.00") + rmc("120001.00") + rmc("120002.00"))
+    framer.poll()
+    assert framer.dropped == 1
+    assert [snt[7:16] for _, snt in framed(framer)] == [b"120001.00", b"120002.00"]
+
+def test_tokens_and_fields():
+    snt = gga(alt="-12.5", hdop="")
+    tok = nmea_tokens()
+    assert tok.scan(memoryview(snt), 0, len(snt)) == 15
+    assert tok.field_is(0, b"GPGGA")
+    assert tok.field_int(1, 2) == 12000000
+    assert tok.field_int(9, 1) == -125
+    assert tok.field_int(8, 1, default=-1) == -1  # empty
+    assert tok.field_str(10) == "M"
+    assert tok.field_chr(3) == ord("N")
+
+def test_field_int_garbage():
+    snt = nmea_bytes("GPGGA,12.0.0,x1,-,")
+    tok = nmea_tokens()
+    tok.scan(memoryview(snt), 0, len(snt))
+    assert tok.field_int(1) == 0
+    assert tok.field_int(2, default=7) == 7
+    assert tok.field_int(3) == 0
+    assert tok.field_int(9) == 0  # no such field
+
+def test_tokens_without_checksum():
+    tok = nmea_tokens()
+    snt = b"$GPRMC,1,2,3\r\n"
+    assert tok.scan(memoryview(snt), 0, len(snt)) == 0
+
+def test_deg_min():
+    snt = rmc(lat="3846.8780,S", lon="00908.1540,E")
+    tok = nmea_tokens()
+    tok.scan(memoryview(snt), 0, len(snt))
+    assert nmea_deg_min(tok, 3, 0x53) == -(38 * 600000 + 468780)
+    assert nmea_deg_min(tok, 5, 0x57) == 9 * 600000 + 81540
@@ -0,0 +1,121 @@
+import asyncio
+
+from msfs_gps.pipeline import msg_queue, render_governor
+
+def drain(q):
+    out = []
+    while True:
+        v = q.get_nowait()
+        if v == -1:
+            return out
+        out.append(v)
+
+def test_queue_fifo():
+    q = msg_queue(4)
+    for v in (1, 2, 3):
+        q.put(v)
+    assert drain(q) == [1, 2, 3]
+    assert q.get_nowait() == -1
+
+def test_queue_full_drops_oldest():
+    q = msg_queue(3)
+    for v in range(5):
+        q.put(v)
+    assert q.nr_dropped == 2
+    assert drain(q) == [2, 3, 4]
+
+def test_queue_wraps():
+    q = msg_queue(3)
+    for v in range(10):
+        q.put(v)
+        assert q.get_nowait() == v
+    assert q.nr_dropped == 0
+
+def test_queue_get_waits():
+    async def main():
+        q = msg_queue(2)
+        async def producer():
+            await asyncio.sleep(0)
+            q.put(7)
+        asyncio.create_task(producer())
+        return await asyncio.wait_for(q.get(), 1)
+    assert asyncio.run(main()) == 7
+
+def test_queue_status_frames():
+    # status frames (< -1) are items like the fix indexes
+    q = msg_queue(3)
+    q.put(-2)
+    q.put(0)
+    assert drain(q) == [-2, 0]
+
+def governed(items, size=8, dr_slot=-1, rx_busy=None):
+    # the items the governor returns for items put in its queue at once
+    async def main():
+        q = msg_queue(size)
+        gov = render_governor(q, 1000, rx_busy)
+        gov.dr_slot = dr_slot
+        for v in items:
+            q.put(v)
+        out = []
+        while q.count:
+            out.append(await gov.next())
+        return gov, out
+    return asyncio.run(main())
+
+def test_governor_coalesces_to_newest(clock):
+    gov, out = governed([1, 2, 3, 4])
+    assert out == [4]
+    assert gov.nr_coalesced == 3 and gov.nr_rendered == 1
+
+def test_governor_counts_dropped_as_coalesced(clock):
+    gov, out = governed(list(range(6)), size=4)
+    assert out == [5]
+    assert gov.coalesced() == 5
+
+def test_governor_prediction_does_not_supersede_fix(clock):
+    gov, out = governed([3, 9], dr_slot=9)
+    assert out == [3]
+    assert gov.nr_coalesced == 1
+
+def test_governor_fix_supersedes_prediction(clock):
+    gov, out = governed([9, 3], dr_slot=9)
+    assert out == [3]
+
+def test_governor_coalesces_status_frames(clock):
+    gov, out = governed([1, -2, 2])
+    assert out == [2]
+    gov, out = governed([1, 2, -3])
+    assert out == [-3]
+
+def test_governor_paces_frames(clock, monkeypatch):
+    slept = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(s):
+        slept.append(s)
+        clock.advance_ms(s * 1000)
+        await real_sleep(0)
+
+    async def main():
+        q = msg_queue(4)
+        gov = render_governor(q, 10)
+        q.put(1)
+        await gov.next()
+        t_first = clock.t
+        clock.advance_ms(30)
+        q.put(2)
+        monkeypatch.setattr(asyncio, "sleep", sleep)
+        assert await gov.next() == 2
+        return clock.t - t_first
+    assert asyncio.run(main()) == 100000000  # 1/max_fps after the first frame
+    assert slept == [0.07]
+
+def test_governor_waits_while_rx_busy(clock):
+    busy = [3]
+
+    def rx_busy():
+        busy[0] -= 1
+        return busy[0] > 0
+    gov, out = governed([1, 2], rx_busy=rx_busy)
+    assert out == [2]
+    assert gov.nr_overruns_avoided == 1
@@ -0,0 +1,104 @@
+import struct
+import types
+
+from conftest import rmc
+from msfs_gps.fix import burst_reader, gps_fix
+from msfs_gps.nmea import _alt, _crs, _date, _gs, _lat, _lon, _utc, nmea_framer
+from msfs_gps.rx import rx_monitor
+from msfs_gps import track as track_mod
+from msfs_gps.track import track_fmt, track_rec_len, track_recorder
+
+def monitor(uart, rx_len=256, chunk_len=64, budget=2048):
+    framer = nmea_framer(uart, chunk_len)
+    reader = burst_reader(framer, 1)
+    reader.verbose = False
+    mon = rx_monitor(budget, 10, reader)
+    mon.set_sizes(rx_len, chunk_len)
+    return framer, mon
+
+def receive(uart, framer, mon, in_waiting):
+    # the uart task: fill() before each read
+    while uart.data:
+        mon.fill(in_waiting)
+        framer.poll()
+
+def test_line_loss_is_not_an_overrun(uart, clock):
+    framer, mon = monitor(uart)
+    uart.feed(rmc() + b"$GP" + rmc("120001.00"))
+    receive(uart, framer, mon, 10)
+    mon.check(clock.t)
+    assert mon.nr_line_losses == 1
+    assert mon.nr_overruns == 0 and mon.want_rx == 0
+
+def test_overrun_grows_the_buffer(uart, clock):
+    framer, mon = monitor(uart)
+    uart.feed(rmc() + b"$GP" + rmc("120001.00"))
+    receive(uart, framer, mon, 200)
+    mon.check(clock.t)
+    assert mon.nr_overruns == 1 and mon.nr_line_losses == 0
+    assert (mon.want_rx, mon.want_chunk) == (512, 128)
+    mon.grown(clock.t)
+    mon.set_sizes(512, 128)
+    # a second overrun within hold seconds: no growth
+    uart.feed(b"$GP" + rmc("120002.00"))
+    receive(uart, framer, mon, 500)
+    mon.check(clock.t + 1000000000)
+    assert mon.nr_overruns == 2 and mon.want_rx == 0
+
+def test_growth_within_budget(uart, clock):
+    framer, mon = monitor(uart, budget=600)
+    uart.feed(b"$GP" + rmc())
+    receive(uart, framer, mon, 256)
+    mon.check(clock.t)
+    assert mon.want_rx + mon.want_chunk <= 600
+
+def unpacked(rec):
+    return struct.unpack_from(track_fmt, rec.pages[rec.active], rec.pos - struct.calcsize(track_fmt))
+
+def test_track_record(tmp_path):
+    rec = track_recorder(str(tmp_path / "track.bin"))
+    rec.add(gps_fix())
+    fix = gps_fix()
+    for n, v in ((_date, 20220718), (_utc, 12000000), (_lat, 23268780), (_lon, -5481540), (_gs, 1205),
+                 (_crs, 350), (_alt, 374)):
+        fix.put(n, v)
+    rec.add(fix)
+    assert unpacked(rec) == (20220718, 12000000, 23268780, -5481540, 1205, 350, 374)
+    assert rec.nr_records == 2
+
+def test_track_add_never_raises(tmp_path):
+    # a sentence with a valid checksum can hold any number
+    rec = track_recorder(str(tmp_path / "track.bin"))
+    fix = gps_fix()
+    for n, v in ((_date, -1), (_utc, 1 << 40), (_lat, 1 << 33), (_lon, -(1 << 33)), (_gs, 70000),
+                 (_crs, -30), (_alt, -(1 << 40))):
+        fix.put(n, v)
+    rec.add(fix)
+    date, utc, lat, lon, gs, crs, alt = unpacked(rec)
+    assert (date, utc, gs, crs) == (0, 0xFFFFFFFF, 0xFFFF, 3570)
+    assert lat == 0x7FFFFFFF and lon == -0x7FFFFFFF and alt == -0x7FFFFFFF
+
+def test_track_close_after_interrupted_write(tmp_path, monkeypatch):
+    # Ctrl-C while run() writes a page: close() appends only the rest of it
+    @types.coroutine
+    def step(s):
+        yield
+
+    monkeypatch.setattr(track_mod.asyncio, "sleep", step)
+    path = tmp_path / "track.bin"
+    rec = track_recorder(str(path), flush_interval=1000)
+    fix = gps_fix()
+    nr = rec.page_len // track_rec_len + 3
+    for i in range(nr):
+        fix.put(_utc, i)
+        rec.add(fix)
+    assert rec.full >= 0
+    run = rec.run()
+    for _ in range(4):  # the sleep of 1 s, the first write and two more
+        run.send(None)
+    assert 0 < rec.written < rec.full_len
+    run.close()
+    rec.close()
+    data = path.read_bytes()
+    utcs = [r[1] for r in struct.iter_unpack(track_fmt, data[8:])]
+    assert utcs == list(range(nr))